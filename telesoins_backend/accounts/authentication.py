@@ -0,0 +1,174 @@
+"""
+Authentification API avec cache des utilisateurs.
+
+Chaque requête authentifiée par jeton (``Authorization: Token ...``) ou par JWT
+(``Authorization: Bearer ...``) évite les requêtes sur ``authtoken_token`` et sur les
+utilisateurs grâce à deux niveaux de cache :
+
+* un cache LRU borné propre au processus, à durée de vie courte ;
+* le cache Django partagé (``CACHES['default']``), à durée de vie plus longue.
+
+L'utilisateur est mis en cache avec son profil patient ou médecin déjà chargé.
+Les entrées sont invalidées à la déconnexion, au changement de mot de passe, de rôle
+ou d'activation, et à la modification du profil (voir ``accounts.signals``).
+Les autres processus voient l'invalidation au plus tard après ``LOCAL_TTL`` secondes.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import User
+
+AUTH_CACHE = {
+    'LOCAL_MAXSIZE': 1024,
+    'LOCAL_TTL': 10,
+    'SHARED_TTL': 300,
+    **getattr(settings, 'AUTH_CACHE', {}),
+}
+
+# Valeur mise en cache pour un jeton inconnu (évite de réinterroger la base à chaque essai)
+MISSING = 'missing'
+
+
+class LRUCache:
+    """
+    Cache LRU borné et thread-safe, avec expiration des entrées.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LRUCache(AUTH_CACHE['LOCAL_MAXSIZE'], AUTH_CACHE['LOCAL_TTL'])
+
+
+def token_cache_key(key):
+    return f'auth:token:{key}'
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def load_user(**lookup):
+    """
+    Charger un utilisateur avec ses profils en une seule requête.
+    """
+    return User.objects.select_related('patient_profile', 'medecin_profile').get(**lookup)
+
+
+def cached_lookup(cache_key, loader):
+    """
+    Lire une valeur dans le cache local, puis dans le cache partagé, puis via ``loader``.
+    """
+    value = local_cache.get(cache_key)
+    if value is None:
+        value = cache.get(cache_key)
+        if value is None:
+            value = loader()
+            cache.set(cache_key, value, AUTH_CACHE['SHARED_TTL'])
+        local_cache.set(cache_key, value)
+
+    # Chaque requête reçoit sa propre copie : une vue qui modifie request.user
+    # ne doit pas altérer l'objet partagé par les autres requêtes.
+    return copy.copy(value) if isinstance(value, User) else None
+
+
+def invalidate_user(user_id, token_keys=None):
+    """
+    Retirer un utilisateur (et ses jetons) des caches d'authentification.
+    """
+    if token_keys is None:
+        token_keys = list(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+
+    keys = [user_cache_key(user_id)] + [token_cache_key(key) for key in token_keys]
+    cache.delete_many(keys)
+    for key in keys:
+        local_cache.delete(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    ``TokenAuthentication`` sans requête SQL tant que le jeton est en cache.
+    """
+    def authenticate_credentials(self, key):
+        def loader():
+            try:
+                token = Token.objects.only('user_id').get(key=key)
+            except Token.DoesNotExist:
+                return MISSING
+            return load_user(pk=token.user_id)
+
+        user = cached_lookup(token_cache_key(key), loader)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (user, key)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Chemin rapide sans état : le JWT est vérifié par signature, l'utilisateur vient du cache.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise exceptions.AuthenticationFailed(_('Token contained no recognizable user identification'))
+
+        def loader():
+            try:
+                return load_user(**{jwt_settings.USER_ID_FIELD: user_id})
+            except (User.DoesNotExist, ValueError):
+                return MISSING
+
+        user = cached_lookup(user_cache_key(user_id), loader)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return user
@@ -0,0 +1,240 @@
+"""
+Import en masse de patients et de médecins (CSV ou JSON).
+
+Colonnes reconnues :
+
+* communes : email (requis), role (patient ou medecin, requis), first_name, last_name,
+  phone_number, password ;
+* patient : date_of_birth (AAAA-MM-JJ), blood_type, allergies, medical_history ;
+* médecin : speciality (requis), licence_number (requis), years_of_experience.
+
+La validation est faite pour tout le lot (types et longueurs des colonnes d'après les champs des
+modèles, unicité des emails et des numéros de licence vérifiée en une requête chacune), puis les utilisateurs, profils et jetons sont créés par ``bulk_create``
+dans une seule transaction. Les signaux ``post_save`` de ``accounts.signals`` ne sont donc pas
+déclenchés : ce module crée lui-même profils et jetons.
+
+Le hachage d'un mot de passe coûte plusieurs dizaines de millisecondes : pour importer des milliers
+de comptes en quelques secondes, omettre la colonne ``password``. Le compte reçoit alors un mot de
+passe inutilisable et l'utilisateur devra le réinitialiser.
+"""
+import csv
+import io
+import json
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from .models import User, PatientProfile, MedecinProfile
+
+IMPORTABLE_ROLES = ('patient', 'medecin')
+BATCH_SIZE = 1000
+
+# Colonnes texte par rôle : (modèle, champ) dont la longueur maximale est reprise, ou None.
+# Une valeur trop longue ferait échouer tout le bulk_create (DataError sous PostgreSQL).
+TEXT_COLUMNS = {
+    None: {
+        'first_name': (User, 'first_name'),
+        'last_name': (User, 'last_name'),
+        'phone_number': (User, 'phone_number'),
+        'password': None,
+    },
+    'patient': {
+        'blood_type': (PatientProfile, 'blood_type'),
+        'allergies': (PatientProfile, 'allergies'),
+        'medical_history': (PatientProfile, 'medical_history'),
+    },
+    'medecin': {
+        'speciality': (MedecinProfile, 'speciality'),
+        'licence_number': (MedecinProfile, 'licence_number'),
+    },
+}
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []  # [{'row': numéro de ligne (1 = première ligne de données), 'errors': {...}}]
+
+    @property
+    def has_errors(self):
+        return bool(self.errors)
+
+
+def read_rows(fileobj, fmt):
+    """
+    Lire un fichier CSV ou JSON (liste d'objets) et renvoyer une liste de dictionnaires.
+    """
+    content = fileobj.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+
+    if fmt == 'json':
+        rows = json.loads(content)
+        if not isinstance(rows, list):
+            raise ValueError("Le fichier JSON doit contenir une liste d'utilisateurs.")
+        return rows
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _validate_text(data, role, errors):
+    for role_key in (None, role):
+        for column, field in TEXT_COLUMNS.get(role_key, {}).items():
+            value = data.get(column)
+            if value in (None, ''):
+                continue
+            if not isinstance(value, str):
+                errors[column] = "Doit être une chaîne de caractères."
+                continue
+            max_length = field and field[0]._meta.get_field(field[1]).max_length
+            if max_length and len(value) > max_length:
+                errors[column] = f"Ne doit pas dépasser {max_length} caractères."
+
+
+def _validate_row(row):
+    """
+    Valider une ligne sans accès à la base. Renvoie (données nettoyées, erreurs).
+    """
+    data = {key: _clean(value) for key, value in row.items() if key}
+    errors = {}
+
+    email = data.get('email') or ''
+    if not isinstance(email, str):
+        # Nombre, liste... dans un import JSON : validate_email lèverait TypeError
+        errors['email'] = "Adresse email invalide."
+        email = ''
+    else:
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors['email'] = "Adresse email invalide."
+    data['email'] = User.objects.normalize_email(email)
+
+    role = data.get('role')
+    if role not in IMPORTABLE_ROLES:
+        errors['role'] = "Le rôle doit être 'patient' ou 'medecin'."
+        role = None
+
+    _validate_text(data, role, errors)
+
+    if role == 'medecin':
+        for field in ('speciality', 'licence_number'):
+            if not data.get(field):
+                errors[field] = "Ce champ est requis pour un médecin."
+        try:
+            data['years_of_experience'] = int(data.get('years_of_experience') or 0)
+            if data['years_of_experience'] < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['years_of_experience'] = "Doit être un entier positif."
+
+    if role == 'patient' and data.get('date_of_birth'):
+        try:
+            data['date_of_birth'] = date.fromisoformat(str(data['date_of_birth']))
+        except ValueError:
+            errors['date_of_birth'] = "Format de date invalide. Utilisez AAAA-MM-JJ."
+
+    return data, errors
+
+
+def import_users(rows, dry_run=False):
+    """
+    Valider puis créer en masse les utilisateurs décrits par ``rows``.
+    Les lignes invalides sont ignorées et signalées dans ``ImportResult.errors``.
+    """
+    result = ImportResult()
+    valid = []
+    seen_emails = {}
+    seen_licences = {}
+
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            result.errors.append({'row': index, 'errors': {'row': "Ligne mal formée."}})
+            continue
+
+        data, errors = _validate_row(row)
+
+        email_key = data['email'].lower()
+        if email_key and email_key in seen_emails:
+            errors['email'] = f"Email en double (ligne {seen_emails[email_key]})."
+        seen_emails.setdefault(email_key, index)
+
+        licence = data.get('licence_number')
+        if data.get('role') == 'medecin' and licence and 'licence_number' not in errors:
+            if licence in seen_licences:
+                errors['licence_number'] = f"Numéro de licence en double (ligne {seen_licences[licence]})."
+            seen_licences.setdefault(licence, index)
+
+        if errors:
+            result.errors.append({'row': index, 'errors': errors})
+        else:
+            valid.append((index, data))
+
+    # Une seule requête par contrainte d'unicité pour tout le lot
+    existing_emails = {
+        email.lower() for email in User.objects.filter(
+            email__in=[data['email'] for _, data in valid]
+        ).values_list('email', flat=True)
+    }
+    existing_licences = set(MedecinProfile.objects.filter(
+        licence_number__in=[data['licence_number'] for _, data in valid if data['role'] == 'medecin']
+    ).values_list('licence_number', flat=True))
+
+    users, patients, medecins, tokens = [], [], [], []
+    for index, data in valid:
+        errors = {}
+        if data['email'].lower() in existing_emails:
+            errors['email'] = "Un utilisateur avec cet email existe déjà."
+        if data['role'] == 'medecin' and data['licence_number'] in existing_licences:
+            errors['licence_number'] = "Ce numéro de licence est déjà utilisé."
+        if errors:
+            result.errors.append({'row': index, 'errors': errors})
+            continue
+
+        user = User(
+            email=data['email'],
+            role=data['role'],
+            password=make_password(data.get('password') or None),
+            first_name=data.get('first_name') or '',
+            last_name=data.get('last_name') or '',
+            phone_number=data.get('phone_number') or None,
+        )
+        users.append(user)
+        tokens.append(Token(key=Token.generate_key(), user=user))
+
+        if data['role'] == 'patient':
+            patients.append(PatientProfile(
+                user=user,
+                date_of_birth=data.get('date_of_birth') or None,
+                allergies=data.get('allergies') or '',
+                medical_history=data.get('medical_history') or '',
+                blood_type=data.get('blood_type') or None,
+            ))
+        else:
+            medecins.append(MedecinProfile(
+                user=user,
+                speciality=data['speciality'],
+                licence_number=data['licence_number'],
+                years_of_experience=data['years_of_experience'],
+            ))
+
+    result.errors.sort(key=lambda error: error['row'])
+    result.created = len(users)
+
+    if dry_run or not users:
+        return result
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        PatientProfile.objects.bulk_create(patients, batch_size=BATCH_SIZE)
+        MedecinProfile.objects.bulk_create(medecins, batch_size=BATCH_SIZE)
+        Token.objects.bulk_create(tokens, batch_size=BATCH_SIZE)
+
+    return result
@@ -0,0 +1,38 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.bulk_import import import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = "Importe en masse des patients et des médecins depuis un fichier CSV ou JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Chemin du fichier à importer.")
+        parser.add_argument('--format', choices=['csv', 'json'], help="Format du fichier (déduit de l'extension par défaut).")
+        parser.add_argument('--dry-run', action='store_true', help="Valider le fichier sans rien créer.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('json' if path.lower().endswith('.json') else 'csv')
+
+        if not os.path.exists(path):
+            raise CommandError(f"Fichier introuvable : {path}")
+
+        try:
+            with open(path, 'rb') as fileobj:
+                rows = read_rows(fileobj, fmt)
+        except ValueError as exc:
+            raise CommandError(f"Fichier illisible : {exc}")
+
+        result = import_users(rows, dry_run=options['dry_run'])
+
+        for error in result.errors:
+            details = '; '.join(f"{field}: {message}" for field, message in error['errors'].items())
+            self.stderr.write(f"Ligne {error['row']} : {details}")
+
+        verb = "seraient créés" if options['dry_run'] else "créés"
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} utilisateurs {verb}, {len(result.errors)} lignes en erreur."
+        ))
@@ -1,8 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from rest_framework.authtoken.models import Token
 from .models import User, PatientProfile, MedecinProfile
+from .authentication import invalidate_user
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -27,4 +28,22 @@ def save_user_profile(sender, instance, **kwargs):
     if instance.role == 'patient' and hasattr(instance, 'patient_profile'):
         instance.patient_profile.save()
     elif instance.role == 'medecin' and hasattr(instance, 'medecin_profile'):
-        instance.medecin_profile.save()
\ No newline at end of file
+        instance.medecin_profile.save()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Mot de passe, rôle ou activation ont pu changer : l'utilisateur en cache n'est plus fiable
+    invalidate_user(instance.pk)
+
+@receiver(post_save, sender=PatientProfile)
+@receiver(post_save, sender=MedecinProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    # Le profil est préchargé avec l'utilisateur mis en cache
+    invalidate_user(instance.user_id)
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    # Déconnexion ou régénération du jeton
+    invalidate_user(instance.user_id, token_keys=[instance.key])
@@ -54,6 +54,16 @@ class UserForm(forms.ModelForm):
             user.save()
         return user
 
+class UserImportForm(forms.Form):
+    file = forms.FileField(label="Fichier CSV ou JSON", widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.json'}))
+    dry_run = forms.BooleanField(label="Valider uniquement (ne rien créer)", required=False, widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+    
+    def clean_file(self):
+        uploaded = self.cleaned_data['file']
+        if not uploaded.name.lower().endswith(('.csv', '.json')):
+            raise forms.ValidationError("Le fichier doit être au format CSV ou JSON.")
+        return uploaded
+
 class PatientProfileForm(forms.ModelForm):
     class Meta:
         model = PatientProfile
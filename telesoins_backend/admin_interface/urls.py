@@ -11,6 +11,7 @@ urlpatterns = [
     # Gestion des utilisateurs
     path('users/', views.user_list, name='user_list'),
     path('users/create/', views.user_create, name='user_create'),
+    path('users/import/', views.user_import, name='user_import'),
     path('users/<uuid:user_id>/', views.user_detail, name='user_detail'),
     path('users/<uuid:user_id>/edit/', views.user_edit, name='user_edit'),
     
@@ -43,4 +44,14 @@ urlpatterns = [
     # Statistiques et rapports
     path('stats/', views.statistics, name='statistics'),
     path('reports/', views.reports, name='reports'),
+    
+    # Profils de requêtes
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<uuid:profile_id>/', views.profile_detail, name='profile_detail'),
+    path('profiles/<uuid:profile_id>/download/', views.profile_download, name='profile_download'),
+    path('profiles/<uuid:profile_id>/sql/', views.profile_sql, name='profile_sql'),
+    
+    # Requêtes SQL lentes
+    path('slow-queries/', views.slow_query_list, name='slow_query_list'),
+    path('slow-queries/<str:fingerprint>/', views.slow_query_detail, name='slow_query_detail'),
 ]
\ No newline at end of file
@@ -5,21 +5,29 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Max, Sum, Q
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.core.paginator import Paginator
+from django.conf import settings
 
 from accounts.models import User, PatientProfile, MedecinProfile
+from accounts.bulk_import import import_users, read_rows
+from api.models import RequestProfile, SlowQuery
+from telesoins_backend.db_router import replica_reads
+from telesoins_backend.singleflight import single_flight
 from consultations.models import Appointment, Consultation, Prescription, Message
 from premiers_secours.models import FirstAidModule, FirstAidContent, Quiz, QuizQuestion, QuizOption, UserQuizResult
 
 from .forms import (
-    LoginForm, UserForm, PatientProfileForm, MedecinProfileForm, 
+    LoginForm, UserForm, UserImportForm, PatientProfileForm, MedecinProfileForm, 
     AppointmentForm, ConsultationFilterForm, FirstAidModuleForm,
     FirstAidContentForm, QuizForm, QuizQuestionForm, QuizOptionFormSet, QuizQuestionFormSet
 )
 
+# Durée de mise en cache des statistiques et rapports, en secondes
+STATISTICS_CACHE_SECONDS = getattr(settings, 'ADMIN_STATISTICS_CACHE_SECONDS', 60)
+
 # Vérification si l'utilisateur est administrateur
 def is_admin(user):
     return user.is_staff or user.role == 'admin'
@@ -90,6 +98,7 @@ def dashboard(request):
 # Gestion des utilisateurs
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def user_list(request):
     users = User.objects.all().order_by('-date_joined')
     
@@ -169,6 +178,38 @@ def user_create(request):
     
     return render(request, 'admin_interface/users/form.html', context)
 
+@login_required
+@user_passes_test(is_admin)
+def user_import(request):
+    result = None
+    
+    if request.method == 'POST':
+        form = UserImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            uploaded = form.cleaned_data['file']
+            fmt = 'json' if uploaded.name.lower().endswith('.json') else 'csv'
+            dry_run = form.cleaned_data['dry_run']
+            
+            try:
+                rows = read_rows(uploaded, fmt)
+            except (ValueError, UnicodeDecodeError) as exc:
+                messages.error(request, f"Fichier illisible : {exc}")
+            else:
+                result = import_users(rows, dry_run=dry_run)
+                if dry_run:
+                    messages.info(request, f"{result.created} utilisateurs seraient créés, {len(result.errors)} lignes en erreur.")
+                else:
+                    messages.success(request, f"{result.created} utilisateurs ont été créés, {len(result.errors)} lignes en erreur.")
+    else:
+        form = UserImportForm()
+    
+    context = {
+        'form': form,
+        'result': result,
+    }
+    
+    return render(request, 'admin_interface/utilisateurs/import.html', context)
+
 @login_required
 @user_passes_test(is_admin)
 def user_edit(request, user_id):
@@ -216,6 +257,7 @@ def user_edit(request, user_id):
 # Gestion des rendez-vous
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def appointment_list(request):
     appointments = Appointment.objects.all().order_by('-datetime')
     
@@ -312,6 +354,7 @@ def appointment_edit(request, appointment_id):
 # Gestion des consultations
 @login_required
 @user_passes_test(is_admin)
+@replica_reads
 def consultation_list(request):
     consultations = Consultation.objects.all().order_by('-start_time')
     
@@ -670,9 +713,7 @@ def quiz_question_options(request, question_id):
     return render(request, 'admin_interface/premiers_secours/quiz_options.html', context)
 
 # Statistiques et rapports
-@login_required
-@user_passes_test(is_admin)
-def statistics(request):
+def statistics_data():
     # Données de base
     total_users = User.objects.count()
     patients_count = User.objects.filter(role='patient').count()
@@ -703,16 +744,16 @@ def statistics(request):
     ).count()
     
     # Distribution des types de consultation
-    consultation_types = Consultation.objects.values('type').annotate(count=Count('id'))
+    consultation_types = list(Consultation.objects.values('type').annotate(count=Count('id')))
     
     # Statistiques d'utilisation des premiers secours
-    first_aid_modules = FirstAidModule.objects.all()
-    quiz_stats = UserQuizResult.objects.values('quiz__module__title').annotate(
+    first_aid_modules = list(FirstAidModule.objects.all())
+    quiz_stats = list(UserQuizResult.objects.values('quiz__module__title').annotate(
         total=Count('id'),
         avg_score=Avg('score')
-    )
+    ))
     
-    context = {
+    return {
         'total_users': total_users,
         'patients_count': patients_count,
         'medecins_count': medecins_count,
@@ -726,33 +767,17 @@ def statistics(request):
         'first_aid_modules': first_aid_modules,
         'quiz_stats': quiz_stats,
     }
-    
-    return render(request, 'admin_interface/stats.html', context)
 
 @login_required
 @user_passes_test(is_admin)
-def reports(request):
-    # Configuration du rapport
-    report_type = request.GET.get('type', 'usage')
-    period = request.GET.get('period', 'month')
-    
-    # Données par défaut
-    today = timezone.now().date()
-    
-    # Déterminer la période
-    if period == 'week':
-        start_date = today - timezone.timedelta(days=7)
-    elif period == 'month':
-        start_date = today.replace(day=1)
-    elif period == 'quarter':
-        quarter_month = ((today.month - 1) // 3) * 3 + 1
-        start_date = today.replace(month=quarter_month, day=1)
-    elif period == 'year':
-        start_date = today.replace(month=1, day=1)
-    else:
-        start_date = today - timezone.timedelta(days=30)  # Par défaut
+@replica_reads
+def statistics(request):
+    # Calculées une seule fois pour tous les administrateurs qui ouvrent la page en même temps
+    context = single_flight('admin:statistics', statistics_data, STATISTICS_CACHE_SECONDS)
     
-    # Générer le rapport basé sur le type
+    return render(request, 'admin_interface/stats.html', context)
+
+def report_data(report_type, start_date):
     if report_type == 'usage':
         # Rapport d'utilisation
         data = {
@@ -804,6 +829,39 @@ def reports(request):
     else:
         data = {}
     
+    return data
+
+@login_required
+@user_passes_test(is_admin)
+@replica_reads
+def reports(request):
+    # Configuration du rapport
+    report_type = request.GET.get('type', 'usage')
+    period = request.GET.get('period', 'month')
+    
+    # Données par défaut
+    today = timezone.now().date()
+    
+    # Déterminer la période
+    if period == 'week':
+        start_date = today - timezone.timedelta(days=7)
+    elif period == 'month':
+        start_date = today.replace(day=1)
+    elif period == 'quarter':
+        quarter_month = ((today.month - 1) // 3) * 3 + 1
+        start_date = today.replace(month=quarter_month, day=1)
+    elif period == 'year':
+        start_date = today.replace(month=1, day=1)
+    else:
+        start_date = today - timezone.timedelta(days=30)  # Par défaut
+    
+    # Générer le rapport basé sur le type (un seul calcul pour les demandes simultanées)
+    data = single_flight(
+        f'admin:report:{report_type}:{start_date.isoformat()}',
+        lambda: report_data(report_type, start_date),
+        STATISTICS_CACHE_SECONDS
+    )
+    
     context = {
         'report_type': report_type,
         'period': period,
@@ -812,4 +870,115 @@ def reports(request):
         'data': data,
     }
     
-    return render(request, 'admin_interface/rapports.html', context)
\ No newline at end of file
+    return render(request, 'admin_interface/rapports.html', context)
+
+# Profils de requêtes (voir api/profiling.py)
+@login_required
+@user_passes_test(is_admin)
+def profile_list(request):
+    profiles = RequestProfile.objects.select_related('user').defer('stats', 'summary', 'sql')
+    
+    # Pagination
+    paginator = Paginator(profiles, 20)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    return render(request, 'admin_interface/profils/liste.html', {'page_obj': page_obj})
+
+@login_required
+@user_passes_test(is_admin)
+def profile_detail(request, profile_id):
+    profile = get_object_or_404(RequestProfile.objects.select_related('user').defer('stats'), id=profile_id)
+    
+    # Requêtes SQL les plus lentes en premier
+    queries = sorted(profile.sql, key=lambda entry: entry['duration_ms'], reverse=True)
+    
+    context = {
+        'profile': profile,
+        'queries': queries,
+    }
+    
+    return render(request, 'admin_interface/profils/detail.html', context)
+
+@login_required
+@user_passes_test(is_admin)
+def profile_download(request, profile_id):
+    profile = get_object_or_404(RequestProfile.objects.only('stats'), id=profile_id)
+    
+    # Format de pstats.Stats.dump_stats : lisible par snakeviz ou « python -m pstats »
+    response = HttpResponse(bytes(profile.stats), content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="profil-{profile.id}.prof"'
+    return response
+
+@login_required
+@user_passes_test(is_admin)
+def profile_sql(request, profile_id):
+    profile = get_object_or_404(RequestProfile.objects.only('sql'), id=profile_id)
+    
+    response = JsonResponse(profile.sql, safe=False, json_dumps_params={'indent': 2})
+    response['Content-Disposition'] = f'attachment; filename="sql-{profile.id}.json"'
+    return response
+
+# Requêtes SQL lentes (voir api/slow_queries.py)
+SLOW_QUERY_TABLES = {
+    'appointment': 'consultations_appointment',
+    'consultation': 'consultations_consultation',
+    'message': 'consultations_message',
+}
+SLOW_QUERY_ORDERING = {
+    'total': '-total',
+    'max': '-max',
+    'calls': '-calls',
+}
+
+@login_required
+@user_passes_test(is_admin)
+def slow_query_list(request):
+    queries = SlowQuery.objects.all()
+    
+    # Filtrage par table
+    table = request.GET.get('table')
+    if table in SLOW_QUERY_TABLES:
+        queries = queries.filter(normalized_sql__icontains=f'"{SLOW_QUERY_TABLES[table]}"')
+    
+    # Regroupement par empreinte, toutes vues confondues
+    sort = request.GET.get('sort', 'total')
+    groups = queries.values('fingerprint', 'normalized_sql').annotate(
+        calls=Sum('count'),
+        total=Sum('total_ms'),
+        max=Max('max_ms'),
+        views=Count('id'),
+        last_seen=Max('last_seen'),
+    ).order_by(SLOW_QUERY_ORDERING.get(sort, '-total'))
+    
+    # Pagination
+    paginator = Paginator(groups, 20)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    context = {
+        'page_obj': page_obj,
+        'table': table,
+        'sort': sort,
+        'tables': SLOW_QUERY_TABLES,
+    }
+    
+    return render(request, 'admin_interface/requetes_lentes/liste.html', context)
+
+@login_required
+@user_passes_test(is_admin)
+def slow_query_detail(request, fingerprint):
+    rows = SlowQuery.objects.filter(fingerprint=fingerprint).order_by('-total_ms')
+    if not rows:
+        return redirect('admin_interface:slow_query_list')
+    
+    # Plan le plus récent, toutes vues confondues
+    planned = [row for row in rows if row.plan]
+    latest = max(planned, key=lambda row: row.plan_captured_at) if planned else None
+    
+    context = {
+        'fingerprint': fingerprint,
+        'normalized_sql': rows[0].normalized_sql,
+        'rows': rows,
+        'latest': latest,
+    }
+    
+    return render(request, 'admin_interface/requetes_lentes/detail.html', context)
@@ -1,3 +1,19 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import IdempotencyRecord, SlowQuery
+
+@admin.register(IdempotencyRecord)
+class IdempotencyRecordAdmin(admin.ModelAdmin):
+    list_display = ('user', 'scope', 'key', 'status_code', 'created_at')
+    list_filter = ('scope',)
+    search_fields = ('key', 'user__email')
+    readonly_fields = ('user', 'key', 'scope', 'request_hash', 'status_code', 'response', 'created_at')
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('view', 'fingerprint', 'count', 'total_ms', 'max_ms', 'last_seen')
+    list_filter = ('database',)
+    search_fields = ('normalized_sql', 'view', 'fingerprint')
+    readonly_fields = ('fingerprint', 'normalized_sql', 'view', 'database', 'count', 'total_ms', 'max_ms',
+                       'sample_sql', 'plan', 'plan_captured_at', 'first_seen', 'last_seen')
@@ -0,0 +1,74 @@
+"""
+Tableaux de bord patient et médecin en vues asynchrones (servies par ``asgi.py``).
+
+DRF n'exécute pas de méthodes ``async`` : ces vues sont des vues Django asynchrones qui
+reprennent l'authentification de l'API (``DEFAULT_AUTHENTICATION_CLASSES``, exécutée hors de la
+boucle) et le même contenu que ``PatientDashboardView`` / ``MedecinDashboardView`` (api/dashboards.py).
+Les rubriques sont lancées ensemble avec ``asyncio.gather`` sur l'ORM asynchrone ; le cache
+par utilisateur de dashboards.py est partagé avec les vues synchrones.
+
+L'ORM asynchrone de Django exécute encore chaque requête dans le thread « sync » partagé :
+le gain vient surtout de ce que le worker ASGI sert d'autres requêtes pendant l'attente de la base,
+pas d'une exécution simultanée des requêtes d'une même vue. La commande ``benchmark_dashboards``
+compare les latences p50/p99 des deux versions sous charge.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import dashboards
+from .renderers import ORJSONRenderer
+
+
+def authenticate(request):
+    """
+    Utilisateur authentifié par les classes d'authentification de l'API, ou None.
+    """
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    user = drf_request.user
+    return user if user.is_authenticated else None
+
+
+def json_response(data, status=200):
+    return HttpResponse(ORJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+class AsyncDashboardView(View):
+    role = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # ATOMIC_REQUESTS refuse les vues asynchrones ; celle-ci ne fait que lire
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    async def get(self, request):
+        try:
+            user = await sync_to_async(authenticate)(request)
+        except exceptions.AuthenticationFailed as exc:
+            return json_response({"detail": str(exc.detail)}, status=401)
+        if user is None:
+            return json_response({"detail": "Informations d'authentification non fournies."}, status=401)
+        if user.role != self.role:
+            return json_response({"detail": "Vous n'avez pas la permission d'effectuer cette action."}, status=403)
+
+        data, version = await sync_to_async(dashboards.lookup)(user)
+        if data is None:
+            sections = dashboards.sections_for(user)
+            results = await asyncio.gather(*(dashboards.acompute(user, section) for section in sections.values()))
+            data = dict(zip(sections, results))
+            await sync_to_async(dashboards.store)(user, version, data)
+        return json_response(data)
+
+
+class AsyncPatientDashboardView(AsyncDashboardView):
+    role = 'patient'
+
+
+class AsyncMedecinDashboardView(AsyncDashboardView):
+    role = 'medecin'
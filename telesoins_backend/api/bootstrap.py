@@ -0,0 +1,142 @@
+"""
+Point d'entrée de démarrage de l'application mobile : ``GET /api/bootstrap/``.
+
+Au lancement, l'application appelait ``/users/me/``, ``/user/profile/``, le tableau de bord,
+les messages non lus et les résultats de quiz : cinq allers-retours sur un réseau lent.
+Cette vue renvoie tout en une réponse :
+
+    {"user": {...}, "profile": {...} | null, "dashboard": {...},
+     "unread_messages": [...], "quiz_results": [...]}
+
+Les rubriques sont indépendantes. Par défaut elles s'exécutent l'une après l'autre sur la connexion
+de la requête, dans sa transaction (ATOMIC_REQUESTS) : toutes lisent le même état de la base.
+Avec ``BOOTSTRAP_PARALLEL`` elles s'exécutent en parallèle, chacune dans un thread de l'exécuteur
+d'asgiref avec sa propre connexion (sous ASGI, sur la boucle du serveur), hors de la transaction
+de la requête : les rubriques peuvent alors refléter des états différents de la base. Ouvrir une
+connexion PostgreSQL par rubrique coûterait plus que le parallélisme ne fait gagner : le mode
+parallèle n'est appliqué que si la base garde ses connexions (``CONN_MAX_AGE``) ou les prend dans
+un pool (``OPTIONS['pool']``). Les résultats de quiz du tableau de bord patient ne sont lus qu'une fois,
+et le tableau de bord n'est pas recalculé s'il est en cache (voir dashboards.py).
+
+La réponse porte un ``ETag`` (empreinte du contenu) : si l'application renvoie la même valeur
+dans ``If-None-Match``, la réponse est un 304 sans corps.
+"""
+import asyncio
+import hashlib
+from functools import partial
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.models import Q
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from consultations.models import Message
+from . import dashboards
+from .renderers import ORJSONRenderer
+from .serializers import (
+    UserSerializer, PatientProfileSerializer, MedecinProfileSerializer, MessageSerializer
+)
+
+PARALLEL = getattr(settings, 'BOOTSTRAP_PARALLEL', False)
+
+
+def profile(user):
+    if user.role == 'patient' and hasattr(user, 'patient_profile'):
+        return PatientProfileSerializer(user.patient_profile).data
+    if user.role == 'medecin' and hasattr(user, 'medecin_profile'):
+        return MedecinProfileSerializer(user.medecin_profile).data
+    return None
+
+
+def unread_messages(user):
+    return dashboards.serialize(Message.objects.filter(
+        Q(consultation__patient=user) | Q(consultation__medecin=user),
+        is_read=False
+    ).exclude(sender=user).order_by('timestamp'), MessageSerializer)
+
+
+def sections_for(user, dashboard):
+    sections = {
+        'profile': profile,
+        'unread_messages': unread_messages,
+    }
+    if dashboard is None or 'quiz_results' not in dashboard:
+        sections['quiz_results'] = partial(dashboards.compute, section=dashboards.PATIENT_SECTIONS['quiz_results'])
+    if dashboard is None:
+        # Les rubriques du tableau de bord sont calculées au même niveau que les autres
+        sections.update({
+            f'dashboard.{name}': partial(dashboards.compute, section=section)
+            for name, section in dashboards.sections_for(user).items() if name != 'quiz_results'
+        })
+    return sections
+
+
+def _in_worker(section):
+    def run(user):
+        try:
+            return section(user)
+        finally:
+            # Connexion propre au thread de l'exécuteur : la rendre selon CONN_MAX_AGE
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def _gather(user, sections):
+    results = await asyncio.gather(*(_in_worker(section)(user) for section in sections.values()))
+    return dict(zip(sections, results))
+
+
+def _reuses_connections():
+    database = connections[DEFAULT_DB_ALIAS].settings_dict
+    return bool(database.get('CONN_MAX_AGE') or database.get('OPTIONS', {}).get('pool'))
+
+
+def run_sections(user, sections):
+    if PARALLEL and len(sections) > 1 and _reuses_connections():
+        return async_to_sync(_gather)(user, sections)
+    return {name: section(user) for name, section in sections.items()}
+
+
+def build(user):
+    dashboard, version = dashboards.lookup(user)
+    results = run_sections(user, sections_for(user, dashboard))
+    if dashboard is None:
+        dashboard = {
+            name.split('.', 1)[1]: value for name, value in results.items() if name.startswith('dashboard.')
+        }
+        if 'quiz_results' in dashboards.sections_for(user):
+            dashboard['quiz_results'] = results['quiz_results']
+        dashboards.store(user, version, dashboard)
+    else:
+        results.setdefault('quiz_results', dashboard.get('quiz_results'))
+    return {
+        'user': UserSerializer(user).data,
+        'profile': results['profile'],
+        'dashboard': dashboard,
+        'unread_messages': results['unread_messages'],
+        'quiz_results': results['quiz_results'],
+    }
+
+
+class BootstrapView(APIView):
+    """
+    Données de l'écran d'accueil de l'application mobile en un seul appel.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        data = build(request.user)
+        etag = quote_etag(hashlib.sha256(ORJSONRenderer().render(data)).hexdigest()[:32])
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        # Toujours revalider : le contenu change dès qu'un rendez-vous ou un message arrive
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,297 @@
+"""
+Contenu des tableaux de bord patient et médecin.
+
+Chaque rubrique est indépendante : ``(requête(user), sérialiseur)``, ou ``(statistiques(user), None)``
+pour les agrégats. Les vues ``PatientDashboardView`` / ``MedecinDashboardView`` les calculent à la
+suite, le point d'entrée de démarrage (api/bootstrap.py) en parallèle dans des threads, et les vues
+asynchrones (api/async_views.py) avec l'ORM asynchrone.
+
+Les relations lues par les sérialiseurs (noms des participants, prescriptions et messages des
+consultations, titre des quiz) sont jointes ou préchargées d'après ``related_lookups`` : le nombre
+de requêtes d'une rubrique ne dépend pas du nombre de lignes.
+
+Cache par utilisateur : le tableau de bord sérialisé est conservé dans ``CACHES['default']`` et
+invalidé par api/signals.py dès qu'un rendez-vous, une consultation, une prescription, un message
+ou un résultat de quiz de l'utilisateur change. L'invalidation change la version de l'utilisateur,
+une fois la transaction validée, plutôt que d'effacer l'entrée : un calcul commencé avant la
+modification est rangé sous l'ancienne version et ne sera jamais relu. Le contenu dépend aussi de l'heure (rendez-vous passés, prescriptions
+expirées, changement de jour) : l'entrée expire au premier de ces instants, au plus tard après
+``DASHBOARD_CACHE_TTL`` secondes. Compteurs de succès et d'échecs : ``cache_stats()`` (commande
+``dashboard_cache_stats`` ; globaux avec un cache partagé, par processus en mémoire locale).
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from consultations.models import Appointment, Consultation, Prescription
+from premiers_secours.models import UserQuizResult
+from telesoins_backend.singleflight import single_flight
+from .serializers import (
+    AppointmentSerializer, ConsultationSerializer, PrescriptionSerializer,
+    UserQuizResultSerializer, related_lookups
+)
+
+
+def preload(queryset, serializer_class):
+    """
+    Joindre ou précharger les relations lues par le sérialiseur.
+    """
+    select, prefetch = related_lookups(serializer_class)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*sorted(prefetch))
+    return queryset
+
+
+def serialize(queryset, serializer_class):
+    return serializer_class(preload(queryset, serializer_class), many=True).data
+
+
+# Patient
+
+def upcoming_appointments(user):
+    return Appointment.objects.filter(
+        patient=user,
+        datetime__gt=timezone.now(),
+        status__in=['pending', 'confirmed']
+    ).order_by('datetime')[:5]
+
+
+def recent_consultations(user):
+    return Consultation.objects.filter(
+        patient=user
+    ).order_by('-start_time')[:5]
+
+
+def active_prescriptions(user):
+    return Prescription.objects.filter(
+        Q(consultation__patient=user) &
+        (Q(valid_until__gt=timezone.now()) | Q(valid_until=None))
+    ).order_by('-created_at')
+
+
+def quiz_results(user):
+    return UserQuizResult.objects.filter(user=user)
+
+
+PATIENT_SECTIONS = {
+    'upcoming_appointments': (upcoming_appointments, AppointmentSerializer),
+    'recent_consultations': (recent_consultations, ConsultationSerializer),
+    'active_prescriptions': (active_prescriptions, PrescriptionSerializer),
+    'quiz_results': (quiz_results, UserQuizResultSerializer),
+}
+
+
+# Médecin
+
+def today_appointments(user):
+    return Appointment.objects.filter(
+        medecin=user,
+        datetime__date=timezone.now().date(),
+        status__in=['pending', 'confirmed']
+    ).order_by('datetime')
+
+
+def pending_consultations(user):
+    return Consultation.objects.filter(
+        medecin=user,
+        end_time=None
+    ).order_by('-start_time')
+
+
+# Deux requêtes au lieu de trois : consultations et patients distincts en un seul agrégat
+CONSULTATION_TOTALS = {'total': Count('id'), 'patients': Count('patient', distinct=True)}
+
+
+def _stats(appointments, consultations):
+    return {
+        'total_appointments': appointments,
+        'total_consultations': consultations['total'],
+        'total_patients': consultations['patients'],
+    }
+
+
+def medecin_stats(user):
+    return _stats(
+        Appointment.objects.filter(medecin=user).count(),
+        Consultation.objects.filter(medecin=user).aggregate(**CONSULTATION_TOTALS),
+    )
+
+
+async def amedecin_stats(user):
+    return _stats(
+        await Appointment.objects.filter(medecin=user).acount(),
+        await Consultation.objects.filter(medecin=user).aaggregate(**CONSULTATION_TOTALS),
+    )
+
+
+MEDECIN_SECTIONS = {
+    'today_appointments': (today_appointments, AppointmentSerializer),
+    'pending_consultations': (pending_consultations, ConsultationSerializer),
+    'stats': (medecin_stats, None),
+}
+
+# Équivalents asynchrones des rubriques d'agrégats
+ASYNC_AGGREGATES = {
+    medecin_stats: amedecin_stats,
+}
+
+
+def sections_for(user):
+    if user.role == 'patient':
+        return PATIENT_SECTIONS
+    if user.role == 'medecin':
+        return MEDECIN_SECTIONS
+    return {}
+
+
+def compute(user, section):
+    query, serializer_class = section
+    if serializer_class is None:
+        return query(user)
+    return serialize(query(user), serializer_class)
+
+
+async def acompute(user, section):
+    """
+    Variante asynchrone de ``compute`` (ORM asynchrone ; la sérialisation ne fait plus de requête).
+    """
+    query, serializer_class = section
+    if serializer_class is None:
+        return await ASYNC_AGGREGATES[query](user)
+    objects = [obj async for obj in preload(query(user), serializer_class)]
+    return serializer_class(objects, many=True).data
+
+
+# Cache
+
+CACHE_TTL = getattr(settings, 'DASHBOARD_CACHE_TTL', 300)
+HITS_KEY = 'dashboard:hits'
+MISSES_KEY = 'dashboard:misses'
+
+# Invalidation par objet suspendue (voir paused())
+_paused = ContextVar('dashboards_invalidation_paused', default=False)
+
+
+def version_key(user_id):
+    return f'dashboard:version:{user_id}'
+
+
+def payload_key(user_id, version):
+    return f'dashboard:{user_id}:{version}'
+
+
+def _count(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Compteur évincé entre add et incr
+        pass
+
+
+def lookup(user):
+    """
+    Renvoie (tableau de bord en cache ou None, version à passer à ``store``).
+    """
+    version = cache.get(version_key(user.pk))
+    if version is None:
+        version = time.time_ns()
+        cache.add(version_key(user.pk), version, None)
+        version = cache.get(version_key(user.pk), version)
+    data = cache.get(payload_key(user.pk, version))
+    _count(HITS_KEY if data is not None else MISSES_KEY)
+    return data, version
+
+
+def expires_in(user, data):
+    """
+    Durée de validité de l'entrée : jusqu'au premier changement dû à l'heure, au plus ``CACHE_TTL``.
+    """
+    now = timezone.now()
+    deadlines = []
+    if user.role == 'medecin':
+        tomorrow = timezone.localdate(now) + timedelta(days=1)
+        deadlines.append(timezone.make_aware(datetime.combine(tomorrow, dt_time.min)))
+    for appointment in data.get('upcoming_appointments', []):
+        deadlines.append(parse_datetime(appointment['datetime']))
+    for prescription in data.get('active_prescriptions', []):
+        if prescription['valid_until']:
+            # valid_until__gt=now : la prescription sort de la liste le jour de sa date de fin
+            deadlines.append(timezone.make_aware(datetime.combine(parse_date(prescription['valid_until']), dt_time.min)))
+    seconds = min([CACHE_TTL] + [(deadline - now).total_seconds() for deadline in deadlines if deadline])
+    return max(int(seconds), 0)
+
+
+def store(user, version, data):
+    timeout = expires_in(user, data)
+    if timeout > 0:
+        cache.set(payload_key(user.pk, version), data, timeout)
+
+
+def invalidate(*user_ids):
+    """
+    Rendre caducs les tableaux de bord en cache de ces utilisateurs, à la validation de la
+    transaction en cours (aussitôt hors transaction). Changée plus tôt, la version serait reprise
+    par un calcul lisant encore les données d'avant la validation, rangé sous la nouvelle version.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        transaction.on_commit(lambda: _bump_versions(user_ids))
+
+
+def _bump_versions(user_ids):
+    version = time.time_ns()
+    cache.set_many({version_key(user_id): version for user_id in user_ids}, None)
+
+
+@contextmanager
+def paused():
+    """
+    Ne pas invalider objet par objet dans ce bloc (api/signals.py) : l'appelant invalide lui-même,
+    une fois, les tableaux de bord concernés (archivage des messages d'une consultation).
+    """
+    token = _paused.set(True)
+    try:
+        yield
+    finally:
+        _paused.reset(token)
+
+
+def is_paused():
+    return _paused.get()
+
+
+def cache_stats():
+    hits, misses = cache.get(HITS_KEY, 0), cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else None}
+
+
+def reset_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def build(user):
+    """
+    Tableau de bord complet de l'utilisateur : depuis le cache, ou rubriques calculées l'une
+    après l'autre puis mises en cache.
+    """
+    data, version = lookup(user)
+    if data is None:
+        # Requêtes simultanées du même utilisateur (plusieurs onglets, entrée expirée) : un seul calcul
+        data = single_flight(
+            payload_key(user.pk, version),
+            lambda: {name: compute(user, section) for name, section in sections_for(user).items()},
+            timeout=lambda data: expires_in(user, data),
+        )
+    return data
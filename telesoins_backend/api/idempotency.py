@@ -0,0 +1,160 @@
+"""
+En-tête ``Idempotency-Key`` pour les POST/PUT de l'API.
+
+Sur un réseau mobile instable, l'application renvoie une requête dont elle n'a pas reçu la
+réponse : sans protection, le message, le rendez-vous ou la prescription est créé deux fois.
+Le client génère une clé par action et la renvoie telle quelle à chaque nouvel essai.
+
+* première requête : la clé est réservée (``IdempotencyRecord``, unique par utilisateur), la vue
+  s'exécute, puis sa réponse réussie est enregistrée avec l'empreinte de la requête ;
+* nouvel essai dans les ``IDEMPOTENCY_KEY_TTL_HOURS`` heures : la réponse enregistrée est renvoyée
+  sans réexécuter la vue (en-tête ``Idempotent-Replayed: true``) ;
+* essai pendant que la première requête est encore en cours : 409 ;
+* même clé avec une autre méthode, une autre URL ou un autre corps : 422.
+
+Une réponse d'erreur (4xx/5xx) libère la clé : la requête corrigée peut être renvoyée avec la même clé.
+Les clés expirées sont purgées par la commande ``prune_idempotency_keys``.
+La clé est partagée avec la file hors ligne (api/offline.py), qui l'enregistre par opération.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import QueryDict
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+TTL = timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+HEADER = 'Idempotency-Key'
+
+
+class _Replay(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class _FingerprintEncoder(DjangoJSONEncoder):
+    # Pièces jointes (multipart) : nom, taille et empreinte du contenu
+    def default(self, o):
+        if isinstance(o, UploadedFile):
+            digest = hashlib.sha256()
+            for chunk in o.chunks():
+                digest.update(chunk)
+            o.seek(0)
+            return {'name': o.name, 'size': o.size, 'sha256': digest.hexdigest()}
+        return super().default(o)
+
+
+def fingerprint(request):
+    data = request.data
+    if isinstance(data, QueryDict):
+        # Formulaire : toutes les valeurs de chaque champ, fichiers compris
+        data = dict(data.lists())
+    payload = json.dumps(
+        [request.method, request.path, data], sort_keys=True, cls=_FingerprintEncoder
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _reject(message, status_code):
+    return _Replay(Response({"error": message}, status=status_code))
+
+
+def reserve(request, key):
+    """
+    Réserver la clé pour cette requête, ou lever ``_Replay`` avec la réponse à renvoyer.
+    """
+    digest = fingerprint(request)
+    scope = f'{request.method} {request.path}'[:100]
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyRecord.objects.create(
+                    user=request.user, key=key, scope=scope, request_hash=digest
+                )
+        except IntegrityError:
+            record = IdempotencyRecord.objects.filter(user=request.user, key=key).first()
+            if record is None:
+                # Clé libérée entre-temps
+                continue
+            if record.created_at < timezone.now() - TTL:
+                record.delete()
+                continue
+            if record.request_hash != digest:
+                raise _reject(
+                    "Cette clé d'idempotence a déjà été utilisée pour une autre requête.",
+                    status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                raise _reject(
+                    "Une requête avec cette clé d'idempotence est en cours de traitement.",
+                    status.HTTP_409_CONFLICT
+                )
+            response = Response(record.response, status=record.status_code)
+            response['Idempotent-Replayed'] = 'true'
+            raise _Replay(response)
+    raise _reject(
+        "Une requête avec cette clé d'idempotence est en cours de traitement.",
+        status.HTTP_409_CONFLICT
+    )
+
+
+def prune(now=None, chunk_size=5000):
+    """
+    Supprimer les clés plus anciennes que la durée de validité. Renvoie le nombre supprimé.
+    """
+    cutoff = (now or timezone.now()) - TTL
+    total = 0
+    while True:
+        ids = list(IdempotencyRecord.objects.filter(created_at__lt=cutoff).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        total += IdempotencyRecord.objects.filter(id__in=ids).delete()[0]
+
+
+class IdempotencyMixin:
+    """
+    ViewSet dont les POST/PUT portant l'en-tête ``Idempotency-Key`` ne s'exécutent qu'une fois.
+    L'utilisateur n'est connu qu'après l'authentification DRF, d'où la réservation dans ``initial``.
+    """
+    idempotent_methods = ('POST', 'PUT')
+
+    def initial(self, request, *args, **kwargs):
+        self._idempotency_record = None
+        super().initial(request, *args, **kwargs)
+        key = request.headers.get(HEADER)
+        if key and request.method in self.idempotent_methods and request.user.is_authenticated:
+            if len(key) > 255:
+                raise _reject("La clé d'idempotence ne peut pas dépasser 255 caractères.", status.HTTP_400_BAD_REQUEST)
+            self._idempotency_record = reserve(request, key)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _Replay):
+            return exc.response
+        self._release_idempotency_key()
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        record = getattr(self, '_idempotency_record', None)
+        if record is not None:
+            if response.status_code < 400:
+                record.status_code = response.status_code
+                record.response = response.data
+                record.save(update_fields=['status_code', 'response'])
+                self._idempotency_record = None
+            else:
+                self._release_idempotency_key()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def _release_idempotency_key(self):
+        record = getattr(self, '_idempotency_record', None)
+        if record is not None:
+            self._idempotency_record = None
+            record.delete()
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from api import dashboards
+from telesoins_backend.asgi import application
+
+PATHS = {
+    'patient': ('/api/patient/dashboard/', '/api/patient/dashboard/async/'),
+    'medecin': ('/api/medecin/dashboard/', '/api/medecin/dashboard/async/'),
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def get(path, headers):
+    """
+    Requête GET envoyée directement à l'application ASGI (asgi.py), sans serveur. Renvoie le statut.
+    """
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '', 'headers': headers,
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+    disconnected = asyncio.Event()
+    body_sent = False
+    response = {}
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+
+    await application(scope, receive, send)
+    return response.get('status')
+
+
+async def load(path, headers, requests, concurrency):
+    """
+    ``requests`` appels de ``path``, ``concurrency`` à la fois.
+    Renvoie (latences en secondes, durée totale, statuts).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], set()
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            statuses.add(await get(path, headers))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - start, statuses
+
+
+class Command(BaseCommand):
+    help = "Compare les latences p50/p99 des tableaux de bord synchrones et asynchrones sous charge (via ASGI)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="Patient ou médecin dont le tableau de bord est demandé.")
+        parser.add_argument('--requests', type=int, default=200, help="Requêtes mesurées par version.")
+        parser.add_argument('--concurrency', type=int, default=20, help="Requêtes simultanées.")
+        parser.add_argument('--cache', action='store_true', help="Garder le cache des tableaux de bord (désactivé par défaut).")
+        parser.add_argument('--host', default='localhost', help="En-tête Host (doit figurer dans ALLOWED_HOSTS).")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['email']).first()
+        if user is None or user.role not in PATHS:
+            raise CommandError("Utilisateur introuvable ou ni patient ni médecin.")
+
+        if not options['cache']:
+            # Mesurer le calcul lui-même : aucune entrée n'est mise en cache
+            dashboards.CACHE_TTL = 0
+
+        headers = [
+            (b'authorization', f'Bearer {AccessToken.for_user(user)}'.encode()),
+            (b'host', options['host'].encode()),
+        ]
+        for label, path in zip(('sync', 'async'), PATHS[user.role]):
+            # Premier passage non mesuré (caches d'authentification, connexions)
+            asyncio.run(load(path, headers, options['concurrency'], options['concurrency']))
+            latencies, elapsed, statuses = asyncio.run(
+                load(path, headers, options['requests'], options['concurrency'])
+            )
+            self.stdout.write(
+                f"{label:6} {path:34} statuts={sorted(statuses)} "
+                f"p50={percentile(latencies, 0.5) * 1000:7.1f} ms  "
+                f"p99={percentile(latencies, 0.99) * 1000:7.1f} ms  "
+                f"{len(latencies) / elapsed:7.1f} req/s"
+            )
@@ -0,0 +1,97 @@
+import gzip
+import io
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from consultations.models import Appointment, Consultation, Prescription, Message
+from api.renderers import ORJSONRenderer, ORJSONParser, MessagePackRenderer, MessagePackParser, msgpack
+from api.serializers import AppointmentSerializer, ConsultationSerializer
+
+
+def build_objects(count):
+    """
+    Rendez-vous et consultations en mémoire (sans base de données), avec patients et médecins.
+    """
+    now = timezone.now()
+    patients = [User(id=uuid.uuid4(), first_name=f"Patient{i}", last_name="Test", role='patient') for i in range(50)]
+    medecins = [User(id=uuid.uuid4(), first_name=f"Medecin{i}", last_name="Test", role='medecin') for i in range(10)]
+
+    appointments, consultations = [], []
+    for i in range(count):
+        patient, medecin = patients[i % len(patients)], medecins[i % len(medecins)]
+        appointment = Appointment(
+            id=uuid.uuid4(), patient=patient, medecin=medecin,
+            datetime=now + timedelta(hours=i), status='confirmed',
+            reason="Consultation de suivi, douleurs abdominales depuis trois jours",
+            notes="Apporter les résultats d'analyses", is_urgent=i % 7 == 0,
+            created_at=now, updated_at=now,
+        )
+        appointments.append(appointment)
+        consultation = Consultation(
+            id=uuid.uuid4(), appointment=appointment, patient=patient, medecin=medecin,
+            type='video', start_time=now, end_time=now + timedelta(minutes=20),
+            summary="Examen clinique sans particularité.", diagnosis="Gastro-entérite",
+        )
+        # Relations imbriquées fournies comme un prefetch_related déjà exécuté
+        consultation._prefetched_objects_cache = {
+            'prescriptions': [Prescription(
+                id=uuid.uuid4(), consultation=consultation, created_at=now,
+                details="Paracétamol 1 g, 3 fois par jour pendant 5 jours",
+            )],
+            'messages': [Message(
+                id=uuid.uuid4(), consultation=consultation, sender=sender, timestamp=now + timedelta(minutes=j),
+                content="Bonjour docteur, les douleurs ont diminué depuis hier.",
+            ) for j, sender in enumerate([patient, medecin, patient])],
+        }
+        consultations.append(consultation)
+    return appointments, consultations
+
+
+class Command(BaseCommand):
+    help = "Compare débit et taille des réponses selon le rendu (JSON DRF, orjson, MessagePack)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help="Éléments par liste (taille d'une page).")
+        parser.add_argument('--iterations', type=int, default=500, help="Rendus mesurés par format.")
+
+    def handle(self, *args, **options):
+        appointments, consultations = build_objects(options['items'])
+        datasets = [
+            ('AppointmentSerializer', AppointmentSerializer(appointments, many=True).data),
+            ('ConsultationSerializer', ConsultationSerializer(consultations, many=True).data),
+        ]
+
+        formats = [
+            ('json (DRF)', JSONRenderer(), JSONParser()),
+            ('json (orjson)', ORJSONRenderer(), ORJSONParser()),
+        ]
+        if msgpack is not None:
+            formats.append(('msgpack', MessagePackRenderer(), MessagePackParser()))
+        else:
+            self.stdout.write(self.style.WARNING("msgpack n'est pas installé : format ignoré."))
+
+        iterations = options['iterations']
+        for name, data in datasets:
+            self.stdout.write(f"\n{name} ({options['items']} éléments, {iterations} itérations)")
+            self.stdout.write(f"{'format':<16}{'rendus/s':>12}{'analyses/s':>12}{'octets':>10}{'gzip':>10}")
+            for label, renderer, parser in formats:
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    body = renderer.render(data, renderer.media_type, {})
+                render_rate = iterations / (time.perf_counter() - start)
+
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    parser.parse(io.BytesIO(body), parser.media_type, {})
+                parse_rate = iterations / (time.perf_counter() - start)
+
+                self.stdout.write(
+                    f"{label:<16}{render_rate:>12.0f}{parse_rate:>12.0f}{len(body):>10}{len(gzip.compress(body)):>10}"
+                )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.dashboards import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Affiche les succès et échecs du cache des tableaux de bord."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Remettre les compteurs à zéro après affichage.")
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        ratio = f"{stats['hit_ratio']:.1%}" if stats['hit_ratio'] is not None else "-"
+        self.stdout.write(self.style.SUCCESS(
+            f"Succès : {stats['hits']}, échecs : {stats['misses']}, taux de succès : {ratio}"
+        ))
+        if options['reset']:
+            reset_cache_stats()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.idempotency import prune
+
+
+class Command(BaseCommand):
+    help = "Supprime les clés d'idempotence expirées (IDEMPOTENCY_KEY_TTL_HOURS)."
+
+    def handle(self, *args, **options):
+        deleted = prune()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} clés d'idempotence supprimées."))
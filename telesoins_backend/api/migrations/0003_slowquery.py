@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:46
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('normalized_sql', models.TextField()),
+                ('view', models.CharField(max_length=200)),
+                ('database', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('total_ms', models.FloatField()),
+                ('max_ms', models.FloatField()),
+                ('sample_sql', models.TextField()),
+                ('sample_params', models.TextField(blank=True)),
+                ('plan', models.TextField(blank=True)),
+                ('plan_captured_at', models.DateTimeField(blank=True, null=True)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Requête SQL lente',
+                'verbose_name_plural': 'Requêtes SQL lentes',
+                'indexes': [models.Index(fields=['total_ms'], name='slow_query_total_idx')],
+                'constraints': [models.UniqueConstraint(fields=('fingerprint', 'view'), name='slow_query_fingerprint_view_uniq')],
+            },
+        ),
+    ]
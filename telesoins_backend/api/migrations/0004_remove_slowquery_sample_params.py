@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_slowquery'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='slowquery',
+            name='sample_params',
+        ),
+    ]
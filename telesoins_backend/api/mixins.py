@@ -0,0 +1,27 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from .serializers import related_lookups
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet dont le sérialiseur gère ``?fields=`` / ``?expand=`` (voir ``DynamicFieldsMixin``) :
+    seules les relations des champs demandés sont jointes ou préchargées.
+    Appliqué dans ``filter_queryset``, donc aux actions list et retrieve et à celles qui filtrent
+    leur queryset de la même façon.
+    """
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        select, prefetch = related_lookups(
+            self.get_serializer_class(),
+            self.request.query_params.get('fields'),
+            self.request.query_params.get('expand'),
+        )
+        if select:
+            queryset = queryset.select_related(*sorted(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        return queryset
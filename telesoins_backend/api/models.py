@@ -1,3 +1,95 @@
 from django.db import models
 
 # Create your models here.
+import uuid
+from django.core.serializers.json import DjangoJSONEncoder
+from accounts.models import User
+
+class IdempotencyRecord(models.Model):
+    """
+    Réponse déjà rendue pour une clé d'idempotence fournie par le client : une opération
+    rejouée (file hors ligne, nouvel essai après une coupure réseau) renvoie cette réponse
+    au lieu d'être exécutée une seconde fois. Voir api/offline.py.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_records')
+    key = models.CharField(max_length=255)
+    scope = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Clé d'idempotence"
+        verbose_name_plural = "Clés d'idempotence"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.user_id})"
+
+
+class RequestProfile(models.Model):
+    """
+    Profil d'une requête demandé par un membre du personnel (en-tête ``X-Profile: 1`` ou
+    ``?profile=1``) : statistiques cProfile et journal SQL de cette seule requête. Voir api/profiling.py.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='request_profiles')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view = models.CharField(max_length=200)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    sql_time_ms = models.FloatField()
+    stats = models.BinaryField()
+    summary = models.TextField()
+    sql = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Profil de requête"
+        verbose_name_plural = "Profils de requêtes"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class SlowQuery(models.Model):
+    """
+    Requête SQL lente, regroupée par empreinte (SQL normalisé) et par vue d'origine, avec un plan
+    d'exécution capturé sur un échantillon. Voir api/slow_queries.py.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    fingerprint = models.CharField(max_length=32)
+    normalized_sql = models.TextField()
+    view = models.CharField(max_length=200)
+    database = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=1)
+    total_ms = models.FloatField()
+    max_ms = models.FloatField()
+    sample_sql = models.TextField()
+    plan = models.TextField(blank=True)
+    plan_captured_at = models.DateTimeField(null=True, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = "Requête SQL lente"
+        verbose_name_plural = "Requêtes SQL lentes"
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'view'], name='slow_query_fingerprint_view_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['total_ms'], name='slow_query_total_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.view} {self.fingerprint} ({self.count} × {self.max_ms:.0f} ms max)"
@@ -0,0 +1,192 @@
+"""
+File d'écritures hors ligne de l'application mobile, rejouée en un seul appel.
+
+``POST /api/sync/batch/`` reçoit la liste ordonnée des actions mises en file pendant la coupure :
+
+    {"operations": [
+        {"key": "<clé générée par le client>", "type": "message", "data": {...}},
+        {"key": "...", "type": "quiz_submission", "id": "<quiz>", "data": {"answers": {...}}},
+        ...
+    ]}
+
+Chaque opération est exécutée par l'action du ViewSet qu'appelait l'application
+(``MessageViewSet.create``, ``QuizViewSet.submit``...) : mêmes permissions, validations et
+signaux. Le lot entier est une seule transaction ; chaque opération a son point de sauvegarde,
+si bien qu'une opération refusée (4xx) est annulée seule et que les suivantes s'appliquent.
+
+La réponse réussie de chaque opération est enregistrée sous sa clé (``IdempotencyRecord``) :
+un lot renvoyé après une coupure pendant la réponse ne recrée rien, il reçoit les réponses
+d'origine marquées ``"replayed": true``. Une clé réutilisée avec un autre contenu est refusée (409).
+Les fichiers joints ne passent pas par ce point d'entrée.
+"""
+import hashlib
+import io
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from consultations.views import AppointmentViewSet, MessageViewSet
+from premiers_secours.views import QuizViewSet
+from .models import IdempotencyRecord
+
+BATCH_MAX_SIZE = getattr(settings, 'OFFLINE_BATCH_MAX_SIZE', 100)
+
+# type d'opération : (ViewSet, action, l'opération vise-t-elle un objet existant ?)
+OPERATIONS = {
+    'message': (MessageViewSet, 'create', False),
+    'message_read': (MessageViewSet, 'mark_as_read', True),
+    'messages_read': (MessageViewSet, 'mark_all_as_read', False),
+    'appointment': (AppointmentViewSet, 'create', False),
+    'quiz_submission': (QuizViewSet, 'submit', True),
+}
+
+_views = {
+    name: viewset.as_view({'post': action_name})
+    for name, (viewset, action_name, detail) in OPERATIONS.items()
+}
+
+
+class _Rejected(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def request_hash(operation):
+    payload = json.dumps(
+        [operation.get('type'), operation.get('id'), operation.get('data')],
+        sort_keys=True, cls=DjangoJSONEncoder
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def subrequest(request, data):
+    """
+    Requête POST JSON interne, authentifiée comme la requête du lot.
+    """
+    body = json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+    sub = HttpRequest()
+    sub.method = 'POST'
+    sub.path = sub.path_info = request.path
+    sub.META = {
+        # La clé d'idempotence du lot ne vaut pas pour chacune de ses opérations
+        **{name: value for name, value in request.META.items() if name != 'HTTP_IDEMPOTENCY_KEY'},
+        'REQUEST_METHOD': 'POST',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+    }
+    sub._stream = io.BytesIO(body)
+    sub._read_started = False
+    # L'utilisateur est déjà authentifié : DRF le reprend tel quel (ForcedAuthentication)
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def _result(operation, status_code, data, replayed=False):
+    return {
+        'key': operation.get('key'),
+        'type': operation.get('type'),
+        'status': status_code,
+        'replayed': replayed,
+        'data': data,
+    }
+
+
+def _replay(operation, record, digest):
+    if record.request_hash != digest:
+        return _result(operation, status.HTTP_409_CONFLICT, {
+            "error": "Cette clé a déjà été utilisée pour une autre opération."
+        })
+    return _result(operation, record.status_code, record.response, replayed=True)
+
+
+def validate_operation(operation):
+    """
+    Renvoie un message d'erreur si l'opération est mal formée, sinon None.
+    """
+    if not isinstance(operation, dict):
+        return "Chaque opération doit être un objet."
+    key = operation.get('key')
+    if not isinstance(key, str) or not key or len(key) > 255:
+        return "La clé d'idempotence (key) est requise (255 caractères au plus)."
+    if operation.get('type') not in OPERATIONS:
+        return f"Type d'opération inconnu. Types acceptés : {', '.join(OPERATIONS)}."
+    if not isinstance(operation.get('data', {}), dict):
+        return "Le champ data doit être un objet."
+    if OPERATIONS[operation['type']][2] and not operation.get('id'):
+        return "L'identifiant (id) de l'objet visé est requis pour ce type d'opération."
+    return None
+
+
+def apply_operation(request, operation):
+    """
+    Exécuter une opération (ou rejouer sa réponse enregistrée) dans son point de sauvegarde.
+    """
+    error = validate_operation(operation)
+    if error:
+        return _result(operation if isinstance(operation, dict) else {}, status.HTTP_400_BAD_REQUEST, {"error": error})
+
+    digest = request_hash(operation)
+    record = IdempotencyRecord.objects.filter(user=request.user, key=operation['key']).first()
+    if record is not None:
+        return _replay(operation, record, digest)
+
+    kwargs = {'pk': str(operation['id'])} if OPERATIONS[operation['type']][2] else {}
+    try:
+        with transaction.atomic():
+            # La clé est réservée avant l'exécution : un lot concurrent portant la même clé
+            # attend notre validation puis échoue sur la contrainte d'unicité
+            record = IdempotencyRecord.objects.create(
+                user=request.user, key=operation['key'],
+                scope=f"offline:{operation['type']}", request_hash=digest
+            )
+            response = _views[operation['type']](subrequest(request, operation.get('data', {})), **kwargs)
+            if response.status_code >= 400:
+                raise _Rejected(response)
+
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save(update_fields=['status_code', 'response'])
+    except _Rejected as rejected:
+        # Opération annulée, clé libérée : le client peut la corriger et la renvoyer
+        return _result(operation, rejected.response.status_code, rejected.response.data)
+    except IntegrityError:
+        record = IdempotencyRecord.objects.filter(user=request.user, key=operation['key']).first()
+        if record is None:
+            # Erreur d'intégrité levée par l'opération elle-même
+            raise
+        return _replay(operation, record, digest)
+
+    return _result(operation, record.status_code, record.response)
+
+
+class OfflineBatchView(APIView):
+    """
+    Rejouer en une transaction la file d'écritures hors ligne de l'application mobile.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        operations = request.data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {"error": "Le paramètre operations doit être une liste non vide."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(operations) > BATCH_MAX_SIZE:
+            return Response(
+                {"error": f"Un lot ne peut pas dépasser {BATCH_MAX_SIZE} opérations."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            results = [apply_operation(request, operation) for operation in operations]
+
+        return Response({"results": results})
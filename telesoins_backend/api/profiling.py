@@ -0,0 +1,178 @@
+"""
+Profilage à la demande d'une requête, réservé au personnel.
+
+Pour comprendre en production une réponse lente (``MedecinDashboardView``, rapports de
+``admin_interface``), un membre du personnel rejoue la requête avec l'en-tête ``X-Profile: 1``
+ou le paramètre ``?profile=1`` :
+
+* la requête est exécutée sous cProfile et ses requêtes SQL sont journalisées (texte et durée,
+  sans les valeurs des paramètres : ce sont des données de patients), y compris celles des
+  threads lancés par ``sync_to_async`` ;
+* le tout est enregistré dans ``RequestProfile`` ; la réponse porte ``X-Profile-Id`` et
+  ``X-Profile-Url``, page de l'interface d'administration d'où télécharger le fichier ``.prof``
+  (pstats, lisible par snakeviz ou ``python -m pstats``) et le journal SQL.
+
+L'utilisateur est celui de la session ou, pour l'API, celui des classes d'authentification de DRF ;
+pour tout autre utilisateur l'indicateur est ignoré. Sans indicateur, le middleware ne fait qu'une
+recherche dans les en-têtes et les paramètres, et son ``execute_wrapper`` ne lit qu'une ContextVar.
+
+Un seul profil à la fois par processus (cProfile ne s'imbrique pas) : une requête profilée
+pendant qu'une autre l'est est servie normalement, avec ``X-Profile: busy``. Sous ASGI, cProfile
+observe le thread de la boucle d'événements, donc aussi les autres requêtes asynchrones en cours ;
+le code synchrone exécuté dans des threads n'y figure pas, mais son SQL est journalisé.
+Seuls les ``PROFILING_KEEP`` profils les plus récents sont conservés.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from rest_framework import exceptions
+
+from telesoins_backend.metrics import view_label
+from .async_views import authenticate
+from .models import RequestProfile
+
+KEEP = getattr(settings, 'PROFILING_KEEP', 100)
+SUMMARY_LINES = 60
+
+# Journal SQL de la requête profilée en cours
+_sql_log = ContextVar('profiling_sql_log', default=None)
+
+# cProfile ne peut profiler qu'une requête à la fois
+_busy = threading.Lock()
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    log = _sql_log.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        log.append({
+            'sql': sql,
+            'many': many,
+            'database': context['connection'].alias,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+        })
+
+
+def requested(request):
+    return request.headers.get('X-Profile') == '1' or request.GET.get('profile') == '1'
+
+
+def allowed(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            user = authenticate(request)
+        except exceptions.APIException:
+            return False
+    return user is not None and user.is_staff
+
+
+def save(request, response, profiler, duration, log):
+    stats = pstats.Stats(profiler)
+    summary = io.StringIO()
+    stats.stream = summary
+    stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+
+    profile = RequestProfile.objects.create(
+        user=request.user,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view=view_label(request, response)[:200],
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        query_count=len(log),
+        sql_time_ms=sum(entry['duration_ms'] for entry in log),
+        stats=marshal.dumps(stats.stats),
+        summary=summary.getvalue(),
+        sql=log,
+    )
+    stale = RequestProfile.objects.values_list('pk', flat=True)[KEEP:]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
+
+    response['X-Profile-Id'] = str(profile.pk)
+    response['X-Profile-Url'] = reverse('admin_interface:profile_detail', args=[profile.pk])
+
+
+class ProfilingMiddleware:
+    """
+    Profile les requêtes marquées d'un membre du personnel (à placer après AuthenticationMiddleware).
+    Utilisable sous ASGI, comme ``DatabaseRoutingMiddleware``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_sql_wrapper, dispatch_uid='profiling_sql_wrapper')
+        for connection in connections.all(initialized_only=True):
+            install_sql_wrapper(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not requested(request) or not allowed(request):
+            return self.get_response(request)
+        if not _busy.acquire(blocking=False):
+            response = self.get_response(request)
+            response['X-Profile'] = 'busy'
+            return response
+
+        try:
+            log, profiler = [], cProfile.Profile()
+            token = _sql_log.set(log)
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+                _sql_log.reset(token)
+            save(request, response, profiler, time.perf_counter() - start, log)
+        finally:
+            _busy.release()
+        return response
+
+    async def __acall__(self, request):
+        if not requested(request) or not await sync_to_async(allowed)(request):
+            return await self.get_response(request)
+        if not _busy.acquire(blocking=False):
+            response = await self.get_response(request)
+            response['X-Profile'] = 'busy'
+            return response
+
+        try:
+            log, profiler = [], cProfile.Profile()
+            token = _sql_log.set(log)
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+                _sql_log.reset(token)
+            await sync_to_async(save)(request, response, profiler, time.perf_counter() - start, log)
+        finally:
+            _busy.release()
+        return response
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
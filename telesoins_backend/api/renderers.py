@@ -0,0 +1,85 @@
+"""
+Rendus et analyseurs rapides pour l'API.
+
+* ``ORJSONRenderer`` / ``ORJSONParser`` : même format que ``JSONRenderer`` / ``JSONParser`` de DRF,
+  sérialisé par orjson (plusieurs fois plus rapide).
+* ``MessagePackRenderer`` / ``MessagePackParser`` : ``application/msgpack``, format binaire plus
+  compact pour l'application mobile sur réseau lent. Choisi par l'en-tête ``Accept``
+  (réponses) ou ``Content-Type`` (requêtes), ou par ``?format=msgpack``.
+
+orjson et msgpack sont facultatifs : sans orjson, les classes JSON se replient sur
+l'encodeur de DRF ; les classes MessagePack ne sont enregistrées dans ``REST_FRAMEWORK``
+que si msgpack est installé.
+"""
+import uuid
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+# Types que ni orjson ni msgpack ne connaissent (Decimal, chaînes traduisibles...), et dates
+# qu'orjson écrirait autrement que DRF (``+00:00`` au lieu de ``Z``) : même conversion que
+# l'encodeur JSON de DRF
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Cas le plus fréquent : clés étrangères UUID des ModelSerializer
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            # Rendu indenté (API navigable, ?indent=) : laissé à DRF
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
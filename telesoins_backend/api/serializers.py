@@ -1,10 +1,126 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from accounts.models import User, PatientProfile, MedecinProfile
-from consultations.models import Appointment, Consultation, Prescription, Message
+from consultations.models import Appointment, Consultation, Prescription, Message, AvailabilitySlot, TriageQueueEntry
 from premiers_secours.models import FirstAidModule, FirstAidContent, Quiz, QuizQuestion, QuizOption, UserQuizResult
+from notifications.models import Notification
 from django.contrib.auth.password_validation import validate_password
+from consultations import triage
 
-class UserSerializer(serializers.ModelSerializer):
+def parse_selection(value):
+    """
+    Analyser "a,b,user.email" en ({'a', 'b', 'user'}, {'user': ['email']}).
+    Renvoie (None, {}) si le paramètre est absent.
+    """
+    if value is None:
+        return None, {}
+    names, nested = set(), {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, rest = item.partition('.')
+        names.add(name)
+        if rest:
+            nested.setdefault(name, []).append(rest)
+    return names, nested
+
+class DynamicFieldsMixin:
+    """
+    Sélection des champs par la requête (sérialiseur principal) ou par les arguments
+    ``fields`` / ``expand`` (sérialiseurs imbriqués) :
+
+    * ``?fields=id,user.email`` : seuls ces champs sont renvoyés (notation pointée pour les relations imbriquées) ;
+    * ``?expand=quizzes.questions`` : relations de ``Meta.expandable_fields`` à développer. Sans ``expand``,
+      toutes le sont, comme auparavant. Avec ``expand``, une relation non listée est renvoyée par son
+      identifiant si elle pointe vers un seul objet, et omise si elle en contient plusieurs.
+
+    ``Meta.related_fields`` ({champ: relation ORM}) indique les jointures et préchargements nécessaires
+    à chaque champ : ``SparseFieldsetMixin`` n'applique que ceux des champs demandés.
+    """
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fields_param = fields
+        self._expand_param = expand
+
+    def is_root(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_selection(self):
+        fields, expand = self._fields_param, self._expand_param
+        request = self.context.get('request')
+        # Seules les lectures sont concernées : une sélection ne doit pas ignorer des champs envoyés en écriture
+        if request is not None and request.method in SAFE_METHODS and self.is_root() and fields is None and expand is None:
+            fields = request.query_params.get('fields')
+            expand = request.query_params.get('expand')
+        if isinstance(fields, (list, tuple)):
+            fields = ','.join(fields)
+        if isinstance(expand, (list, tuple)):
+            expand = ','.join(expand)
+        return parse_selection(fields), parse_selection(expand)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        (names, nested_fields), (expanded, nested_expand) = self.get_selection()
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+
+        for name in list(fields):
+            if names is not None and name not in names:
+                del fields[name]
+                continue
+            if name not in expandable:
+                continue
+
+            if expanded is not None and name not in expanded:
+                field = fields[name]
+                if isinstance(field, serializers.ListSerializer):
+                    del fields[name]
+                else:
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, source=field.source)
+                continue
+
+            # Transmettre la sous-sélection au sérialiseur imbriqué
+            field = fields[name]
+            child = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(child, DynamicFieldsMixin):
+                child._fields_param = nested_fields.get(name)
+                child._expand_param = nested_expand.get(name, [] if expanded is not None else None)
+        return fields
+
+def related_lookups(serializer_class, fields=None, expand=None):
+    """
+    Relations ORM à joindre (select_related) et à précharger (prefetch_related) pour
+    sérialiser la sélection ``fields`` / ``expand`` avec ``serializer_class``.
+    """
+    names, nested_fields = parse_selection(fields)
+    expanded, nested_expand = parse_selection(expand)
+    meta = serializer_class.Meta
+    expandable = getattr(meta, 'expandable_fields', ())
+    select, prefetch = set(), set()
+
+    for name, lookup in getattr(meta, 'related_fields', {}).items():
+        if names is not None and name not in names:
+            continue
+        if name in expandable and expanded is not None and name not in expanded:
+            continue
+
+        field = meta.model._meta.get_field(lookup.split('__')[0])
+        many = field.many_to_many or field.one_to_many
+        (prefetch if many else select).add(lookup)
+
+        declared = serializer_class._declared_fields.get(name)
+        child = getattr(declared, 'child', declared)
+        if name in expandable and isinstance(child, DynamicFieldsMixin):
+            sub_fields = ','.join(nested_fields[name]) if name in nested_fields else None
+            sub_expand = ','.join(nested_expand.get(name, [])) if expanded is not None else None
+            sub_select, sub_prefetch = related_lookups(type(child), sub_fields, sub_expand)
+            (prefetch if many else select).update(f'{lookup}__{path}' for path in sub_select)
+            prefetch.update(f'{lookup}__{path}' for path in sub_prefetch)
+
+    return select, prefetch
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'first_name', 'last_name', 'role', 'phone_number', 
@@ -30,23 +146,27 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
         return user
 
-class PatientProfileSerializer(serializers.ModelSerializer):
+class PatientProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
         model = PatientProfile
         fields = ['user', 'date_of_birth', 'emergency_contacts', 'medical_history', 
                   'allergies', 'blood_type', 'first_aid_progress']
+        expandable_fields = ['user']
+        related_fields = {'user': 'user'}
 
-class MedecinProfileSerializer(serializers.ModelSerializer):
+class MedecinProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
         model = MedecinProfile
         fields = ['user', 'speciality', 'licence_number', 'years_of_experience', 
                   'available_hours', 'triage_protocols']
+        expandable_fields = ['user']
+        related_fields = {'user': 'user'}
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     patient_name = serializers.SerializerMethodField()
     medecin_name = serializers.SerializerMethodField()
     
@@ -55,6 +175,7 @@ class AppointmentSerializer(serializers.ModelSerializer):
         fields = ['id', 'patient', 'medecin', 'patient_name', 'medecin_name', 
                   'datetime', 'status', 'reason', 'notes', 'is_urgent', 
                   'created_at', 'updated_at']
+        related_fields = {'patient_name': 'patient', 'medecin_name': 'medecin'}
     
     def get_patient_name(self, obj):
         return f"{obj.patient.first_name} {obj.patient.last_name}"
@@ -62,23 +183,46 @@ class AppointmentSerializer(serializers.ModelSerializer):
     def get_medecin_name(self, obj):
         return f"{obj.medecin.first_name} {obj.medecin.last_name}"
 
-class MessageSerializer(serializers.ModelSerializer):
+class TriageQueueEntrySerializer(serializers.ModelSerializer):
+    appointment = AppointmentSerializer(read_only=True)
+    current_score = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = TriageQueueEntry
+        fields = ['appointment', 'score', 'current_score', 'enqueued_at']
+    
+    def get_current_score(self, obj):
+        protocol = self.context.get('protocol') or triage.get_protocol(obj.medecin_id)
+        return round(triage.current_score(obj, protocol), 2)
+
+class AvailabilitySlotSerializer(serializers.ModelSerializer):
+    medecin_name = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AvailabilitySlot
+        fields = ['medecin', 'medecin_name', 'speciality', 'start', 'end']
+    
+    def get_medecin_name(self, obj):
+        return f"{obj.medecin.first_name} {obj.medecin.last_name}"
+
+class MessageSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     sender_name = serializers.SerializerMethodField()
     
     class Meta:
         model = Message
         fields = ['id', 'consultation', 'sender', 'sender_name', 'content', 
                   'attachment', 'timestamp', 'is_read']
+        related_fields = {'sender_name': 'sender'}
     
     def get_sender_name(self, obj):
         return f"{obj.sender.first_name} {obj.sender.last_name}"
 
-class PrescriptionSerializer(serializers.ModelSerializer):
+class PrescriptionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Prescription
         fields = ['id', 'consultation', 'details', 'created_at', 'valid_until']
 
-class ConsultationSerializer(serializers.ModelSerializer):
+class ConsultationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     prescriptions = PrescriptionSerializer(many=True, read_only=True)
     messages = MessageSerializer(many=True, read_only=True)
     
@@ -87,33 +231,39 @@ class ConsultationSerializer(serializers.ModelSerializer):
         fields = ['id', 'appointment', 'patient', 'medecin', 'type', 
                   'start_time', 'end_time', 'summary', 'diagnosis', 
                   'prescriptions', 'messages']
+        expandable_fields = ['prescriptions', 'messages']
+        related_fields = {'prescriptions': 'prescriptions', 'messages': 'messages'}
 
-class QuizOptionSerializer(serializers.ModelSerializer):
+class QuizOptionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = QuizOption
         fields = ['id', 'option_text', 'is_correct']
 
-class QuizQuestionSerializer(serializers.ModelSerializer):
+class QuizQuestionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     options = QuizOptionSerializer(many=True, read_only=True)
     
     class Meta:
         model = QuizQuestion
         fields = ['id', 'question_text', 'order', 'options']
+        expandable_fields = ['options']
+        related_fields = {'options': 'options'}
 
-class QuizSerializer(serializers.ModelSerializer):
+class QuizSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     questions = QuizQuestionSerializer(many=True, read_only=True)
     
     class Meta:
         model = Quiz
         fields = ['id', 'module', 'title', 'description', 'passing_score', 'questions']
+        expandable_fields = ['questions']
+        related_fields = {'questions': 'questions'}
 
-class FirstAidContentSerializer(serializers.ModelSerializer):
+class FirstAidContentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = FirstAidContent
         fields = ['id', 'module', 'title', 'content_type', 'content', 
                   'file', 'file_size', 'order']
 
-class FirstAidModuleSerializer(serializers.ModelSerializer):
+class FirstAidModuleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     contents = FirstAidContentSerializer(many=True, read_only=True)
     quizzes = QuizSerializer(many=True, read_only=True)
     
@@ -122,13 +272,21 @@ class FirstAidModuleSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'category', 'difficulty_level', 
                   'order', 'is_published', 'created_at', 'updated_at', 
                   'contents', 'quizzes']
+        expandable_fields = ['contents', 'quizzes']
+        related_fields = {'contents': 'contents', 'quizzes': 'quizzes'}
 
-class UserQuizResultSerializer(serializers.ModelSerializer):
+class UserQuizResultSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     quiz_title = serializers.SerializerMethodField()
     
     class Meta:
         model = UserQuizResult
         fields = ['id', 'user', 'quiz', 'quiz_title', 'score', 'completed_at', 'passed']
+        related_fields = {'quiz_title': 'quiz'}
     
     def get_quiz_title(self, obj):
-        return obj.quiz.title
\ No newline at end of file
+        return obj.quiz.title
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'type', 'title', 'message', 'target_type', 'target_id', 'is_read', 'created_at']
+        read_only_fields = fields
@@ -0,0 +1,50 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from consultations.models import Appointment, Consultation, Prescription, Message
+from consultations.signals import (
+    appointments_bulk_created, appointments_bulk_status_changed, consultations_bulk_closed
+)
+from premiers_secours.models import UserQuizResult
+from . import dashboards
+
+# Invalidation du cache des tableaux de bord (voir dashboards.py)
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+@receiver(post_save, sender=Consultation)
+@receiver(post_delete, sender=Consultation)
+def invalidate_dashboards_on_change(sender, instance, **kwargs):
+    dashboards.invalidate(instance.patient_id, instance.medecin_id)
+
+@receiver(post_save, sender=Prescription)
+@receiver(post_delete, sender=Prescription)
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+def invalidate_dashboards_on_consultation_content(sender, instance, **kwargs):
+    # Les consultations des tableaux de bord incluent leurs prescriptions et leurs messages
+    if dashboards.is_paused():
+        # Archivage : invalidé une fois par consultation (consultations/archive.py)
+        return
+    participants = Consultation.objects.filter(pk=instance.consultation_id).values_list('patient_id', 'medecin_id').first()
+    if participants:
+        dashboards.invalidate(*participants)
+
+@receiver(post_save, sender=UserQuizResult)
+@receiver(post_delete, sender=UserQuizResult)
+def invalidate_dashboard_on_quiz_result(sender, instance, **kwargs):
+    dashboards.invalidate(instance.user_id)
+
+@receiver(appointments_bulk_created)
+def invalidate_dashboards_on_bulk_create(sender, appointments, **kwargs):
+    dashboards.invalidate(*[user_id for a in appointments for user_id in (a.patient_id, a.medecin_id)])
+
+@receiver(appointments_bulk_status_changed)
+def invalidate_dashboards_on_bulk_status(sender, appointment_ids, **kwargs):
+    rows = Appointment.objects.filter(id__in=appointment_ids).values_list('patient_id', 'medecin_id')
+    dashboards.invalidate(*[user_id for row in rows for user_id in row])
+
+@receiver(consultations_bulk_closed)
+def invalidate_dashboards_on_bulk_close(sender, consultation_ids, **kwargs):
+    rows = Consultation.objects.filter(id__in=consultation_ids).values_list('patient_id', 'medecin_id')
+    dashboards.invalidate(*[user_id for row in rows for user_id in row])
@@ -0,0 +1,221 @@
+"""
+Journal des requêtes SQL lentes, avec plans d'exécution, pour prioriser les index
+(``Appointment``, ``Consultation``, ``Message``...).
+
+Un ``execute_wrapper`` posé sur chaque connexion mesure les requêtes SQL exécutées pendant une
+requête HTTP. Au-delà de ``SLOW_QUERY_THRESHOLD_MS`` :
+
+* la requête est journalisée (logger ``api.slow_queries``) avec la vue et l'action d'origine
+  (``AppointmentViewSet.list``) et son SQL normalisé : littéraux et paramètres remplacés par ``?``,
+  listes ``IN (...)`` et lignes ``VALUES`` multiples réduites, espaces regroupés ;
+* à la fin de la requête HTTP, elle est comptée dans ``SlowQuery``, une ligne par empreinte du SQL
+  normalisé et par vue (nombre, temps total et maximal) ;
+* pour un échantillon (``SLOW_QUERY_EXPLAIN_RATE``, et toujours la première fois), son plan est
+  capturé : ``EXPLAIN (ANALYZE, BUFFERS)`` sous PostgreSQL, ``EXPLAIN QUERY PLAN`` sous SQLite.
+  ``ANALYZE`` réexécute la requête : seuls les ``SELECT`` sont expliqués. Les valeurs des paramètres
+  (données de patients) ne servent qu'à cet ``EXPLAIN`` : seul le SQL avec ses ``%s`` est conservé,
+  et les chaînes citées dans le plan sont masquées.
+
+L'enregistrement et les plans passent après la réponse de la vue, hors de sa transaction et de ses
+métriques (middleware en tête de MIDDLEWARE) ; ils allongent seulement les requêtes qui ont été
+lentes. Seules les ``SLOW_QUERY_KEEP`` lignes au temps total le plus élevé sont conservées, la
+dernière créée comprise.
+La page « Requêtes lentes » de admin_interface regroupe les lignes par empreinte.
+"""
+import hashlib
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from telesoins_backend.tracing import view_name
+from .models import SlowQuery
+
+THRESHOLD_MS = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 200)
+EXPLAIN_RATE = getattr(settings, 'SLOW_QUERY_EXPLAIN_RATE', 0.1)
+KEEP = getattr(settings, 'SLOW_QUERY_KEEP', 500)
+
+logger = logging.getLogger(__name__)
+
+# Requête HTTP en cours : {'view': vue atteinte ('middleware' avant process_view), 'queries': [requêtes lentes]}
+_state = ContextVar('slow_queries_state', default=None)
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'%s|%\(\w+\)s')
+_IN_LISTS = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_ROWS = re.compile(r'(\(\?(?:,\s*\?)*\))(?:\s*,\s*\(\?(?:,\s*\?)*\))+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """
+    SQL sans ses valeurs : deux exécutions de la même requête ont le même texte normalisé.
+    """
+    sql = _STRINGS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _IN_LISTS.sub('IN (...)', sql)
+    sql = _VALUES_ROWS.sub(r'\1, ...', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha256(normalized_sql.encode()).hexdigest()[:32]
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    state = _state.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= THRESHOLD_MS:
+            normalized = normalize(sql)
+            logger.warning("Requête SQL lente (%.1f ms) dans %s : %s", elapsed_ms, state['view'], normalized)
+            state['queries'].append({
+                'view': state['view'],
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'normalized': normalized,
+                'database': context['connection'].alias,
+                'duration_ms': elapsed_ms,
+            })
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+def explain(query):
+    """
+    Plan d'exécution de la requête (SELECT uniquement), ou '' si la base ne le permet pas.
+    """
+    if query['many'] or not query['sql'].lstrip().upper().startswith('SELECT'):
+        return ''
+    connection = connections[query['database']]
+    if connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) '
+    elif connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        return ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + query['sql'], query['params'])
+            plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+    except DatabaseError:
+        logger.exception("Plan d'exécution impossible pour %s", query['normalized'])
+        return ''
+    # Les filtres du plan reprennent les valeurs des paramètres (noms, motifs...) : chaînes masquées
+    return _STRINGS.sub("'?'", plan)
+
+
+def _count(key, view, query, now):
+    duration = query['duration_ms']
+    return SlowQuery.objects.filter(fingerprint=key, view=view).update(
+        count=F('count') + 1,
+        total_ms=F('total_ms') + duration,
+        max_ms=Greatest(F('max_ms'), duration),
+        database=query['database'],
+        last_seen=now,
+    )
+
+
+def save(queries):
+    now = timezone.now()
+    for query in queries:
+        key, view = fingerprint(query['normalized']), query['view']
+        if not _count(key, view, query, now):
+            try:
+                created = SlowQuery.objects.create(
+                    fingerprint=key, normalized_sql=query['normalized'], view=view,
+                    database=query['database'], total_ms=query['duration_ms'], max_ms=query['duration_ms'],
+                    sample_sql=query['sql'], last_seen=now,
+                )
+            except IntegrityError:
+                # Créée entre-temps par une autre requête
+                _count(key, view, query, now)
+            else:
+                prune(keep=created.pk)
+
+        plan = SlowQuery.objects.filter(fingerprint=key, view=view).values_list('plan', flat=True).first()
+        if plan is None:
+            # Ligne écartée par prune() dans une autre requête : pas d'EXPLAIN (ANALYZE) sans lieu où le ranger
+            continue
+        if not plan or random.random() < EXPLAIN_RATE:
+            plan = explain(query)
+            if plan:
+                SlowQuery.objects.filter(fingerprint=key, view=view).update(
+                    plan=plan, plan_captured_at=now, sample_sql=query['sql'],
+                )
+
+
+def prune(keep):
+    """
+    Ne garder que les KEEP lignes au temps total le plus élevé, plus la ligne ``keep`` qui vient
+    d'être créée : à peine comptée, elle serait toujours la première écartée.
+    """
+    stale = SlowQuery.objects.exclude(pk=keep).order_by('-total_ms').values_list('pk', flat=True)[max(KEEP - 1, 0):]
+    SlowQuery.objects.filter(pk__in=list(stale)).delete()
+
+
+class SlowQueryMiddleware:
+    """
+    Relève les requêtes SQL lentes de chaque requête HTTP (à placer en tête de MIDDLEWARE).
+    Utilisable sous ASGI, comme ``DatabaseRoutingMiddleware``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_sql_wrapper, dispatch_uid='slow_queries_sql_wrapper')
+        for connection in connections.all(initialized_only=True):
+            install_sql_wrapper(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = {'view': 'middleware', 'queries': []}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state['queries']:
+            save(state['queries'])
+        return response
+
+    async def __acall__(self, request):
+        state = {'view': 'middleware', 'queries': []}
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state['queries']:
+            await sync_to_async(save)(state['queries'])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is not None:
+            state['view'] = view_name(request, view_func)
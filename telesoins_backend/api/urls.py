@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from .offline import OfflineBatchView
+from .bootstrap import BootstrapView
+from .async_views import AsyncPatientDashboardView, AsyncMedecinDashboardView
 
 router = DefaultRouter()
 router.register(r'users', views.UserViewSet)
@@ -17,11 +20,18 @@ urlpatterns = [
     #path('patients/<str:patient_id>/medical-history/', views.PatientMedicalHistoryView.as_view(), name='patient-medical-history'),
     
     path('register/', views.UserRegistrationView.as_view(), name='register'),
+    path('logout/', views.LogoutView.as_view(), name='logout'),
     path('patient/dashboard/', views.PatientDashboardView.as_view(), name='patient-dashboard'),
     path('medecin/dashboard/', views.MedecinDashboardView.as_view(), name='medecin-dashboard'),
+    # Versions asynchrones des tableaux de bord (sous ASGI)
+    path('patient/dashboard/async/', AsyncPatientDashboardView.as_view(), name='patient-dashboard-async'),
+    path('medecin/dashboard/async/', AsyncMedecinDashboardView.as_view(), name='medecin-dashboard-async'),
     path('user/profile/', views.UserProfileView.as_view(), name='user-profile'),
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('patient/appointments/', views.PatientAppointmentsView.as_view(), name='patient-appointments'),
     path('medecin/appointments/', views.MedecinAppointmentsView.as_view(), name='medecin-appointments'),
     path('consultations/', include('consultations.urls', namespace='consultations')),
     path('first-aid/', include('premiers_secours.urls', namespace='premiers_secours')),
+    path('notifications/', include('notifications.urls', namespace='notifications')),
+    path('sync/batch/', OfflineBatchView.as_view(), name='offline-batch'),
 ]
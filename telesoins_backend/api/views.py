@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.utils import timezone
 from rest_framework.views import APIView
+from rest_framework.authtoken.models import Token
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Count, Avg
 from accounts.models import User, PatientProfile, MedecinProfile
@@ -14,6 +15,8 @@ from .serializers import (
     PrescriptionSerializer, MessageSerializer, FirstAidModuleSerializer, 
     FirstAidContentSerializer, QuizSerializer, UserQuizResultSerializer
 )
+from .mixins import SparseFieldsetMixin
+from . import dashboards
 from .permissions import IsOwnerOrReadOnly, IsMedecin, IsPatient
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -21,6 +24,14 @@ class UserRegistrationView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
     serializer_class = UserRegistrationSerializer
 
+class LogoutView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        # La suppression du jeton invalide aussi le cache d'authentification (voir accounts.signals)
+        Token.objects.filter(user=request.user).delete()
+        return Response({"status": "Déconnexion réussie."})
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -40,7 +51,7 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class PatientProfileViewSet(viewsets.ModelViewSet):
+class PatientProfileViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = PatientProfile.objects.all()
     serializer_class = PatientProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -50,14 +61,13 @@ class PatientProfileViewSet(viewsets.ModelViewSet):
         if user.is_staff or user.role == 'admin':
             return PatientProfile.objects.all()
         elif user.role == 'medecin':
-            # Médecins ne voient que les profils de leurs patients
-            patient_ids = Consultation.objects.filter(medecin=user).values_list('patient', flat=True)
-            return PatientProfile.objects.filter(user__id__in=patient_ids)
+            # Médecins ne voient que les profils de leurs patients (relations de soins)
+            return PatientProfile.objects.filter(user__patient_care_relationships__medecin=user)
         else:
             # Les patients ne voient que leur propre profil
             return PatientProfile.objects.filter(user=user)
 
-class MedecinProfileViewSet(viewsets.ModelViewSet):
+class MedecinProfileViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = MedecinProfile.objects.all()
     serializer_class = MedecinProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -67,9 +77,8 @@ class MedecinProfileViewSet(viewsets.ModelViewSet):
         if user.is_staff or user.role == 'admin':
             return MedecinProfile.objects.all()
         elif user.role == 'patient':
-            # Patients ne voient que les profils de leurs médecins
-            medecin_ids = Consultation.objects.filter(patient=user).values_list('medecin', flat=True)
-            return MedecinProfile.objects.filter(user__id__in=medecin_ids)
+            # Patients ne voient que les profils de leurs médecins (relations de soins)
+            return MedecinProfile.objects.filter(user__medecin_care_relationships__patient=user)
         else:
             # Les médecins ne voient que leur propre profil
             return MedecinProfile.objects.filter(user=user)
@@ -276,70 +285,16 @@ class PatientDashboardView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsPatient]
     
     def get(self, request):
-        user = request.user
-        
-        # Prochains rendez-vous
-        upcoming_appointments = Appointment.objects.filter(
-            patient=user, 
-            datetime__gt=timezone.now(),
-            status__in=['pending', 'confirmed']
-        ).order_by('datetime')[:5]
-        
-        # Consultations récentes
-        recent_consultations = Consultation.objects.filter(
-            patient=user
-        ).order_by('-start_time')[:5]
-        
-        # Prescriptions actives
-        active_prescriptions = Prescription.objects.filter(
-            Q(consultation__patient=user) & 
-            (Q(valid_until__gt=timezone.now()) | Q(valid_until=None))
-        ).order_by('-created_at')
-        
-        # Progression premiers secours
-        quiz_results = UserQuizResult.objects.filter(user=user)
-        
-        return Response({
-            'upcoming_appointments': AppointmentSerializer(upcoming_appointments, many=True).data,
-            'recent_consultations': ConsultationSerializer(recent_consultations, many=True).data,
-            'active_prescriptions': PrescriptionSerializer(active_prescriptions, many=True).data,
-            'quiz_results': UserQuizResultSerializer(quiz_results, many=True).data,
-        })
+        # Prochains rendez-vous, consultations récentes, prescriptions actives et
+        # progression premiers secours (voir dashboards.py)
+        return Response(dashboards.build(request.user))
 
 class MedecinDashboardView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsMedecin]
     
     def get(self, request):
-        user = request.user
-        
-        # Rendez-vous du jour
-        today = timezone.now().date()
-        today_appointments = Appointment.objects.filter(
-            medecin=user,
-            datetime__date=today,
-            status__in=['pending', 'confirmed']
-        ).order_by('datetime')
-        
-        # Consultations en attente
-        pending_consultations = Consultation.objects.filter(
-            medecin=user,
-            end_time=None
-        ).order_by('-start_time')
-        
-        # Statistiques
-        total_appointments = Appointment.objects.filter(medecin=user).count()
-        total_consultations = Consultation.objects.filter(medecin=user).count()
-        total_patients = Consultation.objects.filter(medecin=user).values('patient').distinct().count()
-        
-        return Response({
-            'today_appointments': AppointmentSerializer(today_appointments, many=True).data,
-            'pending_consultations': ConsultationSerializer(pending_consultations, many=True).data,
-            'stats': {
-                'total_appointments': total_appointments,
-                'total_consultations': total_consultations,
-                'total_patients': total_patients,
-            }
-        })
+        # Rendez-vous du jour, consultations en attente et statistiques (voir dashboards.py)
+        return Response(dashboards.build(request.user))
 
 class PatientAppointmentsView(generics.ListAPIView):
     serializer_class = AppointmentSerializer
@@ -2,7 +2,7 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import Appointment, Consultation, Prescription, Message
+from .models import Appointment, Consultation, Prescription, Message, MessageArchive
 
 class PrescriptionInline(admin.TabularInline):
     model = Prescription
@@ -38,4 +38,9 @@ class MessageAdmin(admin.ModelAdmin):
     list_display = ('sender', 'consultation', 'timestamp', 'is_read')
     list_filter = ('is_read', 'timestamp')
     search_fields = ('sender__email', 'content', 'consultation__patient__email')
-    date_hierarchy = 'timestamp'
\ No newline at end of file
+    date_hierarchy = 'timestamp'
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    list_display = ('consultation', 'message_count', 'archived_at')
+    readonly_fields = ('consultation', 'message_count', 'archived_at')
+    exclude = ('data',)
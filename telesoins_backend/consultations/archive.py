@@ -0,0 +1,147 @@
+"""
+Archivage des messages des consultations clôturées.
+
+Les messages d'une consultation terminée depuis plus de ``MESSAGE_ARCHIVE_RETENTION_DAYS`` jours
+sont retirés de la table ``Message`` (partitionnée, voir partitions.py) et rangés dans une seule
+ligne ``MessageArchive`` : liste JSON compressée par zlib. Les fichiers joints ne sont pas
+déplacés, seul leur chemin est conservé.
+
+``consultation_messages`` renvoie les messages archivés puis les messages encore en table,
+sous forme d'instances ``Message`` non enregistrées : ``ConsultationViewSet.messages``
+les sérialise comme avant.
+"""
+import json
+import uuid
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from api import dashboards
+from . import sync
+from .models import Consultation, Message, MessageArchive
+
+RETENTION = timedelta(days=getattr(settings, 'MESSAGE_ARCHIVE_RETENTION_DAYS', 180))
+CHUNK_SIZE = 100
+
+ARCHIVED_FIELDS = ('id', 'sender_id', 'content', 'attachment', 'timestamp', 'is_read')
+
+
+def _pack(rows):
+    return zlib.compress(json.dumps(rows, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+
+def _to_row(values):
+    return {
+        'id': str(values['id']),
+        'sender_id': str(values['sender_id']),
+        'content': values['content'],
+        'attachment': values['attachment'] or '',
+        'timestamp': values['timestamp'].isoformat(),
+        'is_read': values['is_read'],
+    }
+
+
+def archive_consultation(consultation_id):
+    """
+    Déplacer les messages d'une consultation dans son archive. Renvoie le nombre de messages déplacés.
+    """
+    with transaction.atomic():
+        # Le verrou sur la consultation sérialise les archivages concurrents
+        participants = Consultation.objects.select_for_update().filter(
+            pk=consultation_id
+        ).values_list('patient_id', 'medecin_id').first()
+
+        messages = Message.objects.filter(consultation_id=consultation_id)
+        rows = [_to_row(values) for values in messages.order_by('timestamp').values(*ARCHIVED_FIELDS)]
+        if not rows:
+            return 0
+
+        archive = MessageArchive.objects.filter(consultation_id=consultation_id).first()
+        if archive is not None:
+            # Messages arrivés après un premier archivage
+            rows = _unpack(archive.data) + rows
+        else:
+            archive = MessageArchive(consultation_id=consultation_id)
+
+        archive.data = _pack(rows)
+        archive.message_count = len(rows)
+        archive.save()
+        # Les messages restent lisibles : pas de pierre tombale pour la synchronisation, et les
+        # tableaux de bord (qui lisent les messages en table) sont invalidés une fois, pas par message
+        with sync.paused(), dashboards.paused():
+            deleted, _ = messages.delete()
+        if participants:
+            dashboards.invalidate(*participants)
+    return deleted
+
+
+def archive_closed_consultations(now=None, chunk_size=CHUNK_SIZE):
+    """
+    Archiver les messages des consultations terminées avant la période de rétention.
+    Renvoie (consultations archivées, messages déplacés).
+    """
+    cutoff = (now or timezone.now()) - RETENTION
+    consultations = total = 0
+    last_id = None
+    while True:
+        candidates = Consultation.objects.filter(
+            end_time__lt=cutoff, messages__isnull=False
+        ).order_by('id').values_list('id', flat=True).distinct()
+        if last_id is not None:
+            candidates = candidates.filter(id__gt=last_id)
+
+        ids = list(candidates[:chunk_size])
+        if not ids:
+            return consultations, total
+        last_id = ids[-1]
+
+        for consultation_id in ids:
+            moved = archive_consultation(consultation_id)
+            if moved:
+                consultations += 1
+                total += moved
+
+
+def archived_messages(consultation_id):
+    """
+    Messages archivés d'une consultation, comme instances ``Message`` non enregistrées.
+    """
+    archive = MessageArchive.objects.filter(consultation_id=consultation_id).first()
+    if archive is None:
+        return []
+
+    messages = [
+        Message(
+            id=uuid.UUID(row['id']),
+            consultation_id=consultation_id,
+            sender_id=uuid.UUID(row['sender_id']),
+            content=row['content'],
+            attachment=row['attachment'] or None,
+            timestamp=parse_datetime(row['timestamp']),
+            is_read=row['is_read'],
+        )
+        for row in _unpack(archive.data)
+    ]
+
+    # Expéditeurs chargés en une requête (MessageSerializer lit leur nom)
+    senders = User.objects.in_bulk({message.sender_id for message in messages})
+    for message in messages:
+        message.sender = senders.get(message.sender_id)
+    return messages
+
+
+def consultation_messages(consultation):
+    """
+    Tous les messages d'une consultation, archivés ou non, par ordre chronologique.
+    """
+    live = Message.objects.filter(consultation=consultation).select_related('sender').order_by('timestamp')
+    return archived_messages(consultation.pk) + list(live)
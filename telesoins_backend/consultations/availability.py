@@ -0,0 +1,160 @@
+"""
+Index des créneaux disponibles des médecins.
+
+Les horaires d'un médecin sont décrits dans ``MedecinProfile.available_hours`` sous la forme :
+
+    {"lundi": ["09:00-12:00", "14:00-18:00"], "mardi": [{"start": "09:00", "end": "12:00"}], ...}
+
+Les jours peuvent être écrits en français ou en anglais. Pour chaque médecin, on précalcule
+les N prochains créneaux libres (hors rendez-vous en attente ou confirmés) dans la table
+``AvailabilitySlot``, rafraîchie à chaque modification des rendez-vous ou du profil du médecin.
+"""
+import bisect
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import MedecinProfile
+from .models import Appointment, AvailabilitySlot
+
+SLOT_MINUTES = getattr(settings, 'AVAILABILITY_SLOT_MINUTES', 30)
+HORIZON_DAYS = getattr(settings, 'AVAILABILITY_HORIZON_DAYS', 14)
+SLOTS_PER_MEDECIN = getattr(settings, 'AVAILABILITY_SLOTS_PER_MEDECIN', 20)
+
+# Statuts qui occupent un créneau
+BOOKED_STATUSES = ['pending', 'confirmed']
+
+WEEKDAYS = {
+    'lundi': 0, 'mardi': 1, 'mercredi': 2, 'jeudi': 3, 'vendredi': 4, 'samedi': 5, 'dimanche': 6,
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6,
+}
+
+
+def normalize_speciality(speciality):
+    return (speciality or '').strip().lower()
+
+
+def _parse_time(value):
+    hours, minutes = value.strip().split(':')[:2]
+    return time(int(hours), int(minutes))
+
+
+def parse_available_hours(available_hours):
+    """
+    Convertir ``available_hours`` en {jour de la semaine: [(début, fin), ...]}.
+    Les entrées mal formées sont ignorées.
+    """
+    schedule = {}
+    if not isinstance(available_hours, dict):
+        return schedule
+
+    for day, ranges in available_hours.items():
+        weekday = WEEKDAYS.get(str(day).strip().lower())
+        if weekday is None or not isinstance(ranges, list):
+            continue
+
+        for item in ranges:
+            try:
+                if isinstance(item, dict):
+                    start, end = _parse_time(item['start']), _parse_time(item['end'])
+                else:
+                    start_str, end_str = str(item).split('-')
+                    start, end = _parse_time(start_str), _parse_time(end_str)
+            except (KeyError, ValueError, TypeError):
+                continue
+            if start < end:
+                schedule.setdefault(weekday, []).append((start, end))
+
+    for weekday in schedule:
+        schedule[weekday].sort()
+    return schedule
+
+
+def compute_free_slots(profile, now=None, limit=SLOTS_PER_MEDECIN, horizon_days=HORIZON_DAYS):
+    """
+    Calculer les ``limit`` prochains créneaux libres d'un médecin sur l'horizon donné.
+    """
+    now = now or timezone.now()
+    schedule = parse_available_hours(profile.available_hours)
+    if not schedule:
+        return []
+
+    horizon_end = now + timedelta(days=horizon_days)
+    slot_length = timedelta(minutes=SLOT_MINUTES)
+
+    # Une seule requête pour tous les rendez-vous du médecin sur l'horizon
+    booked = sorted(Appointment.objects.filter(
+        medecin_id=profile.user_id,
+        status__in=BOOKED_STATUSES,
+        datetime__gt=now - slot_length,
+        datetime__lt=horizon_end,
+    ).values_list('datetime', flat=True))
+
+    tz = timezone.get_current_timezone()
+    today = timezone.localtime(now, tz).date()
+    slots = []
+
+    for offset in range(horizon_days + 1):
+        day = today + timedelta(days=offset)
+        for start_time, end_time in schedule.get(day.weekday(), []):
+            slot_start = timezone.make_aware(datetime.combine(day, start_time), tz)
+            range_end = timezone.make_aware(datetime.combine(day, end_time), tz)
+
+            while slot_start + slot_length <= range_end:
+                slot_end = slot_start + slot_length
+                # Un créneau est pris si un rendez-vous commence dans [début, fin[
+                index = bisect.bisect_left(booked, slot_start)
+                is_booked = index < len(booked) and booked[index] < slot_end
+
+                if slot_start >= now and slot_start < horizon_end and not is_booked:
+                    slots.append((slot_start, slot_end))
+                    if len(slots) >= limit:
+                        return slots
+                slot_start = slot_end
+
+    return slots
+
+
+def refresh_medecin_availability(medecin_id, now=None):
+    """
+    Recalculer l'index des créneaux d'un seul médecin.
+    """
+    profile = MedecinProfile.objects.filter(user_id=medecin_id).first()
+
+    with transaction.atomic():
+        AvailabilitySlot.objects.filter(medecin_id=medecin_id).delete()
+        if profile is None:
+            return 0
+
+        speciality = normalize_speciality(profile.speciality)
+        slots = [
+            AvailabilitySlot(medecin_id=medecin_id, speciality=speciality, start=start, end=end)
+            for start, end in compute_free_slots(profile, now=now)
+        ]
+        AvailabilitySlot.objects.bulk_create(slots)
+
+    return len(slots)
+
+
+def schedule_refresh(medecin_id):
+    """
+    Rafraîchir l'index d'un médecin après la validation de la transaction en cours.
+    """
+    transaction.on_commit(lambda: refresh_medecin_availability(medecin_id))
+
+
+def search_earliest_slots(speciality, start=None, end=None, limit=20):
+    """
+    Renvoyer les créneaux les plus proches pour une spécialité, tous médecins confondus.
+    """
+    start = max(start or timezone.now(), timezone.now())
+    queryset = AvailabilitySlot.objects.filter(
+        speciality=normalize_speciality(speciality),
+        start__gte=start,
+    )
+    if end is not None:
+        queryset = queryset.filter(start__lt=end)
+
+    return queryset.select_related('medecin').order_by('start')[:limit]
@@ -0,0 +1,226 @@
+"""
+Opérations en lot sur les rendez-vous : création groupée avec détection des conflits
+et changements de statut appliqués par un seul UPDATE.
+
+``bulk_create`` et ``QuerySet.update`` ne déclenchent pas les signaux : les tables dérivées
+(index des créneaux, file de triage, relations de soins) sont donc mises à jour ici.
+"""
+import bisect
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from .models import Appointment, TriageQueueEntry
+from .availability import BOOKED_STATUSES, SLOT_MINUTES, schedule_refresh
+from .care_team import record_interaction
+from . import triage
+from .signals import appointments_bulk_created, appointments_bulk_status_changed
+
+BATCH_MAX_SIZE = getattr(settings, 'APPOINTMENT_BATCH_MAX_SIZE', 500)
+
+# Transitions de statut autorisées pour les changements en lot
+ALLOWED_TRANSITIONS = {
+    'pending': {'confirmed', 'canceled'},
+    'confirmed': {'canceled', 'completed'},
+    'canceled': {'pending'},
+    'completed': set(),
+}
+
+
+def parse_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_when(value):
+    """
+    Date ISO 8601 (heure locale si sans fuseau), ou None si mal formée ou impossible (30 février).
+    """
+    try:
+        when = parse_datetime(str(value or ''))
+    except ValueError:
+        return None
+    if when is not None and timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    return when
+
+
+def _validate_item(item, user):
+    """
+    Valider une ligne de la demande sans accès à la base. Renvoie (données, erreurs).
+    """
+    if not isinstance(item, dict):
+        return None, {'non_field_errors': "Ligne mal formée."}
+
+    errors = {}
+    data = {
+        'reason': item.get('reason') or '',
+        'notes': item.get('notes') or '',
+        'is_urgent': bool(item.get('is_urgent', False)),
+        'status': item.get('status') or 'pending',
+    }
+
+    patient_id = user.id if user.role == 'patient' else parse_uuid(item.get('patient'))
+    medecin_id = user.id if user.role == 'medecin' else parse_uuid(item.get('medecin'))
+    if patient_id is None:
+        errors['patient'] = "Identifiant de patient invalide."
+    if medecin_id is None:
+        errors['medecin'] = "Identifiant de médecin invalide."
+    data['patient_id'], data['medecin_id'] = patient_id, medecin_id
+
+    when = parse_when(item.get('datetime'))
+    if when is None:
+        errors['datetime'] = "Date invalide. Utilisez ISO 8601."
+    data['datetime'] = when
+
+    if not data['reason']:
+        errors['reason'] = "Ce champ est requis."
+    if data['status'] not in dict(Appointment.STATUS_CHOICES):
+        errors['status'] = "Statut invalide."
+
+    return data, errors
+
+
+def _after_bulk_change(appointments=(), medecin_ids=()):
+    """
+    Répercuter des créations ou des mises à jour en lot sur la file de triage et l'index des créneaux.
+    """
+    protocols = {}
+    for appointment in appointments:
+        if appointment.status in triage.QUEUED_STATUSES:
+            if appointment.medecin_id not in protocols:
+                protocols[appointment.medecin_id] = triage.get_protocol(appointment.medecin_id)
+            triage.enqueue(appointment, protocols[appointment.medecin_id])
+
+    for medecin_id in set(medecin_ids) | {a.medecin_id for a in appointments}:
+        schedule_refresh(medecin_id)
+
+
+def create_appointments(items, user):
+    """
+    Créer un lot de rendez-vous dans une seule transaction.
+    Le lot est refusé en entier si une ligne est invalide ou en conflit.
+    Renvoie (rendez-vous créés, résultats par ligne).
+    """
+    results = []
+    rows = []
+    for index, item in enumerate(items):
+        data, errors = _validate_item(item, user)
+        results.append({'index': index, 'errors': errors})
+        rows.append(data)
+
+    valid_rows = [data for data, result in zip(rows, results) if not result['errors']]
+    if not valid_rows:
+        return [], results
+
+    # Rôles des patients et médecins référencés : une seule requête
+    roles = dict(User.objects.filter(
+        id__in={data['patient_id'] for data in valid_rows} | {data['medecin_id'] for data in valid_rows}
+    ).values_list('id', 'role'))
+
+    slot_length = timedelta(minutes=SLOT_MINUTES)
+    medecin_ids = {data['medecin_id'] for data in valid_rows}
+    start = min(data['datetime'] for data in valid_rows) - slot_length
+    end = max(data['datetime'] for data in valid_rows) + slot_length
+
+    with transaction.atomic():
+        # Sérialiser les créations en lot concurrentes pour les mêmes médecins
+        list(User.objects.select_for_update().filter(id__in=medecin_ids).values_list('id', flat=True))
+
+        booked = defaultdict(list)
+        for medecin_id, when in Appointment.objects.filter(
+            medecin_id__in=medecin_ids,
+            status__in=BOOKED_STATUSES,
+            datetime__gt=start,
+            datetime__lt=end,
+        ).values_list('medecin_id', 'datetime'):
+            booked[medecin_id].append(when)
+        for times in booked.values():
+            times.sort()
+
+        appointments = []
+        for data, result in zip(rows, results):
+            if result['errors']:
+                continue
+            errors = result['errors']
+
+            if roles.get(data['patient_id']) != 'patient':
+                errors['patient'] = "Patient introuvable."
+            if roles.get(data['medecin_id']) != 'medecin':
+                errors['medecin'] = "Médecin introuvable."
+
+            if data['status'] in BOOKED_STATUSES and not errors:
+                # Conflit si un rendez-vous du médecin est à moins d'un créneau
+                times = booked[data['medecin_id']]
+                index = bisect.bisect_right(times, data['datetime'] - slot_length)
+                if index < len(times) and times[index] < data['datetime'] + slot_length:
+                    errors['datetime'] = "Ce créneau est déjà occupé pour ce médecin."
+                else:
+                    bisect.insort(times, data['datetime'])
+
+            if not errors:
+                appointments.append(Appointment(
+                    patient_id=data['patient_id'],
+                    medecin_id=data['medecin_id'],
+                    datetime=data['datetime'],
+                    status=data['status'],
+                    reason=data['reason'],
+                    notes=data['notes'],
+                    is_urgent=data['is_urgent'],
+                ))
+
+        if any(result['errors'] for result in results):
+            return [], results
+
+        Appointment.objects.bulk_create(appointments)
+        for medecin_id, patient_id in {(a.medecin_id, a.patient_id) for a in appointments}:
+            record_interaction(medecin_id, patient_id)
+        _after_bulk_change(appointments)
+        appointments_bulk_created.send(sender=Appointment, appointments=appointments)
+
+    for result, appointment in zip(results, appointments):
+        result['id'] = str(appointment.id)
+    return appointments, results
+
+
+def bulk_update_status(queryset, new_status):
+    """
+    Appliquer un changement de statut à un ensemble filtré de rendez-vous par un seul UPDATE.
+    Renvoie les résultats par rendez-vous : 'updated', 'unchanged' ou 'invalid_transition'.
+    """
+    results = []
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().order_by().values_list('id', 'status', 'medecin_id'))
+
+        eligible, medecin_ids = [], set()
+        for appointment_id, current, medecin_id in rows:
+            if current == new_status:
+                outcome = 'unchanged'
+            elif new_status in ALLOWED_TRANSITIONS.get(current, set()):
+                outcome = 'updated'
+                eligible.append(appointment_id)
+                medecin_ids.add(medecin_id)
+            else:
+                outcome = 'invalid_transition'
+            results.append({'id': str(appointment_id), 'from': current, 'result': outcome})
+
+        if eligible:
+            Appointment.objects.filter(id__in=eligible).update(status=new_status, updated_at=timezone.now())
+
+            if new_status in triage.QUEUED_STATUSES:
+                _after_bulk_change(list(Appointment.objects.filter(id__in=eligible)), medecin_ids)
+            else:
+                TriageQueueEntry.objects.filter(appointment_id__in=eligible).delete()
+                _after_bulk_change(medecin_ids=medecin_ids)
+
+            appointments_bulk_status_changed.send(sender=Appointment, appointment_ids=eligible, status=new_status)
+
+    return results
@@ -0,0 +1,38 @@
+"""
+Maintenance de la table des relations de soins médecin ↔ patient.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import CareRelationship
+
+
+def record_interaction(medecin_id, patient_id, when=None):
+    """
+    Enregistrer une interaction entre un médecin et un patient (création ou mise à jour de la relation).
+    """
+    when = when or timezone.now()
+
+    updated = CareRelationship.objects.filter(
+        medecin_id=medecin_id, patient_id=patient_id, last_interaction__lt=when
+    ).update(last_interaction=when)
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            CareRelationship.objects.get_or_create(
+                medecin_id=medecin_id,
+                patient_id=patient_id,
+                defaults={'first_interaction': when, 'last_interaction': when},
+            )
+    except IntegrityError:
+        # Création concurrente de la même relation : elle existe désormais
+        pass
+
+
+def is_in_care_team(medecin, patient_id):
+    """
+    Le médecin a-t-il déjà eu un rendez-vous ou une consultation avec ce patient ?
+    """
+    return CareRelationship.objects.filter(medecin=medecin, patient_id=patient_id).exists()
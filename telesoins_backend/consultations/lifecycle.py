@@ -0,0 +1,78 @@
+"""
+Nettoyage périodique des rendez-vous et consultations laissés à l'abandon.
+
+* Un rendez-vous encore en attente ``APPOINTMENT_PENDING_EXPIRY_MINUTES`` après son heure est annulé.
+* Une consultation non terminée sans activité (dernier message, à défaut son début) depuis
+  ``CONSULTATION_IDLE_CLOSE_HOURS`` est clôturée, avec comme heure de fin sa dernière activité.
+
+Les lignes sont traitées par lots de ``LIFECYCLE_SWEEP_CHUNK_SIZE``, chacun dans sa propre
+transaction courte. Les lignes verrouillées par une requête en cours sont ignorées
+(SKIP LOCKED) et reprises au passage suivant : le nettoyage ne bloque pas le trafic.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Appointment, Consultation, Message
+from .signals import consultations_bulk_closed
+from . import batch
+
+PENDING_EXPIRY = timedelta(minutes=getattr(settings, 'APPOINTMENT_PENDING_EXPIRY_MINUTES', 60))
+IDLE_CLOSE = timedelta(hours=getattr(settings, 'CONSULTATION_IDLE_CLOSE_HOURS', 24))
+CHUNK_SIZE = getattr(settings, 'LIFECYCLE_SWEEP_CHUNK_SIZE', 500)
+
+
+def expire_pending_appointments(now=None, chunk_size=CHUNK_SIZE):
+    """
+    Annuler les rendez-vous en attente dont l'heure est dépassée. Renvoie le nombre annulé.
+    """
+    cutoff = (now or timezone.now()) - PENDING_EXPIRY
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(Appointment.objects.select_for_update(skip_locked=True).filter(
+                status='pending', datetime__lt=cutoff
+            ).order_by('datetime').values_list('id', flat=True)[:chunk_size])
+            if ids:
+                # Même chemin que les changements de statut en lot : file de triage, créneaux, notifications
+                batch.bulk_update_status(Appointment.objects.filter(id__in=ids), 'canceled')
+
+        total += len(ids)
+        if len(ids) < chunk_size:
+            return total
+
+
+def close_abandoned_consultations(now=None, chunk_size=CHUNK_SIZE):
+    """
+    Clôturer les consultations ouvertes sans activité récente. Renvoie le nombre clôturé.
+    """
+    cutoff = (now or timezone.now()) - IDLE_CLOSE
+    last_activity = Coalesce(
+        Subquery(Message.objects.filter(
+            consultation=OuterRef('pk')
+        ).order_by('-timestamp').values('timestamp')[:1]),
+        F('start_time'),
+    )
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(Consultation.objects.select_for_update(skip_locked=True).filter(
+                end_time__isnull=True, start_time__lt=cutoff
+            ).annotate(
+                last_activity=last_activity
+            ).filter(
+                last_activity__lt=cutoff
+            ).order_by('start_time').values_list('id', flat=True)[:chunk_size])
+
+            if ids:
+                Consultation.objects.filter(id__in=ids).update(end_time=last_activity)
+                consultations_bulk_closed.send(sender=Consultation, consultation_ids=ids)
+
+        total += len(ids)
+        if len(ids) < chunk_size:
+            return total
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from consultations.archive import archive_closed_consultations
+
+
+class Command(BaseCommand):
+    help = "Archive (compressés) les messages des consultations terminées depuis plus de la période de rétention."
+
+    def handle(self, *args, **options):
+        consultations, messages = archive_closed_consultations()
+        self.stdout.write(self.style.SUCCESS(
+            f"{messages} messages archivés pour {consultations} consultations."
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from consultations.partitions import MONTHS_AHEAD, create_message_partitions
+
+
+class Command(BaseCommand):
+    help = "Crée les partitions mensuelles des messages pour les mois à venir (à planifier chaque mois)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=MONTHS_AHEAD, help="Nombre de mois à préparer après le mois courant.")
+
+    def handle(self, *args, **options):
+        created = create_message_partitions(options['months'])
+        for name in created:
+            self.stdout.write(f"Partition créée : {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partitions créées."))
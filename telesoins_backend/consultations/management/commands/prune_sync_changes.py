@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from consultations.sync import prune
+
+
+class Command(BaseCommand):
+    help = "Supprime les lignes du journal de synchronisation plus anciennes que la période de rétention."
+
+    def handle(self, *args, **options):
+        deleted = prune()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} lignes du journal de synchronisation supprimées."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from consultations import triage
+from consultations.models import Appointment, TriageQueueEntry
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les files de triage à partir des rendez-vous en attente."
+
+    def handle(self, *args, **options):
+        TriageQueueEntry.objects.exclude(appointment__status__in=triage.QUEUED_STATUSES).delete()
+
+        protocols = {}
+        count = 0
+        appointments = Appointment.objects.filter(status__in=triage.QUEUED_STATUSES)
+        for appointment in appointments.iterator():
+            if appointment.medecin_id not in protocols:
+                protocols[appointment.medecin_id] = triage.get_protocol(appointment.medecin_id)
+            triage.enqueue(appointment, protocols[appointment.medecin_id])
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{count} rendez-vous placés dans les files de triage."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import MedecinProfile
+from consultations.availability import refresh_medecin_availability
+
+
+class Command(BaseCommand):
+    help = "Recalcule l'index des prochains créneaux disponibles de chaque médecin (à planifier régulièrement)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--medecin', help="Limiter le rafraîchissement à un médecin (UUID de l'utilisateur).")
+
+    def handle(self, *args, **options):
+        medecin_ids = MedecinProfile.objects.values_list('user_id', flat=True)
+        if options['medecin']:
+            medecin_ids = medecin_ids.filter(user_id=options['medecin'])
+
+        total_slots = 0
+        total_medecins = 0
+        for medecin_id in medecin_ids.iterator():
+            total_slots += refresh_medecin_availability(medecin_id)
+            total_medecins += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_slots} créneaux indexés pour {total_medecins} médecins."
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from consultations.lifecycle import expire_pending_appointments, close_abandoned_consultations
+
+
+class Command(BaseCommand):
+    help = "Annule les rendez-vous en attente dépassés et clôture les consultations abandonnées."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Lignes verrouillées par transaction.")
+        parser.add_argument('--interval', type=float, default=300, help="Pause (secondes) entre deux passages.")
+        parser.add_argument('--once', action='store_true', help="Faire un seul passage puis s'arrêter.")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_pending_appointments(chunk_size=options['chunk_size'])
+            closed = close_abandoned_consultations(chunk_size=options['chunk_size'])
+            if expired or closed or options['once']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{expired} rendez-vous expirés, {closed} consultations clôturées."
+                ))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilitySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('speciality', models.CharField(max_length=100)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('medecin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_slots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Créneau disponible',
+                'verbose_name_plural': 'Créneaux disponibles',
+                'ordering': ['start'],
+                'indexes': [models.Index(fields=['speciality', 'start'], name='availability_spec_start_idx'), models.Index(fields=['medecin', 'start'], name='availability_medecin_start_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0002_availabilityslot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TriageQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('priority', models.FloatField(default=0)),
+                ('enqueued_at', models.DateTimeField()),
+                ('appointment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='triage_entry', to='consultations.appointment')),
+                ('medecin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='triage_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Entrée de triage',
+                'verbose_name_plural': 'File de triage',
+                'ordering': ['-priority'],
+                'indexes': [models.Index(fields=['medecin', '-priority'], name='triage_medecin_priority_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+
+def backfill_care_relationships(apps, schema_editor):
+    Appointment = apps.get_model('consultations', 'Appointment')
+    Consultation = apps.get_model('consultations', 'Consultation')
+    CareRelationship = apps.get_model('consultations', 'CareRelationship')
+
+    bounds = {}
+    sources = [
+        Appointment.objects.values('medecin_id', 'patient_id').annotate(first=Min('created_at'), last=Max('created_at')),
+        Consultation.objects.values('medecin_id', 'patient_id').annotate(first=Min('start_time'), last=Max('start_time')),
+    ]
+    for rows in sources:
+        for row in rows:
+            key = (row['medecin_id'], row['patient_id'])
+            first, last = bounds.get(key, (row['first'], row['last']))
+            bounds[key] = (min(first, row['first']), max(last, row['last']))
+
+    CareRelationship.objects.bulk_create([
+        CareRelationship(medecin_id=medecin_id, patient_id=patient_id, first_interaction=first, last_interaction=last)
+        for (medecin_id, patient_id), (first, last) in bounds.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0003_triagequeueentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareRelationship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_interaction', models.DateTimeField()),
+                ('last_interaction', models.DateTimeField()),
+                ('medecin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='medecin_care_relationships', to=settings.AUTH_USER_MODEL)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patient_care_relationships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Relation de soins',
+                'verbose_name_plural': 'Relations de soins',
+                'indexes': [models.Index(fields=['patient', 'medecin'], name='care_patient_medecin_idx')],
+                'constraints': [models.UniqueConstraint(fields=('medecin', 'patient'), name='unique_care_relationship')],
+            },
+        ),
+        migrations.RunPython(backfill_care_relationships, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0004_carerelationship'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', 'datetime'], name='appointment_status_dt_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0005_appointment_appointment_status_dt_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consultation',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['start_time'], name='consultation_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['consultation', 'timestamp'], name='message_consultation_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+from datetime import date
+
+from django.db import migrations
+
+# Colonnes de consultations_message (voir 0001_initial)
+COLUMNS = 'id, content, attachment, "timestamp", is_read, consultation_id, sender_id'
+
+CREATE_TABLE = """
+CREATE TABLE consultations_message (
+    id uuid NOT NULL,
+    content text NOT NULL,
+    attachment varchar(100) NULL,
+    "timestamp" timestamp with time zone NOT NULL,
+    is_read boolean NOT NULL,
+    consultation_id uuid NOT NULL
+        REFERENCES consultations_consultation (id) DEFERRABLE INITIALLY DEFERRED,
+    sender_id uuid NOT NULL
+        REFERENCES accounts_user (id) DEFERRABLE INITIALLY DEFERRED,
+    PRIMARY KEY (id, "timestamp")
+){partition}
+"""
+
+CREATE_INDEXES = [
+    'CREATE INDEX consultations_message_consultation_id_idx ON consultations_message (consultation_id)',
+    'CREATE INDEX consultations_message_sender_id_idx ON consultations_message (sender_id)',
+    'CREATE INDEX message_consultation_ts_idx ON consultations_message (consultation_id, "timestamp")',
+]
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def rebuild_table(cursor, partition):
+    cursor.execute('ALTER TABLE consultations_message RENAME TO consultations_message_old')
+    cursor.execute(
+        'ALTER TABLE consultations_message_old RENAME CONSTRAINT consultations_message_pkey TO consultations_message_old_pkey'
+    )
+    cursor.execute(CREATE_TABLE.format(partition=partition))
+    if partition:
+        cursor.execute('CREATE TABLE consultations_message_default PARTITION OF consultations_message DEFAULT')
+
+        # Une partition par mois, du plus ancien message jusqu'à trois mois après aujourd'hui
+        cursor.execute('SELECT min("timestamp") FROM consultations_message_old')
+        oldest = cursor.fetchone()[0]
+        month = (oldest.date() if oldest else date.today()).replace(day=1)
+        last = add_months(date.today().replace(day=1), 3)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE consultations_message_y{month:%Y}m{month:%m} PARTITION OF consultations_message '
+                f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+            )
+            month = add_months(month, 1)
+
+    cursor.execute(f'INSERT INTO consultations_message ({COLUMNS}) SELECT {COLUMNS} FROM consultations_message_old')
+    cursor.execute('DROP TABLE consultations_message_old CASCADE')
+    for sql in CREATE_INDEXES:
+        cursor.execute(sql)
+
+
+def partition_messages(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        rebuild_table(cursor, ' PARTITION BY RANGE ("timestamp")')
+
+
+def unpartition_messages(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        rebuild_table(cursor, '')
+        cursor.execute('ALTER TABLE consultations_message DROP CONSTRAINT consultations_message_pkey')
+        cursor.execute('ALTER TABLE consultations_message ADD PRIMARY KEY (id)')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('consultations', '0007_messagearchive'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_messages, unpartition_messages),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0008_partition_message'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(choices=[('appointment', 'Rendez-vous'), ('consultation', 'Consultation'), ('prescription', 'Prescription'), ('message', 'Message')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_changes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Modification synchronisée',
+                'verbose_name_plural': 'Modifications synchronisées',
+                'indexes': [models.Index(fields=['user', 'model', 'id'], name='sync_user_model_idx'), models.Index(fields=['created_at'], name='sync_created_idx')],
+            },
+        ),
+    ]
@@ -28,6 +28,9 @@ class Appointment(models.Model):
         ordering = ['-datetime']
         verbose_name = "Rendez-vous"
         verbose_name_plural = "Rendez-vous"
+        indexes = [
+            models.Index(fields=['status', 'datetime'], name='appointment_status_dt_idx'),
+        ]
     
     def __str__(self):
         return f"RDV: {self.patient.get_full_name()} avec {self.medecin.get_full_name()} le {self.datetime.strftime('%d/%m/%Y %H:%M')}"
@@ -53,6 +56,9 @@ class Consultation(models.Model):
         ordering = ['-start_time']
         verbose_name = "Consultation"
         verbose_name_plural = "Consultations"
+        indexes = [
+            models.Index(fields=['start_time'], condition=models.Q(end_time__isnull=True), name='consultation_open_idx'),
+        ]
     
     def __str__(self):
         return f"Consultation {self.get_type_display()}: {self.patient.get_full_name()} avec {self.medecin.get_full_name()}"
@@ -84,6 +90,129 @@ class Message(models.Model):
         ordering = ['timestamp']
         verbose_name = "Message"
         verbose_name_plural = "Messages"
+        indexes = [
+            models.Index(fields=['consultation', 'timestamp'], name='message_consultation_ts_idx'),
+        ]
     
     def __str__(self):
-        return f"Message de {self.sender.get_full_name()} - {self.timestamp.strftime('%d/%m/%Y %H:%M')}"
\ No newline at end of file
+        return f"Message de {self.sender.get_full_name()} - {self.timestamp.strftime('%d/%m/%Y %H:%M')}"
+
+class AvailabilitySlot(models.Model):
+    """
+    Index précalculé des prochains créneaux libres de chaque médecin.
+    La spécialité est dénormalisée pour répondre à une recherche par spécialité en une seule requête.
+    """
+    medecin = models.ForeignKey(User, on_delete=models.CASCADE, related_name='availability_slots')
+    speciality = models.CharField(max_length=100)
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['start']
+        verbose_name = "Créneau disponible"
+        verbose_name_plural = "Créneaux disponibles"
+        indexes = [
+            models.Index(fields=['speciality', 'start'], name='availability_spec_start_idx'),
+            models.Index(fields=['medecin', 'start'], name='availability_medecin_start_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Créneau de {self.medecin.get_full_name()} le {self.start.strftime('%d/%m/%Y %H:%M')}"
+
+
+class TriageQueueEntry(models.Model):
+    """
+    Entrée de la file de triage d'un médecin (rendez-vous en attente).
+    ``priority`` intègre le temps d'attente de manière invariante dans le temps,
+    ce qui permet de servir la file par un simple parcours d'index décroissant.
+    """
+    appointment = models.OneToOneField(Appointment, on_delete=models.CASCADE, related_name='triage_entry')
+    medecin = models.ForeignKey(User, on_delete=models.CASCADE, related_name='triage_entries')
+    score = models.FloatField(default=0)
+    priority = models.FloatField(default=0)
+    enqueued_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-priority']
+        verbose_name = "Entrée de triage"
+        verbose_name_plural = "File de triage"
+        indexes = [
+            models.Index(fields=['medecin', '-priority'], name='triage_medecin_priority_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Triage {self.score:.0f}: {self.appointment}"
+
+
+class CareRelationship(models.Model):
+    """
+    Relation de soins matérialisée entre un médecin et un patient.
+    Maintenue à la création des rendez-vous et des consultations, elle sert de base
+    aux règles de visibilité entre patients et médecins.
+    """
+    medecin = models.ForeignKey(User, on_delete=models.CASCADE, related_name='medecin_care_relationships')
+    patient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='patient_care_relationships')
+    first_interaction = models.DateTimeField()
+    last_interaction = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = "Relation de soins"
+        verbose_name_plural = "Relations de soins"
+        constraints = [
+            models.UniqueConstraint(fields=['medecin', 'patient'], name='unique_care_relationship'),
+        ]
+        indexes = [
+            models.Index(fields=['patient', 'medecin'], name='care_patient_medecin_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.medecin.get_full_name()} soigne {self.patient.get_full_name()}"
+
+class MessageArchive(models.Model):
+    """
+    Messages d'une consultation clôturée depuis longtemps, sortis de la table Message
+    et stockés compressés (JSON + zlib). Voir consultations/archive.py.
+    """
+    consultation = models.OneToOneField(Consultation, on_delete=models.CASCADE, primary_key=True, related_name='message_archive')
+    data = models.BinaryField()
+    message_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Archive de messages"
+        verbose_name_plural = "Archives de messages"
+    
+    def __str__(self):
+        return f"{self.message_count} messages archivés ({self.consultation_id})"
+
+class SyncChange(models.Model):
+    """
+    Journal des modifications pour la synchronisation incrémentale des applications mobiles :
+    une ligne par objet modifié (ou supprimé) et par utilisateur concerné. L'identifiant
+    auto-incrémenté sert de curseur. Voir consultations/sync.py.
+    """
+    MODEL_CHOICES = (
+        ('appointment', 'Rendez-vous'),
+        ('consultation', 'Consultation'),
+        ('prescription', 'Prescription'),
+        ('message', 'Message'),
+    )
+    
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_changes')
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.UUIDField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Modification synchronisée"
+        verbose_name_plural = "Modifications synchronisées"
+        indexes = [
+            models.Index(fields=['user', 'model', 'id'], name='sync_user_model_idx'),
+            models.Index(fields=['created_at'], name='sync_created_idx'),
+        ]
+    
+    def __str__(self):
+        action = "suppression" if self.deleted else "modification"
+        return f"{action} {self.model} {self.object_id} pour {self.user_id}"
@@ -0,0 +1,75 @@
+"""
+Partitionnement mensuel de la table des messages (PostgreSQL uniquement).
+
+La migration 0008 transforme ``consultations_message`` en table partitionnée par
+intervalle sur ``timestamp`` (une partition par mois, plus une partition par défaut).
+La clé primaire devient (id, timestamp), la clé de partition devant en faire partie ;
+pour Django, ``id`` reste la clé primaire du modèle.
+
+Les requêtes filtrées sur ``timestamp`` ne lisent que les partitions concernées, et les
+index par partition restent petits. ``create_message_partitions`` (commande du même nom,
+à planifier chaque mois) crée les partitions des mois à venir avant qu'on y écrive : une
+partition ne peut pas être créée si la partition par défaut contient déjà des lignes de sa période.
+
+Sur les autres bases (SQLite en développement), ces fonctions ne font rien.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import connection
+
+MESSAGE_TABLE = 'consultations_message'
+MONTHS_AHEAD = getattr(settings, 'MESSAGE_PARTITION_MONTHS_AHEAD', 3)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{MESSAGE_TABLE}_y{month:%Y}m{month:%m}'
+
+
+def partition_sql(month):
+    return (
+        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {MESSAGE_TABLE} '
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [MESSAGE_TABLE]
+    )
+    return cursor.fetchone() is not None
+
+
+def existing_partitions(cursor):
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)", [MESSAGE_TABLE]
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def create_message_partitions(months_ahead=MONTHS_AHEAD, today=None):
+    """
+    Créer les partitions du mois courant et des ``months_ahead`` mois suivants.
+    Renvoie les noms des partitions créées.
+    """
+    if connection.vendor != 'postgresql':
+        return []
+
+    current = (today or date.today()).replace(day=1)
+    created = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        existing = existing_partitions(cursor)
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if partition_name(month) not in existing:
+                cursor.execute(partition_sql(month))
+                created.append(partition_name(month))
+    return created
@@ -0,0 +1,99 @@
+import copy
+
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver, Signal
+from accounts.models import MedecinProfile
+from .models import Appointment, Consultation, Prescription, Message
+from .availability import schedule_refresh
+from . import triage
+from . import sync
+from .care_team import record_interaction
+
+# Les opérations en lot (voir batch.py) ne déclenchent pas post_save : elles envoient ces signaux
+appointments_bulk_created = Signal()         # appointments=[Appointment, ...]
+appointments_bulk_status_changed = Signal()  # appointment_ids=[...], status=nouveau statut
+consultations_bulk_closed = Signal()         # consultation_ids=[...]
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def refresh_availability_on_appointment_change(sender, instance, **kwargs):
+    # Un rendez-vous créé, déplacé ou annulé libère ou occupe un créneau du médecin
+    schedule_refresh(instance.medecin_id)
+
+@receiver(post_save, sender=Appointment)
+def sync_triage_queue(sender, instance, **kwargs):
+    # Un rendez-vous en attente entre dans la file de triage, il en sort dès qu'il change de statut
+    triage.sync_appointment(instance)
+
+@receiver(post_save, sender=Appointment)
+def record_care_relationship_on_appointment(sender, instance, created, **kwargs):
+    if created:
+        record_interaction(instance.medecin_id, instance.patient_id, instance.created_at)
+
+@receiver(post_save, sender=Consultation)
+def record_care_relationship_on_consultation(sender, instance, created, **kwargs):
+    if created:
+        record_interaction(instance.medecin_id, instance.patient_id, instance.start_time)
+
+# Champs du profil médecin dont dépend l'index des créneaux (voir availability.py)
+AVAILABILITY_FIELDS = ('speciality', 'available_hours')
+
+_UNKNOWN = object()
+
+def _snapshot(instance, fields):
+    # Un champ différé n'est pas chargé ici (une requête par instance) : il compte comme modifié
+    deferred = instance.get_deferred_fields()
+    return {name: _UNKNOWN if name in deferred else copy.deepcopy(getattr(instance, name)) for name in fields}
+
+def _changed(instance, fields, snapshot):
+    return any(value is _UNKNOWN or getattr(instance, name) != value for name, value in snapshot.items())
+
+@receiver(post_init, sender=MedecinProfile)
+def remember_availability_fields(sender, instance, **kwargs):
+    instance._availability_fields = _snapshot(instance, AVAILABILITY_FIELDS)
+
+@receiver(post_save, sender=MedecinProfile)
+def refresh_availability_on_profile_change(sender, instance, created, **kwargs):
+    # Seulement si les horaires ou la spécialité ont changé : le profil est réenregistré
+    # à chaque enregistrement de l'utilisateur (accounts/signals.py), connexion comprise
+    if created or _changed(instance, AVAILABILITY_FIELDS, instance._availability_fields):
+        schedule_refresh(instance.user_id)
+    instance._availability_fields = _snapshot(instance, AVAILABILITY_FIELDS)
+
+@receiver(post_init, sender=MedecinProfile)
+def remember_triage_protocols(sender, instance, **kwargs):
+    instance._triage_fields = _snapshot(instance, ('triage_protocols',))
+
+@receiver(post_save, sender=MedecinProfile)
+def requeue_on_protocol_change(sender, instance, created, **kwargs):
+    # Protocole de triage modifié : recalculer les scores de la file
+    if not created and _changed(instance, ('triage_protocols',), instance._triage_fields):
+        triage.requeue_medecin(instance.user_id)
+    instance._triage_fields = _snapshot(instance, ('triage_protocols',))
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_save, sender=Consultation)
+@receiver(post_save, sender=Prescription)
+@receiver(post_save, sender=Message)
+def record_sync_change(sender, instance, **kwargs):
+    # Journal de synchronisation incrémentale des applications mobiles (voir sync.py)
+    sync.record([instance])
+
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=Consultation)
+@receiver(post_delete, sender=Prescription)
+@receiver(post_delete, sender=Message)
+def record_sync_tombstone(sender, instance, **kwargs):
+    sync.record([instance], deleted=True)
+
+@receiver(appointments_bulk_created)
+def record_sync_bulk_created(sender, appointments, **kwargs):
+    sync.record(appointments)
+
+@receiver(appointments_bulk_status_changed)
+def record_sync_bulk_status(sender, appointment_ids, **kwargs):
+    sync.record_ids(Appointment, appointment_ids)
+
+@receiver(consultations_bulk_closed)
+def record_sync_bulk_closed(sender, consultation_ids, **kwargs):
+    sync.record_ids(Consultation, consultation_ids)
@@ -0,0 +1,229 @@
+"""
+Synchronisation incrémentale pour les applications mobiles hors ligne.
+
+Chaque création, modification ou suppression d'un rendez-vous, d'une consultation, d'une
+prescription ou d'un message ajoute une ligne ``SyncChange`` par utilisateur concerné
+(patient et médecin). Les suppressions y restent comme pierres tombales.
+
+``GET .../sync/`` (sans ``since``) renvoie la liste complète et un curseur ;
+``GET .../sync/?since=<curseur>`` ne renvoie que les objets modifiés depuis, les identifiants
+supprimés et un nouveau curseur. Le coût d'une reconnexion dépend du nombre de modifications,
+pas de l'historique.
+
+Les identifiants du journal sont attribués à l'insertion, pas à la validation : une transaction
+plus lente peut valider un identifiant inférieur au curseur déjà rendu. Le curseur n'avance donc
+que sur les lignes plus anciennes que ``SYNC_SETTLE_SECONDS`` ; les plus récentes sont renvoyées
+à nouveau au passage suivant (l'application les réapplique sans effet).
+
+Le journal est purgé après ``SYNC_CHANGE_RETENTION_DAYS`` jours (commande ``prune_sync_changes``) :
+un curseur plus ancien est refusé (410) et l'application refait une synchronisation complète.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Appointment, Consultation, Prescription, Message, SyncChange
+
+SETTLE = timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 5))
+RETENTION = timedelta(days=getattr(settings, 'SYNC_CHANGE_RETENTION_DAYS', 30))
+PAGE_SIZE = getattr(settings, 'SYNC_PAGE_SIZE', 500)
+
+MODEL_NAMES = {
+    Appointment: 'appointment',
+    Consultation: 'consultation',
+    Prescription: 'prescription',
+    Message: 'message',
+}
+
+_paused = ContextVar('sync_paused', default=False)
+
+
+class CursorExpired(Exception):
+    pass
+
+
+@contextmanager
+def paused():
+    """
+    Ne rien journaliser dans ce bloc (par exemple l'archivage des messages, qui restent lisibles).
+    """
+    token = _paused.set(True)
+    try:
+        yield
+    finally:
+        _paused.reset(token)
+
+
+def _participants(model_name, instances):
+    """
+    {id de l'objet: (patient, médecin)} pour une liste d'instances du même modèle.
+    """
+    if model_name in ('appointment', 'consultation'):
+        return {instance.pk: (instance.patient_id, instance.medecin_id) for instance in instances}
+
+    consultations = dict(
+        (pk, (patient_id, medecin_id)) for pk, patient_id, medecin_id in Consultation.objects.filter(
+            pk__in={instance.consultation_id for instance in instances}
+        ).values_list('pk', 'patient_id', 'medecin_id')
+    )
+    return {
+        instance.pk: consultations[instance.consultation_id]
+        for instance in instances if instance.consultation_id in consultations
+    }
+
+
+def _write(model_name, participants, deleted):
+    SyncChange.objects.bulk_create([
+        SyncChange(user_id=user_id, model=model_name, object_id=object_id, deleted=deleted)
+        for object_id, users in participants.items()
+        for user_id in set(users)
+    ], batch_size=1000)
+
+
+def record(instances, deleted=False):
+    """
+    Journaliser la modification (ou la suppression) d'instances d'un même modèle.
+    """
+    instances = list(instances)
+    if not instances or _paused.get():
+        return
+    model_name = MODEL_NAMES[type(instances[0])]
+    _write(model_name, _participants(model_name, instances), deleted)
+
+
+def record_ids(model, ids, deleted=False):
+    """
+    Variante de ``record`` pour les mises à jour en lot, qui ne disposent que des identifiants.
+    """
+    if not ids or _paused.get():
+        return
+    model_name = MODEL_NAMES[model]
+    if model_name in ('appointment', 'consultation'):
+        rows = model.objects.filter(pk__in=ids).values_list('pk', 'patient_id', 'medecin_id')
+    else:
+        rows = model.objects.filter(pk__in=ids).values_list(
+            'pk', 'consultation__patient_id', 'consultation__medecin_id'
+        )
+    _write(model_name, {pk: (patient_id, medecin_id) for pk, patient_id, medecin_id in rows}, deleted)
+
+
+def prune(now=None, chunk_size=5000):
+    """
+    Supprimer les lignes du journal plus anciennes que la rétention. Renvoie le nombre supprimé.
+    """
+    cutoff = (now or timezone.now()) - RETENTION
+    total = 0
+    while True:
+        ids = list(SyncChange.objects.filter(created_at__lt=cutoff).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        total += SyncChange.objects.filter(id__in=ids).delete()[0]
+
+
+def encode_cursor(seq, when):
+    return f"{seq}-{int(when.timestamp())}"
+
+
+def decode_cursor(value):
+    seq, _, stamp = str(value).partition('-')
+    return int(seq), datetime.fromtimestamp(int(stamp), tz=dt_timezone.utc)
+
+
+def current_cursor(user, model_name):
+    """
+    Curseur à renvoyer avec une synchronisation complète.
+    """
+    now = timezone.now()
+    seq = SyncChange.objects.filter(
+        user=user, model=model_name, created_at__lte=now - SETTLE
+    ).aggregate(seq=Max('id'))['seq'] or 0
+    return encode_cursor(seq, now)
+
+
+def changes_since(user, model_name, cursor, limit=PAGE_SIZE):
+    """
+    Renvoie (ids modifiés, ids supprimés, nouveau curseur, reste-t-il des modifications).
+    """
+    since, issued_at = decode_cursor(cursor)
+    now = timezone.now()
+    if issued_at < now - RETENTION:
+        raise CursorExpired
+
+    entries = list(SyncChange.objects.filter(
+        user=user, model=model_name, id__gt=since
+    ).order_by('id').values_list('id', 'object_id', 'deleted', 'created_at')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Seule la dernière opération de chaque objet compte
+    latest = {}
+    for seq, object_id, deleted, created_at in entries:
+        latest[object_id] = deleted
+
+    # Le curseur n'avance que sur les lignes assez anciennes pour être toutes validées
+    new_seq = since
+    for seq, object_id, deleted, created_at in entries:
+        if created_at > now - SETTLE:
+            break
+        new_seq = seq
+
+    changed = [object_id for object_id, deleted in latest.items() if not deleted]
+    removed = [object_id for object_id, deleted in latest.items() if deleted]
+    return changed, removed, encode_cursor(new_seq, now), has_more
+
+
+class SyncMixin:
+    """
+    Action ``sync`` d'un ViewSet dont le modèle est journalisé dans ``SyncChange``.
+    """
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Synchronisation complète (sans ``since``) ou incrémentale (``?since=<curseur>``).
+        """
+        model_name = MODEL_NAMES[self.get_queryset().model]
+        since = request.query_params.get('since')
+
+        if not since:
+            cursor = current_cursor(request.user, model_name)
+            serializer = self.get_serializer(self.filter_queryset(self.get_queryset()), many=True)
+            return Response({
+                'cursor': cursor,
+                'full': True,
+                'has_more': False,
+                'results': serializer.data,
+                'deleted': [],
+            })
+
+        try:
+            changed, removed, cursor, has_more = changes_since(request.user, model_name, since)
+        except (TypeError, ValueError, OverflowError):
+            return Response(
+                {"error": "Curseur de synchronisation invalide."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except CursorExpired:
+            return Response(
+                {"error": "Curseur expiré : une synchronisation complète est nécessaire."},
+                status=status.HTTP_410_GONE
+            )
+
+        objects = list(self.filter_queryset(self.get_queryset()).filter(pk__in=changed))
+        # Un objet modifié qui n'est plus visible est traité comme supprimé
+        visible = {obj.pk for obj in objects}
+        removed += [object_id for object_id in changed if object_id not in visible]
+
+        return Response({
+            'cursor': cursor,
+            'full': False,
+            'has_more': has_more,
+            'results': self.get_serializer(objects, many=True).data,
+            'deleted': [str(object_id) for object_id in removed],
+        })
@@ -0,0 +1,153 @@
+"""
+File de triage par médecin pour les rendez-vous en attente.
+
+Le protocole de triage est lu dans ``MedecinProfile.triage_protocols`` :
+
+    {
+        "urgent_weight": 100,            # bonus pour un rendez-vous marqué urgent
+        "wait_weight_per_hour": 1,       # points gagnés par heure d'attente
+        "keywords": {"douleur thoracique": 80, "fièvre": 20}   # bonus si le motif contient le mot-clé
+    }
+
+Le score courant d'une entrée vaut ``score + wait_weight_per_hour * heures d'attente``.
+Comme le poids d'attente est le même pour toute la file d'un médecin, l'ordre entre deux entrées
+ne dépend pas de l'instant présent : on stocke ``priority = score - wait_weight_per_hour * t_entrée``
+(en heures), indexé avec le médecin. L'insertion, le retrait et la lecture de la tête de file
+sont donc des opérations d'index en O(log n).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import MedecinProfile
+from .models import Appointment, TriageQueueEntry
+
+DEFAULT_PROTOCOL = {
+    'urgent_weight': 100,
+    'wait_weight_per_hour': 1,
+    'keywords': {},
+}
+
+# Seuls les rendez-vous en attente sont dans la file
+QUEUED_STATUSES = ['pending']
+
+
+def get_protocol(medecin_id):
+    protocols = MedecinProfile.objects.filter(
+        user_id=medecin_id
+    ).values_list('triage_protocols', flat=True).first()
+
+    protocol = dict(DEFAULT_PROTOCOL)
+    if isinstance(protocols, dict):
+        protocol.update({key: protocols[key] for key in DEFAULT_PROTOCOL if key in protocols})
+    return protocol
+
+
+def compute_score(appointment, protocol):
+    """
+    Score statique d'un rendez-vous selon le protocole du médecin (hors temps d'attente).
+    """
+    score = 0.0
+    if appointment.is_urgent:
+        score += float(protocol.get('urgent_weight') or 0)
+
+    keywords = protocol.get('keywords') or {}
+    if isinstance(keywords, dict):
+        reason = (appointment.reason or '').lower()
+        for keyword, weight in keywords.items():
+            try:
+                if keyword and keyword.lower() in reason:
+                    score += float(weight)
+            except (TypeError, ValueError, AttributeError):
+                continue
+    return score
+
+
+def compute_priority(score, enqueued_at, protocol):
+    wait_weight = float(protocol.get('wait_weight_per_hour') or 0)
+    return score - wait_weight * enqueued_at.timestamp() / 3600
+
+
+def current_score(entry, protocol, now=None):
+    """
+    Score courant d'une entrée, temps d'attente inclus.
+    """
+    now = now or timezone.now()
+    wait_weight = float(protocol.get('wait_weight_per_hour') or 0)
+    return entry.priority + wait_weight * now.timestamp() / 3600
+
+
+def enqueue(appointment, protocol=None):
+    """
+    Insérer ou mettre à jour un rendez-vous dans la file de son médecin.
+    """
+    protocol = protocol or get_protocol(appointment.medecin_id)
+    score = compute_score(appointment, protocol)
+    enqueued_at = appointment.created_at or timezone.now()
+
+    entry, created = TriageQueueEntry.objects.update_or_create(
+        appointment=appointment,
+        defaults={
+            'medecin_id': appointment.medecin_id,
+            'score': score,
+            'priority': compute_priority(score, enqueued_at, protocol),
+            'enqueued_at': enqueued_at,
+        }
+    )
+    return entry
+
+
+def remove(appointment):
+    TriageQueueEntry.objects.filter(appointment=appointment).delete()
+
+
+def sync_appointment(appointment):
+    """
+    Aligner la file sur le statut courant du rendez-vous.
+    """
+    if appointment.status in QUEUED_STATUSES:
+        enqueue(appointment)
+    else:
+        remove(appointment)
+
+
+def requeue_medecin(medecin_id):
+    """
+    Recalculer toutes les entrées d'un médecin (par exemple après un changement de protocole).
+    """
+    protocol = get_protocol(medecin_id)
+    entries = list(TriageQueueEntry.objects.filter(medecin_id=medecin_id).select_related('appointment'))
+
+    for entry in entries:
+        entry.score = compute_score(entry.appointment, protocol)
+        entry.priority = compute_priority(entry.score, entry.enqueued_at, protocol)
+
+    TriageQueueEntry.objects.bulk_update(entries, ['score', 'priority'])
+    return len(entries)
+
+
+def queue_for(medecin_id):
+    return TriageQueueEntry.objects.filter(
+        medecin_id=medecin_id
+    ).select_related('appointment__patient', 'appointment__medecin').order_by('-priority')
+
+
+def claim_next(medecin_id):
+    """
+    Retirer atomiquement la tête de file du médecin et confirmer le rendez-vous.
+    Les entrées déjà verrouillées par une autre requête sont ignorées (SKIP LOCKED),
+    ce qui permet à plusieurs postes de servir la même file sans se bloquer.
+    """
+    with transaction.atomic():
+        entry = TriageQueueEntry.objects.select_for_update(
+            skip_locked=True, of=('self',)
+        ).filter(medecin_id=medecin_id).order_by('-priority').first()
+
+        if entry is None:
+            return None
+
+        appointment = Appointment.objects.select_for_update().get(pk=entry.appointment_id)
+        entry.delete()
+        appointment.status = 'confirmed'
+        appointment.save(update_fields=['status', 'updated_at'])
+
+    return appointment
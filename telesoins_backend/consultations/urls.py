@@ -7,6 +7,8 @@ router.register(r'appointments', views.AppointmentViewSet)
 router.register(r'consultations', views.ConsultationViewSet)
 router.register(r'prescriptions', views.PrescriptionViewSet)
 router.register(r'messages', views.MessageViewSet)
+router.register(r'availability', views.AvailabilityViewSet)
+router.register(r'triage', views.TriageQueueViewSet)
 
 app_name = 'consultations'
 
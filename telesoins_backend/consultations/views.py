@@ -1,21 +1,36 @@
+import uuid
+
 from django.shortcuts import render
 
 # Create your views here.
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from rest_framework import viewsets, permissions, status, filters
+from rest_framework import viewsets, mixins, permissions, status, filters, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Q, F
+
+from django.utils.dateparse import parse_datetime
 
-from .models import Appointment, Consultation, Prescription, Message
+from .models import Appointment, Consultation, Prescription, Message, AvailabilitySlot, TriageQueueEntry
+from .availability import search_earliest_slots
+from . import triage
+from .care_team import is_in_care_team
+from . import batch
+from . import sync
+from .archive import consultation_messages
 from accounts.models import User
+from telesoins_backend.db_router import ReplicaReadMixin
+from api.mixins import SparseFieldsetMixin
+from api.idempotency import IdempotencyMixin
+from api import dashboards
 from api.serializers import (
     AppointmentSerializer, ConsultationSerializer, 
-    PrescriptionSerializer, MessageSerializer
+    PrescriptionSerializer, MessageSerializer, AvailabilitySlotSerializer,
+    TriageQueueEntrySerializer
 )
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(IdempotencyMixin, ReplicaReadMixin, SparseFieldsetMixin, sync.SyncMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les rendez-vous.
     Les patients ne peuvent voir et modifier que leurs propres rendez-vous.
@@ -24,6 +39,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ('list', 'upcoming', 'by_date')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['reason', 'notes', 'patient__first_name', 'patient__last_name', 
                      'medecin__first_name', 'medecin__last_name']
@@ -70,6 +86,103 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         
         return Response(AppointmentSerializer(appointment).data)
 
+    @action(detail=False, methods=['post'])
+    def batch_create(self, request):
+        """
+        Créer plusieurs rendez-vous en une seule transaction.
+        Corps : {"appointments": [{"patient", "medecin", "datetime", "reason", ...}, ...]}.
+        Le lot est refusé en entier si une ligne est invalide ou en conflit avec un rendez-vous existant.
+        """
+        items = request.data.get('appointments')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Le paramètre appointments doit être une liste non vide."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(items) > batch.BATCH_MAX_SIZE:
+            return Response(
+                {"error": f"Un lot ne peut pas dépasser {batch.BATCH_MAX_SIZE} rendez-vous."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        appointments, results = batch.create_appointments(items, request.user)
+        if not appointments:
+            return Response(
+                {"error": "Aucun rendez-vous n'a été créé.", "results": results},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({"created": len(appointments), "results": results}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def bulk_update_status(self, request):
+        """
+        Appliquer un changement de statut à un ensemble filtré de rendez-vous.
+        Corps : {"status": "canceled", "ids": [...], "date": "YYYY-MM-DD", "start": ISO, "end": ISO,
+        "current_status": "pending", "medecin": UUID}. Au moins un filtre est requis.
+        """
+        status_value = request.data.get('status')
+        if not status_value or status_value not in dict(Appointment.STATUS_CHOICES).keys():
+            return Response(
+                {"error": "Statut invalide."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.get_queryset()
+        filtered = False
+        
+        ids = request.data.get('ids')
+        if ids:
+            if not isinstance(ids, list):
+                return Response(
+                    {"error": "Le paramètre ids doit être une liste."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(id__in=[batch.parse_uuid(value) for value in ids])
+            filtered = True
+        
+        date_str = request.data.get('date')
+        if date_str:
+            from datetime import datetime
+            try:
+                queryset = queryset.filter(datetime__date=datetime.strptime(date_str, '%Y-%m-%d').date())
+            except ValueError:
+                return Response(
+                    {"error": "Format de date invalide. Utilisez YYYY-MM-DD."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            filtered = True
+        
+        for param, lookup in (('start', 'datetime__gte'), ('end', 'datetime__lt')):
+            value = request.data.get(param)
+            if value:
+                parsed = batch.parse_when(value)
+                if parsed is None:
+                    return Response(
+                        {"error": f"Format de date invalide pour {param}. Utilisez ISO 8601."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                queryset = queryset.filter(**{lookup: parsed})
+                filtered = True
+        
+        if request.data.get('current_status'):
+            queryset = queryset.filter(status=request.data['current_status'])
+        if request.data.get('medecin'):
+            queryset = queryset.filter(medecin_id=batch.parse_uuid(request.data['medecin']))
+        
+        if not filtered:
+            return Response(
+                {"error": "Au moins un filtre (ids, date, start ou end) est requis."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = batch.bulk_update_status(queryset, status_value)
+        return Response({
+            "updated": sum(1 for result in results if result['result'] == 'updated'),
+            "results": results,
+        })
+
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """
@@ -122,11 +235,19 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         """
         Récupérer les rendez-vous urgents.
         """
-        queryset = self.get_queryset().filter(is_urgent=True).order_by('datetime')
+        queryset = self.get_queryset().filter(is_urgent=True).order_by(
+            F('triage_entry__priority').desc(nulls_last=True), 'datetime'
+        )
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
-class ConsultationViewSet(viewsets.ModelViewSet):
+class ConsultationViewSet(IdempotencyMixin, ReplicaReadMixin, SparseFieldsetMixin, sync.SyncMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les consultations.
     Les patients ne peuvent voir que leurs propres consultations.
@@ -135,6 +256,7 @@ class ConsultationViewSet(viewsets.ModelViewSet):
     queryset = Consultation.objects.all()
     serializer_class = ConsultationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ('list', 'by_type')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['summary', 'diagnosis', 'patient__first_name', 'patient__last_name', 
                      'medecin__first_name', 'medecin__last_name']
@@ -221,7 +343,8 @@ class ConsultationViewSet(viewsets.ModelViewSet):
         Récupérer tous les messages d'une consultation spécifique.
         """
         consultation = self.get_object()
-        messages = Message.objects.filter(consultation=consultation).order_by('timestamp')
+        # Inclut les messages déplacés dans l'archive compressée (voir archive.py)
+        messages = consultation_messages(consultation)
         serializer = MessageSerializer(messages, many=True)
         return Response(serializer.data)
 
@@ -235,7 +358,7 @@ class ConsultationViewSet(viewsets.ModelViewSet):
         serializer = PrescriptionSerializer(prescriptions, many=True)
         return Response(serializer.data)
 
-class PrescriptionViewSet(viewsets.ModelViewSet):
+class PrescriptionViewSet(IdempotencyMixin, ReplicaReadMixin, SparseFieldsetMixin, sync.SyncMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les prescriptions.
     Les patients ne peuvent voir que leurs propres prescriptions.
@@ -312,6 +435,13 @@ class PrescriptionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Un médecin ne consulte que les prescriptions des patients de son équipe de soins
+        if request.user.role == 'medecin' and not is_in_care_team(request.user, patient_id):
+            return Response(
+                {"error": "Ce patient ne fait pas partie de vos patients."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
         queryset = self.get_queryset().filter(
             consultation__patient__id=patient_id
         ).order_by('-created_at')
@@ -319,7 +449,7 @@ class PrescriptionViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(IdempotencyMixin, ReplicaReadMixin, SparseFieldsetMixin, sync.SyncMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les messages.
     Les utilisateurs ne peuvent voir et modifier que les messages des consultations auxquelles ils participent.
@@ -401,18 +531,14 @@ class MessageViewSet(viewsets.ModelViewSet):
             )
         
         # Ne marquer comme lus que les messages envoyés par l'autre personne
-        if request.user == consultation.patient:
-            Message.objects.filter(
-                consultation=consultation,
-                sender=consultation.medecin,
-                is_read=False
-            ).update(is_read=True)
-        else:
-            Message.objects.filter(
-                consultation=consultation,
-                sender=consultation.patient,
-                is_read=False
-            ).update(is_read=True)
+        other = consultation.medecin if request.user == consultation.patient else consultation.patient
+        unread = Message.objects.filter(consultation=consultation, sender=other, is_read=False)
+        ids = list(unread.values_list('id', flat=True))
+        if ids:
+            Message.objects.filter(id__in=ids).update(is_read=True)
+            # update() n'envoie pas post_save : journaliser pour la synchronisation
+            sync.record_ids(Message, ids)
+            dashboards.invalidate(consultation.patient_id, consultation.medecin_id)
         
         return Response({"status": "Tous les messages ont été marqués comme lus."})
 
@@ -451,4 +577,121 @@ class MessageViewSet(viewsets.ModelViewSet):
         queryset = Message.objects.filter(consultation=consultation).order_by('timestamp')
         serializer = self.get_serializer(queryset, many=True)
         
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+class AvailabilityViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet pour consulter l'index des créneaux disponibles des médecins.
+    """
+    queryset = AvailabilitySlot.objects.all()
+    serializer_class = AvailabilitySlotSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """
+        Ne renvoyer que les créneaux à venir.
+        """
+        return AvailabilitySlot.objects.filter(
+            start__gte=timezone.now()
+        ).select_related('medecin').order_by('start')
+
+    @action(detail=False, methods=['get'])
+    def next_available(self, request):
+        """
+        Récupérer les créneaux les plus proches pour une spécialité, tous médecins confondus.
+        Paramètres : speciality (requis), start et end (ISO 8601, optionnels), limit (20 par défaut).
+        """
+        speciality = request.query_params.get('speciality')
+        if not speciality:
+            return Response(
+                {"error": "Le paramètre speciality est requis."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        window = {}
+        for param in ('start', 'end'):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    parsed = parse_datetime(value)
+                except ValueError:
+                    # Bien formée mais impossible (2026-02-30T10:00)
+                    parsed = None
+                if parsed is None:
+                    return Response(
+                        {"error": f"Format de date invalide pour {param}. Utilisez ISO 8601."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                if timezone.is_naive(parsed):
+                    parsed = timezone.make_aware(parsed)
+                window[param] = parsed
+        
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return Response(
+                {"error": "Le paramètre limit doit être un entier."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        slots = search_earliest_slots(speciality, limit=limit, **window)
+        serializer = self.get_serializer(slots, many=True)
+        return Response(serializer.data)
+
+
+class TriageQueueViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet pour la file de triage d'un médecin.
+    Les rendez-vous en attente sont ordonnés par score de triage (protocole du médecin et temps d'attente).
+    """
+    queryset = TriageQueueEntry.objects.all()
+    serializer_class = TriageQueueEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_medecin_id(self):
+        """
+        Un médecin consulte sa propre file, un administrateur choisit la file via ?medecin=.
+        """
+        user = self.request.user
+        if user.role == 'medecin':
+            return user.id
+        if user.is_staff or user.role == 'admin':
+            medecin_id = self.request.query_params.get('medecin')
+            if not medecin_id:
+                return None
+            try:
+                return uuid.UUID(medecin_id)
+            except ValueError:
+                raise serializers.ValidationError({"medecin": "Identifiant de médecin invalide."})
+        return None
+
+    def get_queryset(self):
+        medecin_id = self.get_medecin_id()
+        if not medecin_id:
+            return TriageQueueEntry.objects.none()
+        return triage.queue_for(medecin_id)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        medecin_id = self.get_medecin_id()
+        if medecin_id:
+            context['protocol'] = triage.get_protocol(medecin_id)
+        return context
+
+    @action(detail=False, methods=['post'])
+    def claim_next(self, request):
+        """
+        Prendre en charge le rendez-vous en tête de file : il est retiré de la file et confirmé.
+        """
+        medecin_id = self.get_medecin_id()
+        if not medecin_id:
+            return Response(
+                {"error": "Accès non autorisé."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        appointment = triage.claim_next(medecin_id)
+        if appointment is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        return Response(AppointmentSerializer(appointment).data)
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from .models import OutboxMessage, Notification, NotificationCounter, AppointmentReminder
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'channel', 'event', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('channel', 'status', 'event')
+    search_fields = ('recipient__email', 'event', 'last_error')
+    date_hierarchy = 'created_at'
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'type', 'title', 'is_read', 'created_at')
+    list_filter = ('type', 'is_read')
+    search_fields = ('recipient__email', 'title', 'message')
+    date_hierarchy = 'created_at'
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread_count')
+    search_fields = ('user__email',)
+
+@admin.register(AppointmentReminder)
+class AppointmentReminderAdmin(admin.ModelAdmin):
+    list_display = ('appointment', 'offset_minutes', 'created_at')
+    list_filter = ('offset_minutes',)
@@ -0,0 +1,96 @@
+"""
+Boîte de réception des notifications de l'application (fan-out à l'écriture).
+
+Chaque événement écrit une ligne ``Notification`` par destinataire et incrémente son
+``NotificationCounter`` dans la même transaction. Le fil se lit par l'index
+(recipient, -created_at, -id) avec une pagination par curseur, et le badge par une lecture
+du compteur sur sa clé primaire, sans ``COUNT(*)``.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Notification, NotificationCounter
+
+
+def build(recipient_id, type, title, message='', target=None):
+    """
+    ``target`` : instance de modèle (rendez-vous, consultation...) ouverte par la notification.
+    """
+    return Notification(
+        recipient_id=recipient_id,
+        type=type,
+        title=title,
+        message=message,
+        target_type=target._meta.model_name if target is not None else '',
+        target_id=str(target.pk) if target is not None else '',
+    )
+
+
+def _increment(counts):
+    """
+    Ajouter ``counts[user_id]`` au compteur de chaque utilisateur.
+    """
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in counts], ignore_conflicts=True
+    )
+    # Un UPDATE par valeur d'incrément distincte (le plus souvent une seule)
+    by_count = {}
+    for user_id, count in counts.items():
+        by_count.setdefault(count, []).append(user_id)
+    for count, user_ids in by_count.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread_count=F('unread_count') + count)
+
+
+def publish(notifications):
+    """
+    Enregistrer un lot de notifications et mettre à jour les compteurs des destinataires.
+    """
+    if not notifications:
+        return []
+
+    counts = {}
+    for notification in notifications:
+        counts[notification.recipient_id] = counts.get(notification.recipient_id, 0) + 1
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications, batch_size=500)
+        _increment(counts)
+    return notifications
+
+
+def unread_count(user_id):
+    return NotificationCounter.objects.filter(user_id=user_id).values_list('unread_count', flat=True).first() or 0
+
+
+def mark_read(user_id, ids=None):
+    """
+    Marquer comme lues les notifications ``ids`` de l'utilisateur (toutes si ``ids`` est None).
+    Renvoie le nombre de notifications passées à l'état lu.
+    """
+    with transaction.atomic():
+        # Verrouiller le compteur sérialise les marquages concurrents du même utilisateur
+        counter = NotificationCounter.objects.select_for_update().filter(user_id=user_id).first()
+
+        unread = Notification.objects.filter(recipient_id=user_id, is_read=False)
+        if ids is not None:
+            unread = unread.filter(id__in=ids)
+        updated = unread.update(is_read=True)
+
+        if counter is not None and updated:
+            counter.unread_count = max(counter.unread_count - updated, 0)
+            counter.save(update_fields=['unread_count'])
+    return updated
+
+
+def rebuild_counters():
+    """
+    Recalculer tous les compteurs à partir des notifications (réparation ponctuelle).
+    """
+    counts = dict(Notification.objects.filter(is_read=False).values('recipient_id').annotate(
+        total=Count('id')
+    ).values_list('recipient_id', 'total'))
+
+    with transaction.atomic():
+        NotificationCounter.objects.filter(unread_count__gt=0).update(unread_count=0)
+        _increment(counts)
+    return len(counts)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = "Envoie les notifications de la boîte d'envoi par lots, avec reprise des échecs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Messages verrouillés par lot.")
+        parser.add_argument('--workers', type=int, default=4, help="Envois simultanés au sein d'un lot.")
+        parser.add_argument('--interval', type=float, default=5, help="Pause (secondes) quand la boîte est vide.")
+        parser.add_argument('--once', action='store_true', help="Vider la boîte une fois puis s'arrêter.")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = process_batch(options['batch_size'], options['workers'])
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                self.stdout.write(f"{sent} envoyés, {failed} en échec.")
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Total : {total_sent} envoyés, {total_failed} en échec."))
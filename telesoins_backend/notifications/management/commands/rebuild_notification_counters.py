@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notifications.feed import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de notifications non lues à partir des notifications."
+
+    def handle(self, *args, **options):
+        count = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Compteurs recalculés ({count} utilisateurs avec des notifications non lues)."))
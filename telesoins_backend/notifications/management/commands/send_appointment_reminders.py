@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.reminders import schedule_reminders
+
+
+class Command(BaseCommand):
+    help = "Planifie les rappels des rendez-vous confirmés (envoyés ensuite par process_outbox)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Rendez-vous traités par lot.")
+        parser.add_argument('--interval', type=float, default=60, help="Pause (secondes) entre deux passages.")
+        parser.add_argument('--once', action='store_true', help="Faire un seul passage puis s'arrêter.")
+
+    def handle(self, *args, **options):
+        while True:
+            counts = schedule_reminders(batch_size=options['batch_size'])
+            total = sum(counts.values())
+            if total or options['once']:
+                details = ", ".join(f"{count} à {offset} min" for offset, count in counts.items())
+                self.stdout.write(self.style.SUCCESS(f"{total} rappels planifiés ({details})."))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
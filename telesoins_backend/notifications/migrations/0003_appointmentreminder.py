@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0005_appointment_appointment_status_dt_idx'),
+        ('notifications', '0002_notificationcounter_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset_minutes', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('appointment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='consultations.appointment')),
+            ],
+            options={
+                'verbose_name': 'Rappel de rendez-vous',
+                'verbose_name_plural': 'Rappels de rendez-vous',
+                'constraints': [models.UniqueConstraint(fields=('appointment', 'offset_minutes'), name='unique_appointment_reminder')],
+            },
+        ),
+    ]
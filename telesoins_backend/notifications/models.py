@@ -0,0 +1,113 @@
+from django.db import models
+from django.utils import timezone
+import uuid
+from accounts.models import User
+
+class OutboxMessage(models.Model):
+    """
+    Notification sortante (SMS, push) écrite dans la même transaction que l'événement qui la provoque,
+    puis envoyée par le worker ``process_outbox``.
+    """
+    CHANNEL_CHOICES = (
+        ('sms', 'SMS'),
+        ('push', 'Push'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'En attente'),
+        ('sent', 'Envoyé'),
+        ('failed', 'Échec'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='outbox_messages')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    event = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['next_attempt_at']
+        verbose_name = "Message sortant"
+        verbose_name_plural = "Messages sortants"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_channel_display()} {self.event} pour {self.recipient.email} ({self.get_status_display()})"
+
+
+class Notification(models.Model):
+    """
+    Notification de la boîte de réception de l'application, écrite au moment de l'événement
+    (une ligne par destinataire) pour que la lecture du fil soit un simple parcours d'index.
+    """
+    TYPE_CHOICES = (
+        ('appointment', 'Rendez-vous'),
+        ('message', 'Message'),
+        ('prescription', 'Ordonnance'),
+        ('urgent', 'Urgent'),
+        ('system', 'Système'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    type = models.CharField(max_length=15, choices=TYPE_CHOICES, default='system')
+    title = models.CharField(max_length=200)
+    message = models.TextField(blank=True)
+    target_type = models.CharField(max_length=30, blank=True)
+    target_id = models.CharField(max_length=64, blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = "Notification"
+        verbose_name_plural = "Notifications"
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_feed_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} pour {self.recipient.email}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Nombre de notifications non lues d'un utilisateur, tenu à jour à l'écriture :
+    le badge de l'application se lit par clé primaire.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Compteur de notifications"
+        verbose_name_plural = "Compteurs de notifications"
+    
+    def __str__(self):
+        return f"{self.user.email} : {self.unread_count} non lues"
+
+
+class AppointmentReminder(models.Model):
+    """
+    Rappel de rendez-vous déjà planifié : la contrainte d'unicité garantit qu'un rappel
+    n'est envoyé qu'une fois par rendez-vous et par délai.
+    """
+    appointment = models.ForeignKey('consultations.Appointment', on_delete=models.CASCADE, related_name='reminders')
+    offset_minutes = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Rappel de rendez-vous"
+        verbose_name_plural = "Rappels de rendez-vous"
+        constraints = [
+            models.UniqueConstraint(fields=['appointment', 'offset_minutes'], name='unique_appointment_reminder'),
+        ]
+    
+    def __str__(self):
+        return f"Rappel {self.offset_minutes} min avant {self.appointment_id}"
@@ -0,0 +1,102 @@
+"""
+Boîte d'envoi transactionnelle des notifications.
+
+Les messages sont insérés dans ``OutboxMessage`` en même temps que l'événement métier
+(voir ``notifications.signals``), puis envoyés par lots par ``process_outbox`` : chaque worker
+verrouille un lot avec ``SELECT ... FOR UPDATE SKIP LOCKED``, envoie ses messages en parallèle
+et replanifie les échecs avec un délai exponentiel.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .transports import TransportError, get_transport
+
+MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+RETRY_BASE_SECONDS = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 30)
+
+
+def build(recipient_id, channel, event, payload):
+    return OutboxMessage(
+        recipient_id=recipient_id,
+        channel=channel,
+        event=event,
+        payload=payload,
+        next_attempt_at=timezone.now(),
+    )
+
+
+def enqueue(recipient_id, channel, event, payload):
+    message = build(recipient_id, channel, event, payload)
+    message.save()
+    return message
+
+
+def enqueue_many(messages):
+    return OutboxMessage.objects.bulk_create(messages, batch_size=500)
+
+
+def retry_delay(attempts):
+    """
+    Délai exponentiel avec gigue : 30 s, 1 min, 2 min, 4 min...
+    """
+    delay = RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(1.0, 1.2))
+
+
+def _deliver(message):
+    try:
+        get_transport(message.channel).send(message)
+    except TransportError as exc:
+        return str(exc) or exc.__class__.__name__
+    except Exception as exc:  # un transport défaillant ne doit pas arrêter le worker
+        return f"{exc.__class__.__name__}: {exc}"
+    return None
+
+
+def process_batch(batch_size=100, workers=4):
+    """
+    Envoyer un lot de messages dus. Renvoie (envoyés, en échec).
+    """
+    now = timezone.now()
+    sent = failed = 0
+
+    with transaction.atomic():
+        batch = list(OutboxMessage.objects.select_for_update(
+            skip_locked=True, of=('self',)
+        ).filter(
+            status='pending', next_attempt_at__lte=now
+        ).select_related('recipient').order_by('next_attempt_at')[:batch_size])
+
+        if not batch:
+            return 0, 0
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            errors = list(executor.map(_deliver, batch))
+
+        now = timezone.now()
+        for message, error in zip(batch, errors):
+            message.attempts += 1
+            if error is None:
+                message.status = 'sent'
+                message.sent_at = now
+                message.last_error = ''
+                sent += 1
+            else:
+                message.last_error = error
+                if message.attempts >= MAX_ATTEMPTS:
+                    message.status = 'failed'
+                else:
+                    message.next_attempt_at = now + retry_delay(message.attempts)
+                failed += 1
+
+        OutboxMessage.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+
+    return sent, failed
@@ -0,0 +1,110 @@
+"""
+Rappels des rendez-vous confirmés.
+
+Pour chaque délai de ``APPOINTMENT_REMINDER_OFFSETS`` (en minutes avant le rendez-vous),
+``schedule_reminders`` ne lit que la fenêtre ]maintenant + délai - rattrapage, maintenant + délai],
+découpée en tranches de ``BUCKET_MINUTES`` et parcourue par lots sur l'index (status, datetime).
+La fenêtre de rattrapage couvre un arrêt du planificateur : un rendez-vous dont l'instant de
+rappel est dépassé depuis plus longtemps ne reçoit que les rappels suivants.
+
+Chaque rappel planifié est enregistré dans ``AppointmentReminder`` (unique par rendez-vous et
+délai) dans la même transaction que le message sortant et la notification : un rappel n'est
+envoyé qu'une fois, même si plusieurs planificateurs tournent en même temps.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from consultations.models import Appointment
+from . import feed
+from .models import AppointmentReminder
+from .outbox import build, enqueue_many
+
+logger = logging.getLogger(__name__)
+
+OFFSETS = getattr(settings, 'APPOINTMENT_REMINDER_OFFSETS', [24 * 60, 60])
+LOOKBACK_MINUTES = getattr(settings, 'APPOINTMENT_REMINDER_LOOKBACK_MINUTES', 60)
+BUCKET_MINUTES = getattr(settings, 'APPOINTMENT_REMINDER_BUCKET_MINUTES', 15)
+BATCH_SIZE = 500
+
+
+def _describe_offset(minutes):
+    if minutes % (24 * 60) == 0:
+        days = minutes // (24 * 60)
+        return "demain" if days == 1 else f"dans {days} jours"
+    if minutes % 60 == 0:
+        return f"dans {minutes // 60} h"
+    return f"dans {minutes} min"
+
+
+def _reminder(appointment, offset):
+    title = "Rappel de rendez-vous"
+    body = (
+        f"Rendez-vous {_describe_offset(offset)} avec Dr {appointment.medecin.get_full_name()}, "
+        f"le {timezone.localtime(appointment.datetime):%d/%m/%Y à %H:%M}."
+    )
+    channel = 'sms' if appointment.patient.phone_number else 'push'
+    return (
+        AppointmentReminder(appointment=appointment, offset_minutes=offset),
+        build(appointment.patient_id, channel, 'appointment_reminder', {
+            'appointment': str(appointment.id), 'offset_minutes': offset, 'title': title, 'body': body,
+        }),
+        feed.build(appointment.patient_id, 'appointment', title, body, appointment),
+    )
+
+
+def schedule_bucket(offset, start, end, batch_size=BATCH_SIZE):
+    """
+    Planifier le rappel ``offset`` des rendez-vous confirmés de ]start, end] qui ne l'ont pas encore reçu.
+    """
+    scheduled = 0
+    last = None
+    while True:
+        appointments = Appointment.objects.filter(
+            status='confirmed', datetime__gt=start, datetime__lte=end
+        ).exclude(
+            reminders__offset_minutes=offset
+        ).select_related('patient', 'medecin').order_by('datetime', 'id')
+        if last is not None:
+            appointments = appointments.filter(Q(datetime__gt=last[0]) | Q(datetime=last[0], id__gt=last[1]))
+
+        chunk = list(appointments[:batch_size])
+        if not chunk:
+            return scheduled
+        last = (chunk[-1].datetime, chunk[-1].id)
+
+        rows = [_reminder(appointment, offset) for appointment in chunk]
+        try:
+            with transaction.atomic():
+                AppointmentReminder.objects.bulk_create([reminder for reminder, _, _ in rows])
+                enqueue_many([outgoing for _, outgoing, _ in rows])
+                feed.publish([notification for _, _, notification in rows])
+        except IntegrityError:
+            # Un autre planificateur a traité ces rendez-vous en même temps : rien n'a été écrit
+            logger.info("Rappels %s min déjà planifiés entre %s et %s", offset, chunk[0].datetime, last[0])
+            continue
+        scheduled += len(rows)
+
+
+def schedule_reminders(now=None, batch_size=BATCH_SIZE):
+    """
+    Planifier tous les rappels dus. Renvoie {délai en minutes: rappels planifiés}.
+    """
+    now = now or timezone.now()
+    bucket = timedelta(minutes=BUCKET_MINUTES)
+    counts = {}
+
+    for offset in OFFSETS:
+        end = now + timedelta(minutes=offset)
+        start = max(now, end - timedelta(minutes=LOOKBACK_MINUTES))
+        counts[offset] = 0
+        while start < end:
+            bucket_end = min(start + bucket, end)
+            counts[offset] += schedule_bucket(offset, start, bucket_end, batch_size)
+            start = bucket_end
+
+    return counts
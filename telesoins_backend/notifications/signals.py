@@ -0,0 +1,120 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from consultations.models import Appointment, Consultation, Prescription, Message
+from consultations.signals import (
+    appointments_bulk_created, appointments_bulk_status_changed, consultations_bulk_closed
+)
+from . import feed
+from .outbox import build, enqueue, enqueue_many
+
+# Les messages sortants et les notifications de l'application sont écrits dans la transaction
+# de l'événement (celle de la vue avec ATOMIC_REQUESTS, ou le bloc atomic des traitements par lot) :
+# ils n'existent que si celle-ci est validée, et le worker d'envoi peut être arrêté sans perte.
+
+def _when(appointment):
+    return f"{timezone.localtime(appointment.datetime):%d/%m/%Y à %H:%M}"
+
+def _appointment_request(appointment):
+    title = "Nouvelle demande de rendez-vous"
+    body = f"Rendez-vous demandé pour le {_when(appointment)}."
+    notification_type = 'urgent' if appointment.is_urgent else 'appointment'
+    return (
+        build(appointment.medecin_id, 'push', 'appointment_requested', {
+            'appointment': str(appointment.id), 'title': title, 'body': body,
+        }),
+        feed.build(appointment.medecin_id, notification_type, title, body, appointment),
+    )
+
+def _appointment_status(appointment, status):
+    label = dict(Appointment.STATUS_CHOICES).get(status, status)
+    title = "Rendez-vous mis à jour"
+    body = f"Votre rendez-vous du {_when(appointment)} est : {label}."
+    return (
+        build(appointment.patient_id, 'push', 'appointment_status_changed', {
+            'appointment': str(appointment.id), 'status': status, 'title': title, 'body': body,
+        }),
+        feed.build(appointment.patient_id, 'appointment', title, body, appointment),
+    )
+
+@receiver(post_init, sender=Appointment)
+def remember_appointment_status(sender, instance, **kwargs):
+    instance._notified_status = instance.status
+
+@receiver(post_save, sender=Appointment)
+def notify_appointment_change(sender, instance, created, **kwargs):
+    if created:
+        outgoing, notification = _appointment_request(instance)
+    elif instance.status != instance._notified_status:
+        outgoing, notification = _appointment_status(instance, instance.status)
+    else:
+        return
+    instance._notified_status = instance.status
+    outgoing.save()
+    feed.publish([notification])
+
+@receiver(appointments_bulk_created)
+def notify_bulk_appointment_requests(sender, appointments, **kwargs):
+    pairs = [_appointment_request(appointment) for appointment in appointments]
+    enqueue_many([outgoing for outgoing, _ in pairs])
+    feed.publish([notification for _, notification in pairs])
+
+@receiver(appointments_bulk_status_changed)
+def notify_bulk_status_change(sender, appointment_ids, status, **kwargs):
+    # Instances complètes : le post_init qui mémorise le statut lirait un champ différé par ligne
+    appointments = Appointment.objects.filter(id__in=appointment_ids)
+    pairs = [_appointment_status(appointment, status) for appointment in appointments]
+    enqueue_many([outgoing for outgoing, _ in pairs])
+    feed.publish([notification for _, notification in pairs])
+
+def _consultation_closed(consultation):
+    return feed.build(consultation.patient_id, 'system', "Consultation terminée",
+                      "Le résumé de votre consultation est disponible.", consultation)
+
+@receiver(post_init, sender=Consultation)
+def remember_consultation_end(sender, instance, **kwargs):
+    instance._notified_end_time = instance.end_time
+
+@receiver(post_save, sender=Consultation)
+def notify_consultation_change(sender, instance, created, **kwargs):
+    if created:
+        notification = feed.build(instance.patient_id, 'system', "Consultation ouverte",
+                                  f"Votre consultation ({instance.get_type_display()}) a commencé.", instance)
+    elif instance.end_time and not instance._notified_end_time:
+        notification = _consultation_closed(instance)
+    else:
+        return
+    instance._notified_end_time = instance.end_time
+    feed.publish([notification])
+
+@receiver(consultations_bulk_closed)
+def notify_bulk_consultation_close(sender, consultation_ids, **kwargs):
+    consultations = Consultation.objects.filter(id__in=consultation_ids)
+    feed.publish([_consultation_closed(consultation) for consultation in consultations])
+
+@receiver(post_save, sender=Prescription)
+def notify_new_prescription(sender, instance, created, **kwargs):
+    if created:
+        patient_id = Consultation.objects.filter(pk=instance.consultation_id).values_list('patient_id', flat=True).first()
+        feed.publish([feed.build(patient_id, 'prescription', "Nouvelle ordonnance",
+                                 "Une ordonnance a été ajoutée à votre dossier.", instance)])
+
+@receiver(post_save, sender=Message)
+def notify_new_message(sender, instance, created, **kwargs):
+    if not created:
+        return
+    consultation = instance.consultation
+    if instance.sender_id == consultation.patient_id:
+        recipient = consultation.medecin
+    else:
+        recipient = consultation.patient
+
+    # Les consultations par SMS sont notifiées par SMS si le destinataire a un numéro
+    channel = 'sms' if consultation.type == 'sms' and recipient.phone_number else 'push'
+    enqueue(recipient.id, channel, 'new_message', {
+        'consultation': str(consultation.id),
+        'message': str(instance.id),
+        'title': "Nouveau message",
+        'body': instance.content[:160],
+    })
+    feed.publish([feed.build(recipient.id, 'message', "Nouveau message", instance.content[:160], consultation)])
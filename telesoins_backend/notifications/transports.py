@@ -0,0 +1,87 @@
+"""
+Transports des notifications sortantes.
+
+Le transport de chaque canal est choisi par ``settings.NOTIFICATION_TRANSPORTS``, sur le modèle
+des backends d'email de Django. Les transports fournis sont des substituts locaux
+(console, fichier, mémoire) en attendant le branchement d'un fournisseur SMS ou push.
+"""
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSPORTS = {
+    'sms': 'notifications.transports.ConsoleTransport',
+    'push': 'notifications.transports.ConsoleTransport',
+}
+
+
+class TransportError(Exception):
+    """
+    Échec d'envoi ; le message sera retenté plus tard.
+    """
+
+
+class BaseTransport:
+    def send(self, message):
+        """
+        Envoyer un ``OutboxMessage`` (destinataire préchargé). Lever ``TransportError`` en cas d'échec.
+        Appelée depuis plusieurs threads : ne pas accéder à la base de données.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def serialize(message):
+        return {
+            'id': str(message.id),
+            'channel': message.channel,
+            'event': message.event,
+            'to': message.recipient.phone_number if message.channel == 'sms' else str(message.recipient_id),
+            'payload': message.payload,
+            'sent_at': timezone.now().isoformat(),
+        }
+
+
+class ConsoleTransport(BaseTransport):
+    def send(self, message):
+        logger.info("Notification %s", json.dumps(self.serialize(message), ensure_ascii=False))
+
+
+class FileTransport(BaseTransport):
+    """
+    Ajoute chaque notification, une par ligne JSON, au fichier ``NOTIFICATION_FILE_PATH``.
+    """
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.path = getattr(settings, 'NOTIFICATION_FILE_PATH', 'notifications.log')
+
+    def send(self, message):
+        line = json.dumps(self.serialize(message), ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as fileobj:
+            fileobj.write(line + '\n')
+
+
+class LocMemTransport(BaseTransport):
+    """
+    Conserve les notifications envoyées dans ``LocMemTransport.outbox`` (pour les tests).
+    """
+    outbox = []
+
+    def send(self, message):
+        self.outbox.append(self.serialize(message))
+
+
+_transports = {}
+
+
+def get_transport(channel):
+    if channel not in _transports:
+        paths = {**DEFAULT_TRANSPORTS, **getattr(settings, 'NOTIFICATION_TRANSPORTS', {})}
+        _transports[channel] = import_string(paths[channel])()
+    return _transports[channel]
@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views
+
+router = DefaultRouter()
+router.register(r'', views.NotificationViewSet, basename='notification')
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,81 @@
+from django.core.exceptions import ValidationError
+from rest_framework import viewsets, mixins, permissions, status
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from .models import Notification
+from . import feed
+from api.serializers import NotificationSerializer
+
+
+class NotificationPagination(CursorPagination):
+    """
+    Pagination par curseur sur l'index (recipient, -created_at, -id) : le coût d'une page
+    ne dépend pas de sa position dans le fil, contrairement à un OFFSET.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'unread_count': feed.unread_count(self.request.user.id),
+            'notifications': data,
+        })
+
+
+class NotificationViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    ViewSet pour la boîte de réception des notifications de l'utilisateur connecté.
+    """
+    queryset = Notification.objects.all()
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """
+        Marquer une notification comme lue.
+        """
+        notification = self.get_object()
+        feed.mark_read(request.user.id, [notification.id])
+        return Response({'unread_count': feed.unread_count(request.user.id)})
+
+    @action(detail=False, methods=['post'], url_path='read-all')
+    def read_all(self, request):
+        """
+        Marquer comme lues toutes les notifications, ou seulement celles listées dans "ids".
+        """
+        ids = request.data.get('ids')
+        if ids is not None and not isinstance(ids, list):
+            return Response(
+                {"error": "Le champ 'ids' doit être une liste d'identifiants."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            updated = feed.mark_read(request.user.id, ids)
+        except ValidationError:
+            return Response(
+                {"error": "Identifiant de notification invalide."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'updated': updated, 'unread_count': feed.unread_count(request.user.id)})
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """
+        Nombre de notifications non lues (badge), lu sur le compteur de l'utilisateur.
+        """
+        return Response({'unread_count': feed.unread_count(request.user.id)})
@@ -12,8 +12,11 @@ from api.serializers import (
     UserQuizResultSerializer
 )
 from api.permissions import IsAuthenticated
+from telesoins_backend.db_router import ReplicaReadMixin
+from api.mixins import SparseFieldsetMixin
+from api.idempotency import IdempotencyMixin
 
-class FirstAidModuleViewSet(viewsets.ReadOnlyModelViewSet):
+class FirstAidModuleViewSet(ReplicaReadMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet pour consulter les modules de premiers secours.
     Seuls les modules publiés sont accessibles.
@@ -80,7 +83,7 @@ class FirstAidModuleViewSet(viewsets.ReadOnlyModelViewSet):
         
         return Response(result)
 
-class FirstAidContentViewSet(viewsets.ReadOnlyModelViewSet):
+class FirstAidContentViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet pour consulter les contenus des modules de premiers secours.
     """
@@ -143,7 +146,7 @@ class FirstAidContentViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(contents, many=True)
         return Response(serializer.data)
 
-class QuizViewSet(viewsets.ReadOnlyModelViewSet):
+class QuizViewSet(IdempotencyMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet pour consulter les quiz des modules de premiers secours.
     """
@@ -262,7 +265,7 @@ class QuizViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(quizzes, many=True)
         return Response(serializer.data)
 
-class UserQuizResultViewSet(viewsets.ReadOnlyModelViewSet):
+class UserQuizResultViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet pour consulter les résultats de quiz des utilisateurs.
     Un utilisateur ne peut voir que ses propres résultats.
@@ -0,0 +1,168 @@
+"""
+Routage des lectures vers la réplique en lecture seule.
+
+Par défaut, toutes les requêtes SQL vont sur ``default`` (primaire). Les vues de lecture
+désignées (statistiques, rapports, grandes listes) lisent sur l'alias
+``DATABASE_REPLICA_ALIAS`` quand il est défini dans ``DATABASES`` :
+
+* vues fonctions : décorateur ``replica_reads`` ;
+* ViewSets DRF : ``ReplicaReadMixin`` (actions ``replica_actions``, en GET uniquement).
+
+Lecture de ses propres écritures : après une requête qui écrit (méthode non sûre ou écriture
+routée vers le primaire), l'utilisateur est épinglé au primaire pendant
+``DATABASE_REPLICA_PIN_SECONDS`` secondes, le temps que la réplique rattrape son retard.
+L'épinglage est conservé dans le cache Django (partagé entre processus si ``CACHES`` l'est).
+
+Les écritures vont toujours sur le primaire. Pour tester en local, déclarer un second alias
+(même base ou copie SQLite) avec ``'TEST': {'MIRROR': 'default'}``.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_ALIAS = getattr(settings, 'DATABASE_REPLICA_ALIAS', 'replica')
+PIN_SECONDS = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10)
+
+# État de la requête en cours : {'replica': bool, 'wrote': bool}
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def pin_cache_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    cache.set(pin_cache_key(user_id), True, PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(pin_cache_key(user_id)))
+
+
+@contextmanager
+def use_replica(user=None):
+    """
+    Lire sur la réplique dans ce bloc, sauf si l'utilisateur vient d'écrire.
+    """
+    state = _state.get()
+    pinned = user is not None and user.is_authenticated and is_pinned(user.pk)
+    if state is None or pinned or not replica_configured():
+        yield
+        return
+
+    previous = state['replica']
+    state['replica'] = True
+    try:
+        yield
+    finally:
+        state['replica'] = previous
+
+
+def replica_reads(view):
+    """
+    Décorateur de vue fonction : les requêtes GET/HEAD lisent sur la réplique.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        with use_replica(request.user):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet DRF dont les actions ``replica_actions`` lisent sur la réplique en GET.
+    L'utilisateur n'est connu qu'après l'authentification DRF, d'où le passage par ``initial``.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and getattr(self, 'action', None) in self.replica_actions:
+            self._replica = use_replica(request.user)
+            self._replica.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica = getattr(self, '_replica', None)
+        if replica is not None:
+            self._replica = None
+            replica.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Lectures sur la réplique uniquement dans un bloc ``use_replica`` ; écritures sur le primaire.
+    """
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state['replica'] and not state['wrote']:
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les deux alias contiennent les mêmes données
+        return True
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Initialise l'état de routage de chaque requête et épingle au primaire l'utilisateur
+    qui vient d'écrire. Utilisable tel quel sous ASGI, devant les vues asynchrones.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = {'replica': False, 'wrote': False}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        self.pin_if_wrote(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = {'replica': False, 'wrote': False}
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        # request.user peut être un objet paresseux qui interroge la base
+        await sync_to_async(self.pin_if_wrote)(request, state)
+        return response
+
+    @staticmethod
+    def pin_if_wrote(request, state):
+        user = getattr(request, 'user', None)
+        if (state['wrote'] or request.method not in SAFE_METHODS) and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
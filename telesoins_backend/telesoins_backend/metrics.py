@@ -0,0 +1,291 @@
+"""
+Métriques par vue au format Prometheus : ``GET /metrics/``.
+
+``MetricsMiddleware`` mesure chaque requête et l'attribue à sa vue :
+
+* vues DRF : classe et action, lues sur la vue attachée à la réponse par DRF
+  (``response.renderer_context['view']``), par exemple ``AppointmentViewSet.list`` ;
+* autres vues : nom de la route (``admin_interface:statistics``) ou classe de la vue ;
+* URL inconnues : ``unmatched``, pour ne pas créer une série par URL.
+
+Séries exportées (préfixe ``telesoins_``) :
+
+* ``http_requests_total{view, method, status}`` ;
+* ``http_request_duration_seconds{view, method}`` : histogramme des latences ;
+* ``http_response_size_bytes{view, method}`` : histogramme des tailles de réponse ;
+* ``db_queries_per_request{view, method}`` et ``db_duration_seconds{view, method}`` :
+  nombre de requêtes SQL et temps passé en base par requête HTTP. Les requêtes SQL sont comptées
+  par un ``execute_wrapper`` posé sur chaque connexion à son ouverture ; les threads lancés par
+  ``sync_to_async`` (rubriques parallèles de api/bootstrap.py) partagent le contexte de la requête ;
+* ``dashboard_cache_hits_total`` / ``dashboard_cache_misses_total`` (api/dashboards.py).
+
+Plusieurs processus : chaque processus agrège en mémoire et écrit ses totaux toutes les
+``METRICS_FLUSH_SECONDS`` secondes dans ``METRICS_DIR/metrics-<pid>.json`` ; l'export additionne
+les fichiers de tous les processus. Les totaux des processus arrêtés restent comptés, comme le fait
+le mode multi-processus de prometheus_client : vider le répertoire à chaque déploiement.
+Sans ``METRICS_DIR``, l'export ne couvre que le processus qui répond.
+
+L'export est réservé au personnel, ou au collecteur qui présente ``Authorization: Bearer <METRICS_TOKEN>``.
+"""
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+METRICS_DIR = getattr(settings, 'METRICS_DIR', None)
+FLUSH_SECONDS = getattr(settings, 'METRICS_FLUSH_SECONDS', 5)
+TOKEN = getattr(settings, 'METRICS_TOKEN', None)
+
+PREFIX = 'telesoins_'
+
+# Nom -> (type, aide, bornes des histogrammes)
+METRICS = {
+    'http_requests_total': ('counter', "Requêtes HTTP traitées.", None),
+    'http_request_duration_seconds': (
+        'histogram', "Durée de traitement des requêtes HTTP.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'http_response_size_bytes': (
+        'histogram', "Taille du corps des réponses HTTP.",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576),
+    ),
+    'db_queries_per_request': (
+        'histogram', "Requêtes SQL exécutées par requête HTTP.",
+        (0, 1, 2, 5, 10, 20, 50, 100),
+    ),
+    'db_duration_seconds': (
+        'histogram', "Temps passé en base par requête HTTP.",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    ),
+}
+
+# Requêtes SQL de la requête HTTP en cours : liste de durées (list.append est sûr entre threads)
+_queries = ContextVar('metrics_queries', default=None)
+
+# (nom, libellés) -> valeur du compteur, ou [comptes par borne..., somme, total] pour un histogramme
+_series = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    queries = _queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.append(time.perf_counter() - start)
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    # connection_created est émis à chaque reconnexion du même objet connexion
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+def _observe(name, labels, value):
+    buckets = METRICS[name][2]
+    series = _series.get((name, labels))
+    if series is None:
+        series = _series[(name, labels)] = [0] * (len(buckets) + 2)
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            series[i] += 1
+            break
+    series[-2] += value
+    series[-1] += 1
+
+
+def record(view, method, status, duration, size, queries):
+    """
+    Enregistre une requête HTTP ; ``size`` vaut None si la taille n'est pas connue (streaming).
+    """
+    global _last_flush
+    labels = (('view', view), ('method', method))
+    with _lock:
+        key = ('http_requests_total', labels + (('status', str(status)),))
+        _series[key] = _series.get(key, 0) + 1
+        _observe('http_request_duration_seconds', labels, duration)
+        if size is not None:
+            _observe('http_response_size_bytes', labels, size)
+        _observe('db_queries_per_request', labels, len(queries))
+        _observe('db_duration_seconds', labels, sum(queries))
+
+        due = METRICS_DIR and time.monotonic() - _last_flush >= FLUSH_SECONDS
+        if due:
+            _last_flush = time.monotonic()
+    if due:
+        flush()
+
+
+def flush():
+    """
+    Écrit les totaux du processus dans METRICS_DIR (remplacement atomique du fichier).
+    """
+    with _lock:
+        data = [[name, list(labels), value] for (name, labels), value in _series.items()]
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f'metrics-{os.getpid()}.json')
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def collect():
+    """
+    Totaux de tous les processus (ou du seul processus courant sans METRICS_DIR).
+    """
+    if not METRICS_DIR:
+        with _lock:
+            return {key: value if isinstance(value, (int, float)) else list(value) for key, value in _series.items()}
+
+    flush()
+    merged = {}
+    for filename in os.listdir(METRICS_DIR):
+        if not (filename.startswith('metrics-') and filename.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # Fichier en cours de remplacement ou illisible : ignoré pour cet export
+            continue
+        for name, labels, value in data:
+            key = (name, tuple(tuple(label) for label in labels))
+            if isinstance(value, list):
+                current = merged.setdefault(key, [0] * len(value))
+                merged[key] = [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def exposition(series):
+    """
+    Texte au format d'exposition Prometheus (version 0.0.4).
+    """
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {PREFIX}{name} {help_text}')
+        lines.append(f'# TYPE {PREFIX}{name} {kind}')
+        for (series_name, labels), value in sorted(series.items()):
+            if series_name != name:
+                continue
+            if kind == 'counter':
+                lines.append(f'{PREFIX}{name}{_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f'{PREFIX}{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{PREFIX}{name}_bucket{_labels(labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{PREFIX}{name}_sum{_labels(labels)} {value[-2]}')
+            lines.append(f'{PREFIX}{name}_count{_labels(labels)} {value[-1]}')
+
+    # Compteurs déjà partagés par le cache : lus tels quels
+    from api.dashboards import cache_stats
+    stats = cache_stats()
+    for name in ('hits', 'misses'):
+        lines.append(f'# TYPE {PREFIX}dashboard_cache_{name}_total counter')
+        lines.append(f'{PREFIX}dashboard_cache_{name}_total {stats[name]}')
+    return '\n'.join(lines) + '\n'
+
+
+def view_label(request, response):
+    drf_view = (getattr(response, 'renderer_context', None) or {}).get('view')
+    if drf_view is not None:
+        action = getattr(drf_view, 'action', None)
+        name = drf_view.__class__.__name__
+        return f'{name}.{action}' if action else name
+
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    if match.url_name:
+        return match.view_name
+    view_class = getattr(match.func, 'view_class', None)
+    return view_class.__name__ if view_class else match._func_path
+
+
+def response_size(response):
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length else None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Mesure chaque requête (à placer en tête de MIDDLEWARE). Utilisable sous ASGI, comme
+    ``DatabaseRoutingMiddleware``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_sql_wrapper, dispatch_uid='metrics_sql_wrapper')
+        # Connexions déjà ouvertes par ce thread (commandes de gestion, tests)
+        for connection in connections.all(initialized_only=True):
+            install_sql_wrapper(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = []
+        token = _queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = []
+        token = _queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    @staticmethod
+    def record(request, response, duration, queries):
+        record(view_label(request, response), request.method, response.status_code,
+               duration, response_size(response), queries)
+
+
+def metrics_view(request):
+    authorization = request.headers.get('Authorization', '')
+    allowed = TOKEN and constant_time_compare(authorization, f'Bearer {TOKEN}')
+    if not allowed and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse("Accès réservé au personnel.", status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(exposition(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
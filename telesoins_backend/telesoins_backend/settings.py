@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,18 +52,24 @@ INSTALLED_APPS = [
     'premiers_secours',
     'api',
     'admin_interface',
+    'notifications',
     'rest_framework_simplejwt',
 ]
 
 MIDDLEWARE = [
+    'api.slow_queries.SlowQueryMiddleware',
+    'telesoins_backend.metrics.MetricsMiddleware',
+    'telesoins_backend.tracing.TracingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'telesoins_backend.db_router.DatabaseRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'telesoins_backend.urls'
@@ -94,9 +104,44 @@ DATABASES = {
         'PASSWORD': 'password',  # À modifier
         'HOST': 'localhost',
         'PORT': '5432',
+        # Chaque vue dans une transaction : l'objet enregistré et les messages sortants écrits
+        # par ses signaux (notifications/signals.py) sont validés ou annulés ensemble
+        'ATOMIC_REQUESTS': True,
     }
 }
 
+# Réplique en lecture seule (facultative) pour les rapports et les grandes listes,
+# voir telesoins_backend/db_router.py
+if os.environ.get('DATABASE_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DATABASE_REPLICA_HOST'],
+        'PORT': os.environ.get('DATABASE_REPLICA_PORT', DATABASES['default']['PORT']),
+        'ATOMIC_REQUESTS': False,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['telesoins_backend.db_router.ReplicaRouter']
+DATABASE_REPLICA_ALIAS = 'replica'
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+# Cache : mémoire locale du processus par défaut, Redis partagé entre processus si REDIS_URL est défini
+# (authentification, épinglage au primaire, tableaux de bord)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'telesoins',
+        }
+    }
+
 # User model personnalisé
 AUTH_USER_MODEL = 'accounts.User'
 # Password validation
@@ -148,7 +193,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -159,13 +205,121 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
 
+# MessagePack (application/msgpack) pour l'application mobile, si la bibliothèque est installée
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'api.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(1, 'api.renderers.MessagePackParser')
+
+# JWT (chemin d'authentification sans état)
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+}
+
+# Cache des utilisateurs authentifiés (voir accounts/authentication.py)
+AUTH_CACHE = {
+    'LOCAL_MAXSIZE': 1024,  # entrées du cache LRU de chaque processus
+    'LOCAL_TTL': 10,        # secondes
+    'SHARED_TTL': 300,      # secondes, dans CACHES['default']
+}
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:8080",
     "http://localhost:3000",
 ]
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'x-profile')
+
+# Index des créneaux disponibles des médecins
+AVAILABILITY_SLOT_MINUTES = 30
+AVAILABILITY_HORIZON_DAYS = 14
+AVAILABILITY_SLOTS_PER_MEDECIN = 20
+
+# Nombre maximal de rendez-vous créés par lot (voir consultations/batch.py)
+APPOINTMENT_BATCH_MAX_SIZE = 500
+
+# Notifications sortantes (voir notifications/outbox.py)
+# Remplacer les substituts locaux par les transports du fournisseur SMS / push en production
+NOTIFICATION_TRANSPORTS = {
+    'sms': 'notifications.transports.ConsoleTransport',
+    'push': 'notifications.transports.ConsoleTransport',
+}
+NOTIFICATION_FILE_PATH = BASE_DIR / 'notifications.log'
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 30
+
+# Rappels de rendez-vous (voir notifications/reminders.py) : délais en minutes avant le rendez-vous
+APPOINTMENT_REMINDER_OFFSETS = [24 * 60, 60]
+APPOINTMENT_REMINDER_LOOKBACK_MINUTES = 60
+APPOINTMENT_REMINDER_BUCKET_MINUTES = 15
+
+# Nettoyage des rendez-vous et consultations abandonnés (voir consultations/lifecycle.py)
+APPOINTMENT_PENDING_EXPIRY_MINUTES = 60
+CONSULTATION_IDLE_CLOSE_HOURS = 24
+LIFECYCLE_SWEEP_CHUNK_SIZE = 500
+
+# Messages : partitions mensuelles préparées à l'avance et archivage des consultations closes
+# (voir consultations/partitions.py et consultations/archive.py)
+MESSAGE_PARTITION_MONTHS_AHEAD = 3
+MESSAGE_ARCHIVE_RETENTION_DAYS = 180
+
+# Synchronisation incrémentale des applications mobiles (voir consultations/sync.py)
+SYNC_CHANGE_RETENTION_DAYS = 30
+SYNC_SETTLE_SECONDS = 5
+SYNC_PAGE_SIZE = 500
+
+# File d'écritures hors ligne rejouée en un appel (voir api/offline.py)
+OFFLINE_BATCH_MAX_SIZE = 100
+
+# En-tête Idempotency-Key des POST/PUT : durée de rejeu des réponses (voir api/idempotency.py)
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+
+# Démarrage de l'application mobile : rubriques calculées en parallèle, une connexion par
+# rubrique. Seulement avec des connexions persistantes (CONN_MAX_AGE) ou un pool (voir api/bootstrap.py)
+BOOTSTRAP_PARALLEL = False
+
+# Durée maximale de mise en cache d'un tableau de bord, en secondes (voir api/dashboards.py)
+DASHBOARD_CACHE_TTL = 300
+
+# Calcul unique des valeurs coûteuses demandées en même temps (voir telesoins_backend/singleflight.py)
+SINGLE_FLIGHT_LOCK_SECONDS = 30
+SINGLE_FLIGHT_WAIT_SECONDS = 15
+
+# Durée de mise en cache des statistiques et rapports de l'interface d'administration, en secondes
+ADMIN_STATISTICS_CACHE_SECONDS = 60
+
+# Métriques Prometheus (voir telesoins_backend/metrics.py) : répertoire partagé par les processus,
+# à vider à chaque déploiement ; jeton du collecteur (Authorization: Bearer <jeton>)
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_SECONDS = 5
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Traces des requêtes (voir telesoins_backend/tracing.py) : export OTLP/JSON 'console' ou 'file',
+# désactivé si TRACING_EXPORTER n'est pas défini ; part des requêtes tracées sans en-tête traceparent
+TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER')
+TRACING_FILE = BASE_DIR / 'traces.jsonl'
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0.01))
+TRACING_MAX_SPANS = 1000
+
+# Profilage à la demande par le personnel (voir api/profiling.py) : profils conservés
+PROFILING_KEEP = 100
+
+# Requêtes SQL lentes (voir api/slow_queries.py) : seuil, part des plans capturés, lignes conservées
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+SLOW_QUERY_KEEP = 500
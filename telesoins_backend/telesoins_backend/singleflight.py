@@ -0,0 +1,111 @@
+"""
+Calcul unique (« single flight ») des valeurs coûteuses demandées en même temps.
+
+Quand plusieurs requêtes demandent la même valeur absente du cache (statistiques ouvertes par
+tous les administrateurs en début de journée, tableau de bord dont l'entrée vient d'expirer),
+``single_flight(clé, calcul)`` ne lance le calcul qu'une fois : les autres requêtes attendent
+et reçoivent le résultat mis en cache.
+
+* entre threads d'un même processus : verrou local par clé, sans attente active ;
+* entre processus : verrou ``cache.add`` dans ``CACHES['default']`` et attente du résultat par
+  sondage, avec un délai croissant. Le résultat n'étant partagé que par le cache, la coordination
+  entre processus suppose un cache partagé (Redis) ; en mémoire locale, chaque processus calcule
+  au plus une fois. Un verrou consultatif PostgreSQL sérialiserait bien les calculs, mais sans
+  cache partagé les autres processus ne pourraient pas en lire le résultat.
+
+Le verrou expire après ``SINGLE_FLIGHT_LOCK_SECONDS`` (processus arrêté pendant le calcul). Il
+porte un jeton propre au calcul : un calcul plus long que ce délai ne supprime pas, en finissant,
+le verrou qu'un autre processus a pris entre-temps (comparaison et suppression atomiques sous Redis).
+Une requête qui attend plus de ``SINGLE_FLIGHT_WAIT_SECONDS`` calcule elle-même la valeur.
+"""
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+LOCK_SECONDS = getattr(settings, 'SINGLE_FLIGHT_LOCK_SECONDS', 30)
+WAIT_SECONDS = getattr(settings, 'SINGLE_FLIGHT_WAIT_SECONDS', 15)
+
+_MISSING = object()
+
+# clé -> [verrou, nombre de threads qui l'utilisent]
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _local_lock(key):
+    with _locks_guard:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _locks[key]
+
+
+# Supprimer le verrou seulement s'il porte encore notre jeton
+_RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+
+def _release(lock_key, token):
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        key = backend.make_and_validate_key(lock_key)
+        backend._cache.get_client(key, write=True).eval(_RELEASE_SCRIPT, 1, key, token)
+    elif cache.get(lock_key) == token:
+        # Autres caches (mémoire locale) : propres au processus, où _local_lock sérialise déjà les threads
+        cache.delete(lock_key)
+
+
+def _store(key, value, timeout):
+    seconds = timeout(value) if callable(timeout) else timeout
+    if seconds is None or seconds > 0:
+        cache.set(key, value, seconds)
+
+
+def single_flight(key, compute, timeout=60):
+    """
+    Valeur en cache sous ``key``, sinon ``compute()`` exécuté une seule fois pour toutes les
+    requêtes simultanées, puis mis en cache ``timeout`` secondes (ou ``timeout(valeur)``).
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _local_lock(key):
+        # Un autre thread du processus vient peut-être de la calculer
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'singleflight:{key}'
+        # Entier : stocké tel quel (non sérialisé par pickle) par le cache Redis de Django
+        token = secrets.randbits(62)
+        deadline = time.monotonic() + WAIT_SECONDS
+        delay = 0.02
+        while True:
+            if cache.add(lock_key, token, LOCK_SECONDS):
+                try:
+                    value = compute()
+                    _store(key, value, timeout)
+                    return value
+                finally:
+                    _release(lock_key, token)
+
+            # Un autre processus calcule : attendre son résultat
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if time.monotonic() > deadline:
+                return compute()
@@ -0,0 +1,334 @@
+"""
+Traces des requêtes : où part le temps d'une requête lente (base, sérialisation, rendu) ?
+
+``TracingMiddleware`` ouvre, pour chaque requête échantillonnée, une trace de spans imbriqués :
+
+    GET api/consultations/^appointments/$        requête HTTP (SERVER)
+    ├── AppointmentViewSet.list                   vue DRF et action, jusqu'au retour de la vue
+    │   ├── SELECT                                chaque requête SQL (CLIENT), via execute_wrapper
+    │   └── AppointmentSerializer.to_representation   passe de sérialisation principale
+    │       └── SELECT                            requêtes paresseuses lancées par la sérialisation
+    └── render                                    rendu de la réponse (ORJSONRenderer, MessagePack...)
+
+Seule la passe principale d'un sérialiseur ouvre un span (pas chaque objet ni chaque sérialiseur
+imbriqué) ; une trace garde au plus ``TRACING_MAX_SPANS`` spans (N+1), les suivants sont comptés.
+Le texte SQL est exporté sans ses paramètres (données de santé).
+
+Échantillonnage : une requête qui porte un en-tête W3C ``traceparent`` suit la décision de
+l'appelant (même trace, drapeau « sampled ») ; sinon une requête sur ``1 / TRACING_SAMPLE_RATE``
+est tracée. Une requête non échantillonnée ne crée aucun objet : les points d'instrumentation
+se limitent à lire une ContextVar. Sans ``TRACING_EXPORTER``, le middleware se retire
+(``MiddlewareNotUsed``) et rien n'est instrumenté.
+
+Export compatible OpenTelemetry : chaque trace est écrite sur une ligne au format OTLP/JSON
+(``{"resourceSpans": [...]}``), sur la sortie standard (``console``) ou à la fin de
+``TRACING_FILE`` (``file``). Ce fichier peut être relu par le récepteur ``otlpjsonfile`` du
+collecteur OpenTelemetry pour être envoyé vers Jaeger, Tempo, etc.
+"""
+import functools
+import json
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+EXPORTER = getattr(settings, 'TRACING_EXPORTER', None)
+FILE = getattr(settings, 'TRACING_FILE', 'traces.jsonl')
+SAMPLE_RATE = getattr(settings, 'TRACING_SAMPLE_RATE', 0.01)
+MAX_SPANS = getattr(settings, 'TRACING_MAX_SPANS', 1000)
+SERVICE_NAME = getattr(settings, 'TRACING_SERVICE_NAME', 'telesoins-backend')
+
+# Types de span OTLP
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# Span ouvert dans le contexte courant (None hors d'une requête échantillonnée)
+_current = ContextVar('tracing_span', default=None)
+
+_export_lock = threading.Lock()
+
+
+class Trace:
+    __slots__ = ('trace_id', 'spans', 'dropped')
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.spans = []
+        self.dropped = 0
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, trace, name, parent_id=None, kind=INTERNAL, attributes=None):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    def child(self, name, kind=INTERNAL, attributes=None):
+        """
+        Nouveau span enfant, ou None si la trace a atteint MAX_SPANS.
+        """
+        if len(self.trace.spans) >= MAX_SPANS:
+            self.trace.dropped += 1
+            return None
+        span = Span(self.trace, name, self.span_id, kind, attributes)
+        self.trace.spans.append(span)
+        return span
+
+    def finish(self, exc=None):
+        self.end = time.time_ns()
+        if exc is not None:
+            self.error = f'{type(exc).__name__}: {exc}'
+
+
+@contextmanager
+def span(name, kind=INTERNAL, attributes=None):
+    """
+    Span enfant du span courant pendant le bloc ; sans effet hors d'une requête échantillonnée.
+    """
+    parent = _current.get()
+    current = parent.child(name, kind, attributes) if parent is not None else None
+    if current is None:
+        yield None
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.finish(exc)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current.reset(token)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    connection = context['connection']
+    attributes = {
+        'db.system': connection.vendor,
+        'db.name': connection.alias,
+        'db.statement': sql,
+    }
+    operation = sql.split(None, 1)[0].upper() if sql else 'SQL'
+    with span(operation, CLIENT, attributes):
+        return execute(sql, params, many, context)
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+def _traced_representation(to_representation):
+    @functools.wraps(to_representation)
+    def wrapper(self, instance):
+        parent = _current.get()
+        # Passe principale uniquement : les sérialiseurs imbriqués restent dans son span
+        if parent is None or 'drf.serializer' in parent.attributes:
+            return to_representation(self, instance)
+        serializer = self.child if isinstance(self, serializers.ListSerializer) else self
+        name = type(serializer).__name__
+        attributes = {'drf.serializer': name, 'drf.many': isinstance(self, serializers.ListSerializer)}
+        with span(f'{name}.to_representation', attributes=attributes):
+            return to_representation(self, instance)
+    wrapper._traced = True
+    return wrapper
+
+
+def instrument_serializers():
+    """
+    Span autour de ``to_representation`` des sérialiseurs DRF (comme le font les
+    instrumentations OpenTelemetry : DRF n'offre pas de point d'accroche).
+    """
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(cls.to_representation, '_traced', False):
+            cls.to_representation = _traced_representation(cls.to_representation)
+
+
+def start_trace(request):
+    """
+    Span racine de la requête si elle est échantillonnée, sinon None.
+    """
+    match = TRACEPARENT.match(request.headers.get('traceparent', ''))
+    if match:
+        trace_id, parent_id, flags = match.groups()
+        if not int(flags, 16) & 1:
+            return None
+    elif random.random() < SAMPLE_RATE:
+        trace_id, parent_id = secrets.token_hex(16), None
+    else:
+        return None
+
+    trace = Trace(trace_id)
+    root = Span(trace, request.method, parent_id, SERVER, {
+        'http.request.method': request.method,
+        'url.path': request.path,
+    })
+    trace.spans.append(root)
+    return root
+
+
+def end_trace(root, request, response):
+    trace = root.trace
+    for span_ in trace.spans:
+        if span_.end is None:
+            span_.finish()
+
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.route:
+        root.name = f'{request.method} {match.route}'
+        root.attributes['http.route'] = match.route
+    root.attributes['http.response.status_code'] = response.status_code
+    if response.status_code >= 500:
+        root.error = f'HTTP {response.status_code}'
+    if trace.dropped:
+        root.attributes['tracing.dropped_spans'] = trace.dropped
+    export(trace)
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def otlp_json(trace):
+    """
+    Trace au format OTLP/JSON (ExportTraceServiceRequest).
+    """
+    spans = []
+    for span_ in trace.spans:
+        item = {
+            'traceId': trace.trace_id,
+            'spanId': span_.span_id,
+            'name': span_.name,
+            'kind': span_.kind,
+            'startTimeUnixNano': str(span_.start),
+            'endTimeUnixNano': str(span_.end),
+            'attributes': [_attribute(key, value) for key, value in span_.attributes.items()],
+            # 1 : OK, 2 : ERROR
+            'status': {'code': 2, 'message': span_.error} if span_.error else {'code': 1},
+        }
+        if span_.parent_id:
+            item['parentSpanId'] = span_.parent_id
+        spans.append(item)
+    return {'resourceSpans': [{
+        'resource': {'attributes': [_attribute('service.name', SERVICE_NAME)]},
+        'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}],
+    }]}
+
+
+def export(trace):
+    line = json.dumps(otlp_json(trace), separators=(',', ':')) + '\n'
+    with _export_lock:
+        if EXPORTER == 'console':
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        else:
+            with open(FILE, 'a') as f:
+                f.write(line)
+
+
+def view_name(request, view_func):
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+    return f'{view_class.__name__}.{action}' if action else view_class.__name__
+
+
+class TracingMiddleware:
+    """
+    Trace les requêtes échantillonnées (voir le module). Utilisable sous ASGI, comme
+    ``DatabaseRoutingMiddleware``.
+
+    Le span de la vue s'ouvre dans ``process_view`` et se ferme dans
+    ``process_template_response``, juste avant le rendu des réponses DRF ; le span ``render``
+    couvre ensuite ce rendu. Pour les autres réponses, le span de la vue se ferme avec la requête.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not EXPORTER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instrument_serializers()
+        connection_created.connect(install_sql_wrapper, dispatch_uid='tracing_sql_wrapper')
+        for connection in connections.all(initialized_only=True):
+            install_sql_wrapper(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        root = start_trace(request)
+        if root is None:
+            return self.get_response(request)
+        token = _current.set(root)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        end_trace(root, request, response)
+        return response
+
+    async def __acall__(self, request):
+        root = start_trace(request)
+        if root is None:
+            return await self.get_response(request)
+        token = _current.set(root)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        end_trace(root, request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        parent = _current.get()
+        if parent is not None:
+            view_span = parent.child(view_name(request, view_func))
+            if view_span is not None:
+                _current.set(view_span)
+
+    def process_template_response(self, request, response):
+        current = _current.get()
+        if current is not None and current.kind == INTERNAL and current.end is None:
+            current.finish()
+            root = current.trace.spans[0]
+            renderer = getattr(response, 'accepted_renderer', None)
+            render_span = root.child('render', attributes={'renderer': type(renderer).__name__} if renderer else None)
+            if render_span is not None:
+                _current.set(render_span)
+        return response
@@ -24,6 +24,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.authtoken import views as token_views
 
+from telesoins_backend.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
@@ -35,4 +37,7 @@ urlpatterns = [
 
     # Authentification Token classique
     path('api-token-auth/', token_views.obtain_auth_token),
+
+    # Métriques par vue au format Prometheus
+    path('metrics/', metrics_view, name='metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)